@@ -1,15 +1,19 @@
 import torch
 from .policy import PPOPolicy
 import torch.nn as nn
-from torch.distributions import Categorical
 
 class PPOAgent:
     def __init__(self, state_dim, num_activities, num_resources, 
-                 lr=3e-4, gamma=0.99, K_epochs=4, eps_clip=0.2, device="cpu", activities_embedding_dim=32):
+                 lr=3e-4, gamma=0.99, K_epochs=4, eps_clip=0.2, device="cpu", activities_embedding_dim=32,
+                 gae_lambda=0.95, minibatch_size=None, vtrace_rho_bar=1.0, vtrace_c_bar=1.0):
         self.device = device
         self.gamma = gamma
         self.eps_clip = eps_clip
         self.K_epochs = K_epochs
+        self.gae_lambda = gae_lambda
+        self.minibatch_size = minibatch_size  # None = one full-batch step per epoch
+        self.vtrace_rho_bar = vtrace_rho_bar    # truncation of the V-trace importance weights
+        self.vtrace_c_bar = vtrace_c_bar
         
         self.policy = PPOPolicy(state_dim, num_activities, num_resources, activities_embedding_dim=activities_embedding_dim).to(device)
         self.optimizer = torch.optim.Adam(self.policy.parameters(), lr=lr)
@@ -17,125 +21,177 @@ class PPOAgent:
         self.policy_old.load_state_dict(self.policy.state_dict())
         
         self.MseLoss = nn.MSELoss()
-        self.buffer = RolloutBuffer()
+        self.buffer = RolloutBuffer(device=device)
 
-    def select_action(self, state, activity_mask, resource_mask_callback, deterministic=False):
+    def _act(self, state, activity_mask, resource_mask_callback, deterministic):
         self.policy_old.eval()
         with torch.no_grad():
             state_t = torch.FloatTensor(state).unsqueeze(0).to(self.device)
             act_mask_t = torch.FloatTensor(activity_mask).unsqueeze(0).to(self.device)
 
-            # 1. Activity
-            act_logits = self.policy_old.get_activity_logits(state_t)
-            act_logits = act_logits.masked_fill(act_mask_t == 0, -1e9)
-            act_dist = Categorical(logits=act_logits)
-            
-            if deterministic:
-                activity_idx = torch.argmax(act_logits, dim=-1)
-            else:
-                activity_idx = act_dist.sample()
-
-            # 2. Resource
-            res_mask = resource_mask_callback(activity_idx.item())
-            res_mask_t = torch.FloatTensor(res_mask).unsqueeze(0).to(self.device)
-
-            res_logits = self.policy_old.get_resource_logits(state_t, activity_idx)
-            res_logits = res_logits.masked_fill(res_mask_t == 0, -1e9)
-            res_dist = Categorical(logits=res_logits)
-
-            if deterministic:
-                resource_idx = torch.argmax(res_logits, dim=-1)
-            else:
-                resource_idx = res_dist.sample()
-
-            log_prob = act_dist.log_prob(activity_idx) + res_dist.log_prob(resource_idx)
-            
-            # Use forward to get value or calculate it from features
-            features = self.policy_old.backbone(state_t)
-            value = self.policy_old.value_head(features).squeeze(-1)
+            # Single environment: the callback takes a plain activity index
+            activity_idx, resource_idx, log_prob, value, res_mask_t = self.policy_old.act(
+                state_t,
+                act_mask_t,
+                lambda activity: resource_mask_callback(activity.item()),
+                deterministic=deterministic,
+            )
+        return state_t, act_mask_t, res_mask_t, activity_idx, resource_idx, log_prob, value
+
+    def select_action(self, state, activity_mask, resource_mask_callback, deterministic=False):
+        """Chooses an action and records it in the rollout buffer for the next update."""
+        state_t, act_mask_t, res_mask_t, activity_idx, resource_idx, log_prob, value = self._act(
+            state, activity_mask, resource_mask_callback, deterministic
+        )
 
         # Store masks and other info for the update
-        self.buffer.states.append(state_t)
-        self.buffer.activities.append(activity_idx)
-        self.buffer.resources.append(resource_idx)
-        self.buffer.logprobs.append(log_prob)
-        self.buffer.state_values.append(value)
-        self.buffer.activity_masks.append(act_mask_t)
-        self.buffer.resource_masks.append(res_mask_t)
+        self.buffer.add(state_t, activity_idx, resource_idx, log_prob, value, act_mask_t, res_mask_t)
 
         return activity_idx.item(), resource_idx.item()
 
-    def update(self):
-        if not self.buffer.rewards:
+    def act(self, state, activity_mask, resource_mask_callback, deterministic=False):
+        """Inference only: chooses an action without touching the rollout buffer."""
+        _, _, _, activity_idx, resource_idx, _, _ = self._act(
+            state, activity_mask, resource_mask_callback, deterministic
+        )
+        return activity_idx.item(), resource_idx.item()
+
+    def add_trajectory(self, trajectory):
+        """Appends a rollout worker's trajectory (see agent.rollout.Trajectory) to the buffer."""
+        def t(array, dtype):
+            return torch.as_tensor(array, dtype=dtype, device=self.device)
+
+        if trajectory.num_steps == 0:
+            return
+        self.buffer.add(
+            t(trajectory.states, torch.float32),
+            t(trajectory.activities, torch.long),
+            t(trajectory.resources, torch.long),
+            t(trajectory.logprobs, torch.float32),
+            t(trajectory.state_values, torch.float32),
+            t(trajectory.activity_masks, torch.float32),
+            t(trajectory.resource_masks, torch.float32),
+        )
+        self.buffer.add_reward(trajectory.rewards, trajectory.dones)
+
+    def _evaluate_in_chunks(self, states, activities, resources, activity_masks, resource_masks):
+        """policy_old log probs and values for the whole buffer, minibatch by minibatch."""
+        n = states.shape[0]
+        chunk = min(self.minibatch_size or n, n)
+        logprobs, values = [], []
+        with torch.no_grad():
+            for start in range(0, n, chunk):
+                sl = slice(start, start + chunk)
+                lp, _, v = self.policy_old.evaluate(
+                    states[sl], activities[sl], resources[sl], activity_masks[sl], resource_masks[sl]
+                )
+                logprobs.append(lp)
+                values.append(v)
+        return torch.cat(logprobs), torch.cat(values)
+
+    def update(self, off_policy=False):
+        """
+        PPO update over the collected rollout.
+
+        Advantages are GAE(lambda) estimates built from the stored state values
+        and normalised over the rollout; value targets are advantages + values.
+        Each of the K epochs visits the rollout once in shuffled minibatches of
+        `minibatch_size` transitions (the full rollout when None), so memory is
+        bounded by the minibatch size rather than by the rollout length.
+
+        With `off_policy=True` the rollout may come from older policy versions
+        (asynchronous actors). The stored log probs are then treated as the
+        behaviour policy: values and log probs are recomputed with the current
+        weights, value targets and advantages come from V-trace with truncated
+        importance weights (rho_bar, c_bar), and the PPO ratio is taken against
+        the current weights rather than the stale behaviour policy.
+
+        Returns mean losses, entropy, approx_kl and clip_fraction over all
+        minibatch steps.
+        """
+        if len(self.buffer) == 0 or len(self.buffer.rewards) == 0:
             return None
 
-        # Monte Carlo estimate of returns
-        rewards = []
-        discounted_reward = 0
-        for reward, is_terminal in zip(reversed(self.buffer.rewards), reversed(self.buffer.is_terminals)):
-            if is_terminal:
-                discounted_reward = 0
-            discounted_reward = reward + (self.gamma * discounted_reward)
-            rewards.insert(0, discounted_reward)
-
-        # Normalizing the rewards
-        rewards = torch.tensor(rewards, dtype=torch.float32).to(self.device)
-
-        rewards_std = rewards.std()
-        if rewards_std > 0.1:
-            rewards = (rewards - rewards.mean()) / (rewards_std + 1e-7)
+        # Contiguous views over the buffer storage
+        old_states = self.buffer.states.detach()
+        old_activities = self.buffer.activities.detach()
+        old_resources = self.buffer.resources.detach()
+        old_logprobs = self.buffer.logprobs.detach()
+        old_state_values = self.buffer.state_values.detach()
+        old_activity_masks = self.buffer.activity_masks.detach()
+        old_resource_masks = self.buffer.resource_masks.detach()
+
+        if off_policy:
+            behaviour_logprobs = old_logprobs
+            old_logprobs, old_state_values = self._evaluate_in_chunks(
+                old_states, old_activities, old_resources, old_activity_masks, old_resource_masks
+            )
+            returns, advantages = self.buffer.compute_vtrace(
+                old_state_values.cpu(), (old_logprobs - behaviour_logprobs).cpu(),
+                self.gamma, self.gae_lambda, self.vtrace_rho_bar, self.vtrace_c_bar,
+            )
+            returns, advantages = returns.to(self.device), advantages.to(self.device)
+        else:
+            advantages = self.buffer.compute_gae(old_state_values.cpu(), self.gamma, self.gae_lambda).to(self.device)
+            returns = advantages + old_state_values
+
+        adv_std = advantages.std() if advantages.numel() > 1 else advantages.new_tensor(0.0)
+        if adv_std > 1e-8:
+            advantages = (advantages - advantages.mean()) / (adv_std + 1e-8)
         else:
-            print("Warning: Low reward variance, skipping normalization to avoid amplifying noise.")
-            rewards = rewards - rewards.mean()  # center only; do not amplify noise
-
-        # convert list to tensor
-        old_states = torch.squeeze(torch.stack(self.buffer.states, dim=0)).detach().to(self.device)
-        old_activities = torch.squeeze(torch.stack(self.buffer.activities, dim=0)).detach().to(self.device)
-        old_resources = torch.squeeze(torch.stack(self.buffer.resources, dim=0)).detach().to(self.device)
-        old_logprobs = torch.squeeze(torch.stack(self.buffer.logprobs, dim=0)).detach().to(self.device)
-        old_state_values = torch.squeeze(torch.stack(self.buffer.state_values, dim=0)).detach().to(self.device)
-        old_activity_masks = torch.squeeze(torch.stack(self.buffer.activity_masks, dim=0)).detach().to(self.device)
-        old_resource_masks = torch.squeeze(torch.stack(self.buffer.resource_masks, dim=0)).detach().to(self.device)
-
-        # calculate advantages
-        advantages = rewards.detach() - old_state_values.detach()
-
-        # Optimize policy for K epochs
-        total_policy_loss = 0.0
-        total_value_loss = 0.0
-        total_entropy = 0.0
-        total_loss_val = 0.0
+            advantages = advantages - advantages.mean()  # center only; do not amplify noise
+
+        n = old_states.shape[0]
+        batch_size = min(self.minibatch_size or n, n)
+
+        totals = {"policy_loss": 0.0, "value_loss": 0.0, "entropy": 0.0, "total_loss": 0.0,
+                  "approx_kl": 0.0, "clip_fraction": 0.0}
+        num_steps = 0
 
         for _ in range(self.K_epochs):
-            # Evaluating old actions and values
-            logprobs, entropy, state_values = self.policy.evaluate(
-                old_states, old_activities, old_resources,
-                old_activity_masks, old_resource_masks
-            )
+            permutation = torch.randperm(n, device=self.device)
+            for start in range(0, n, batch_size):
+                idx = permutation[start:start + batch_size]
 
-            # Finding the ratio (pi_theta / pi_theta__old)
-            ratios = torch.exp(logprobs - old_logprobs.detach())
+                # Evaluating old actions and values
+                logprobs, entropy, state_values = self.policy.evaluate(
+                    old_states[idx], old_activities[idx], old_resources[idx],
+                    old_activity_masks[idx], old_resource_masks[idx]
+                )
 
-            # Finding Surrogate Loss
-            surr1 = ratios * advantages
-            surr2 = torch.clamp(ratios, 1-self.eps_clip, 1+self.eps_clip) * advantages
+                # Finding the ratio (pi_theta / pi_theta__old)
+                log_ratio = logprobs - old_logprobs[idx]
+                ratios = torch.exp(log_ratio)
+                mb_advantages = advantages[idx]
 
-            policy_loss = -torch.min(surr1, surr2).mean()
-            value_loss = 0.5 * self.MseLoss(state_values, rewards)
-            entropy_bonus = 0.01 * entropy.mean()
+                # Finding Surrogate Loss
+                surr1 = ratios * mb_advantages
+                surr2 = torch.clamp(ratios, 1-self.eps_clip, 1+self.eps_clip) * mb_advantages
 
-            # final loss of PyTorch optimization
-            loss = policy_loss + value_loss - entropy_bonus
+                policy_loss = -torch.min(surr1, surr2).mean()
+                value_loss = 0.5 * self.MseLoss(state_values, returns[idx])
+                entropy_bonus = 0.01 * entropy.mean()
 
-            # take gradient step
-            self.optimizer.zero_grad()
-            loss.backward()
-            self.optimizer.step()
+                # final loss of PyTorch optimization
+                loss = policy_loss + value_loss - entropy_bonus
 
-            total_policy_loss += policy_loss.item()
-            total_value_loss += value_loss.item()
-            total_entropy += entropy.mean().item()
-            total_loss_val += loss.item()
+                # take gradient step
+                self.optimizer.zero_grad()
+                loss.backward()
+                self.optimizer.step()
+
+                with torch.no_grad():
+                    # Low-variance KL estimator: E[(r - 1) - log r]
+                    approx_kl = ((ratios - 1) - log_ratio).mean()
+                    clip_fraction = ((ratios - 1).abs() > self.eps_clip).float().mean()
+
+                totals["policy_loss"] += policy_loss.item()
+                totals["value_loss"] += value_loss.item()
+                totals["entropy"] += entropy.mean().item()
+                totals["total_loss"] += loss.item()
+                totals["approx_kl"] += approx_kl.item()
+                totals["clip_fraction"] += clip_fraction.item()
+                num_steps += 1
 
         # Copy new weights into old policy
         self.policy_old.load_state_dict(self.policy.state_dict())
@@ -143,32 +199,206 @@ class PPOAgent:
         # clear buffer
         self.buffer.clear()
 
-        return {
-            "policy_loss": total_policy_loss / self.K_epochs,
-            "value_loss": total_value_loss / self.K_epochs,
-            "entropy": total_entropy / self.K_epochs,
-            "total_loss": total_loss_val / self.K_epochs,
-        }
+        return {key: value / num_steps for key, value in totals.items()}
+
+def _reverse_scan(deltas, discounts):
+    """
+    Solves x_t = deltas_t + discounts_t * x_{t+1} with x_T = 0 for all t.
+
+    Recursive doubling: after the step with offset k, (deltas_t, discounts_t)
+    describe x_t in terms of x_{t+2k}, so ceil(log2 T) vectorized steps
+    replace the O(T) Python loop. Every step only multiplies and adds the
+    discount factors, so nothing overflows on long rollouts.
+    """
+    deltas, discounts = deltas.clone(), discounts.clone()
+    n = deltas.shape[0]
+    offset = 1
+    while offset < n:
+        deltas[:-offset] = deltas[:-offset] + discounts[:-offset] * deltas[offset:]
+        discounts[:-offset] = discounts[:-offset] * discounts[offset:]
+        discounts[-offset:] = 0.0
+        offset *= 2
+    return deltas
 
 class RolloutBuffer:
-    def __init__(self):
-        self.states = []
-        self.activities = []
-        self.resources = []
-        self.logprobs = []
-        self.rewards = []
-        self.state_values = []
-        self.is_terminals = []
-        self.activity_masks = []
-        self.resource_masks = []
-    
+    """
+    Tensor-backed rollout storage.
+
+    Transitions are written at a cursor into contiguous preallocated tensors
+    (states, actions, log-probs, values and both masks); capacity doubles when
+    full. Storage is allocated on the first `add`, so dimensions are inferred
+    from the data. Rewards and terminal flags arrive after the environment
+    step and have their own cursor (`add_reward`).
+
+    The column properties return views over the filled part of the storage.
+    """
+
+    _FIELDS = ("states", "activities", "resources", "logprobs", "state_values",
+               "activity_masks", "resource_masks")
+
+    def __init__(self, capacity=1024, device="cpu"):
+        self.capacity = capacity
+        self.device = device
+        self._size = 0
+        self._reward_size = 0
+        self._storage = None
+        self._rewards = torch.zeros(capacity, dtype=torch.float32)
+        self._is_terminals = torch.zeros(capacity, dtype=torch.bool)
+
+    def _allocate(self, state, activity_mask, resource_mask):
+        def empty(*shape, dtype=torch.float32):
+            return torch.zeros((self.capacity,) + shape, dtype=dtype, device=self.device)
+
+        self._storage = {
+            "states": empty(state.shape[-1]),
+            "activities": empty(dtype=torch.long),
+            "resources": empty(dtype=torch.long),
+            "logprobs": empty(),
+            "state_values": empty(),
+            "activity_masks": empty(activity_mask.shape[-1]),
+            "resource_masks": empty(resource_mask.shape[-1]),
+        }
+
+    def _grow(self, needed):
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.capacity:
+            return
+        if self._storage is not None:
+            for name, old in self._storage.items():
+                new = torch.zeros((capacity,) + tuple(old.shape[1:]), dtype=old.dtype, device=old.device)
+                new[:self._size] = old[:self._size]
+                self._storage[name] = new
+        for name in ("_rewards", "_is_terminals"):
+            old = getattr(self, name)
+            new = torch.zeros(capacity, dtype=old.dtype)
+            new[:self._reward_size] = old[:self._reward_size]
+            setattr(self, name, new)
+        self.capacity = capacity
+
+    def add(self, state, activity, resource, logprob, state_value, activity_mask, resource_mask):
+        """Appends one transition, or a batch if the tensors have a leading batch dimension."""
+        state = state.reshape(-1, state.shape[-1])
+        n = state.shape[0]
+        if self._storage is None:
+            self._allocate(state, activity_mask, resource_mask)
+        self._grow(self._size + n)
+
+        i, j = self._size, self._size + n
+        values = (state, activity, resource, logprob, state_value, activity_mask, resource_mask)
+        for name, value in zip(self._FIELDS, values):
+            column = self._storage[name]
+            column[i:j] = value.reshape((n,) + tuple(column.shape[1:]))
+        self._size = j
+
+    def add_reward(self, reward, done):
+        """Records the reward and terminal flag of the oldest transition still without one."""
+        reward = torch.as_tensor(reward, dtype=torch.float32).reshape(-1)
+        done = torch.as_tensor(done, dtype=torch.bool).reshape(-1)
+        i, j = self._reward_size, self._reward_size + reward.shape[0]
+        self._grow(j)
+        self._rewards[i:j] = reward
+        self._is_terminals[i:j] = done
+        self._reward_size = j
+
+    def _next_step_mask(self):
+        """1.0 where step t bootstraps from step t+1, 0.0 after a terminal step or at the end of the rollout."""
+        continues = ~self.is_terminals
+        if continues.numel():
+            continues[-1] = False
+        return continues.double()
+
+    def compute_gae(self, values, gamma, gae_lambda):
+        """
+        GAE(lambda) advantages from the stored state values.
+
+        Bootstraps from V(s_{t+1}) within an episode and from 0 after a
+        terminal step or at the end of the rollout.
+        """
+        rewards = self.rewards.double()
+        values = values.reshape(-1).double()
+        continues = self._next_step_mask()
+        next_values = torch.cat([values[1:], values.new_zeros(1)]) * continues
+        deltas = rewards + gamma * next_values - values
+        advantages = _reverse_scan(deltas, gamma * gae_lambda * continues)
+        return advantages.float()
+
+    def compute_vtrace(self, values, log_rhos, gamma, gae_lambda, rho_bar=1.0, c_bar=1.0):
+        """
+        V-trace targets and policy-gradient advantages (Espeholt et al., 2018).
+
+        `log_rhos` are log(pi / mu) for the target policy pi and the behaviour
+        policy mu that generated each step. With rho_t = min(rho_bar, e^log_rho)
+        and c_t = lambda * min(c_bar, e^log_rho):
+
+            vs_t = V_t + rho_t * delta_t + gamma * c_t * (vs_{t+1} - V_{t+1})
+            adv_t = rho_t * (r_t + gamma * vs_{t+1} - V_t)
+
+        Bootstraps from 0 after terminal steps and at the end of the rollout.
+        Returns (vs, adv).
+        """
+        rewards = self.rewards.double()
+        values = values.reshape(-1).double()
+        ratios = torch.exp(log_rhos.reshape(-1).double())
+        rhos = ratios.clamp(max=rho_bar)
+        cs = gae_lambda * ratios.clamp(max=c_bar)
+        continues = self._next_step_mask()
+        next_values = torch.cat([values[1:], values.new_zeros(1)]) * continues
+
+        # vs_t - V_t follows the same reverse recurrence as GAE
+        deltas = rhos * (rewards + gamma * next_values - values)
+        vs = values + _reverse_scan(deltas, gamma * cs * continues)
+        next_vs = torch.cat([vs[1:], vs.new_zeros(1)]) * continues
+        advantages = rhos * (rewards + gamma * next_vs - values)
+        return vs.float(), advantages.float()
+
+    def __len__(self):
+        return self._size
+
+    def _column(self, name):
+        if self._storage is None:
+            return torch.empty(0, device=self.device)
+        return self._storage[name][:self._size]
+
+    @property
+    def states(self): return self._column("states")
+    @property
+    def activities(self): return self._column("activities")
+    @property
+    def resources(self): return self._column("resources")
+    @property
+    def logprobs(self): return self._column("logprobs")
+    @property
+    def state_values(self): return self._column("state_values")
+    @property
+    def activity_masks(self): return self._column("activity_masks")
+    @property
+    def resource_masks(self): return self._column("resource_masks")
+
+    @property
+    def rewards(self):
+        return self._rewards[:self._reward_size]
+
+    @property
+    def is_terminals(self):
+        return self._is_terminals[:self._reward_size]
+
+    def state_dict(self):
+        """Copies of the filled part of the buffer, so a mid-rollout checkpoint can resume exactly."""
+        state = {name: getattr(self, name).detach().cpu().clone() for name in self._FIELDS}
+        state["rewards"] = self.rewards.clone()
+        state["is_terminals"] = self.is_terminals.clone()
+        return state
+
+    def load_state_dict(self, state):
+        self.clear()
+        if len(state["states"]) > 0:
+            self.add(*(state[name].to(self.device) for name in self._FIELDS))
+        if len(state["rewards"]) > 0:
+            self.add_reward(state["rewards"], state["is_terminals"])
+
     def clear(self):
-        del self.states[:]
-        del self.activities[:]
-        del self.resources[:]
-        del self.logprobs[:]
-        del self.rewards[:]
-        del self.state_values[:]
-        del self.is_terminals[:]
-        del self.activity_masks[:]
-        del self.resource_masks[:]
+        # Storage is kept for the next rollout; only the cursors move back
+        self._size = 0
+        self._reward_size = 0
@@ -0,0 +1,204 @@
+import glob
+import os
+import random
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+import torch
+
+
+def _to_cpu(obj):
+    """Deep copy of a (nested) state dict with every tensor cloned to CPU."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().cpu().clone()
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+
+def capture_rng_state() -> dict:
+    return {
+        "python": random.getstate(),
+        "numpy": np.random.get_state(),
+        "torch": torch.get_rng_state(),
+    }
+
+
+def restore_rng_state(state: dict):
+    random.setstate(state["python"])
+    np.random.set_state(state["numpy"])
+    torch.set_rng_state(state["torch"])
+
+
+def atomic_save(obj, path: str):
+    """torch.save to a temporary file next to `path`, then rename over it."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        torch.save(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class CheckpointManager:
+    """
+    Crash-safe, non-blocking checkpointing for the training loop.
+
+    `save` snapshots everything needed to resume in memory: policy, optimizer,
+    rollout buffer, metrics tracker, update counter and the Python / NumPy /
+    torch RNG states. A background thread then writes it with an atomic rename,
+    so a crash never leaves a truncated file and the loop only pays for the
+    in-memory copy.
+
+    Retention:
+        checkpoint_epXXXX.pt : the last `keep_last` periodic checkpoints
+        best_epXXXX.pt       : the `keep_best` checkpoints with the highest metric
+        best_model.pt        : always the single best (stable path for evaluation)
+
+    File layout (a dict saved with torch.save):
+        episode, policy_state_dict, optimizer_state_dict, metrics_summary
+            : the weights-only core, also read by `train.load_checkpoint`
+        buffer_state, tracker_state, update_count, rng_state, extra
+            : resume state; missing keys are skipped by `load`
+    """
+
+    def __init__(self, directory: str, keep_last: int = 3, keep_best: int = 1,
+                 metric: str = "sla_compliance_rate", verbose: bool = True):
+        self.directory = directory
+        self.keep_last = keep_last
+        self.keep_best = keep_best
+        self.metric = metric
+        self.verbose = verbose
+        os.makedirs(directory, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint")
+        self._pending = []
+        # Retention state is only touched on the writer thread
+        self._periodic: List[str] = []
+        self._best: List[Tuple[float, int, str]] = []  # (metric, episode, path), best first
+        self._scan_existing()
+
+    def _scan_existing(self):
+        """Picks up checkpoints already in the directory, so retention holds across resumes."""
+        self._periodic = sorted(glob.glob(os.path.join(self.directory, "checkpoint_ep*.pt")))
+        for path in glob.glob(os.path.join(self.directory, "best_ep*.pt")):
+            checkpoint = torch.load(path, map_location="cpu", weights_only=False)
+            value = checkpoint.get("metrics_summary", {}).get(self.metric)
+            if value is not None:
+                self._best.append((value, checkpoint["episode"], path))
+        self._best.sort(key=lambda item: -item[0])
+
+    def snapshot(self, agent, episode: int, metrics_summary: dict, tracker=None, update_count: int = 0,
+                 extra: Optional[dict] = None) -> dict:
+        """In-memory copy of the full training state; cheap compared with a write."""
+        return {
+            "episode": episode,
+            "policy_state_dict": _to_cpu(agent.policy.state_dict()),
+            "optimizer_state_dict": _to_cpu(agent.optimizer.state_dict()),
+            "metrics_summary": dict(metrics_summary),
+            "buffer_state": agent.buffer.state_dict(),
+            "tracker_state": tracker.state_dict() if tracker is not None else None,
+            "update_count": update_count,
+            "rng_state": capture_rng_state(),
+            "extra": dict(extra or {}),
+        }
+
+    def save(self, agent, episode: int, metrics_summary: dict, tracker=None, update_count: int = 0,
+             periodic: bool = True, extra: Optional[dict] = None):
+        """
+        Snapshots now and writes in the background. `periodic` adds the
+        episode to the rolling window; the checkpoint also competes for the best
+        slots when `metrics_summary` contains the tracked metric.
+        """
+        state = self.snapshot(agent, episode, metrics_summary, tracker, update_count, extra)
+        self._submit(self._write, state, periodic)
+
+    def save_as(self, agent, name: str, episode: int, metrics_summary: dict, tracker=None,
+                update_count: int = 0, extra: Optional[dict] = None):
+        """Writes a named checkpoint (e.g. final_model.pt) outside the retention rules."""
+        state = self.snapshot(agent, episode, metrics_summary, tracker, update_count, extra)
+        self._submit(self._write_file, state, os.path.join(self.directory, name))
+
+    def _submit(self, fn, *args):
+        self._pending = [f for f in self._pending if not f.done()]
+        self._pending.append(self._executor.submit(fn, *args))
+
+    def _write_file(self, state: dict, path: str):
+        atomic_save(state, path)
+        if self.verbose:
+            print(f"  Checkpoint saved: {path}")
+
+    def _write(self, state: dict, periodic: bool):
+        episode = state["episode"]
+        written = None
+
+        if periodic:
+            written = os.path.join(self.directory, f"checkpoint_ep{episode:04d}.pt")
+            self._write_file(state, written)
+            self._periodic.append(written)
+            while len(self._periodic) > self.keep_last:
+                self._remove(self._periodic.pop(0))
+
+        value = state["metrics_summary"].get(self.metric)
+        if value is None or self.keep_best <= 0:
+            return
+        if len(self._best) >= self.keep_best and value <= self._best[-1][0]:
+            return
+
+        best_path = os.path.join(self.directory, f"best_ep{episode:04d}.pt")
+        if written is not None:
+            shutil.copyfile(written, f"{best_path}.tmp")
+            os.replace(f"{best_path}.tmp", best_path)
+        else:
+            atomic_save(state, best_path)
+        self._best.append((value, episode, best_path))
+        self._best.sort(key=lambda item: -item[0])
+        while len(self._best) > self.keep_best:
+            self._remove(self._best.pop()[2])
+
+        if self._best[0][2] == best_path:
+            top = os.path.join(self.directory, "best_model.pt")
+            shutil.copyfile(best_path, f"{top}.tmp")
+            os.replace(f"{top}.tmp", top)
+            if self.verbose:
+                print(f"  Checkpoint saved: {top}")
+
+    def _remove(self, path: str):
+        keep = set(self._periodic) | {p for _, _, p in self._best}
+        if path not in keep and os.path.exists(path):
+            os.remove(path)
+
+    def wait(self):
+        """Blocks until every queued write has finished; re-raises write errors."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def load(path: str, agent, tracker=None, restore_rng: bool = True) -> dict:
+        """
+        Restores a checkpoint into `agent` (both policies, optimizer, buffer)
+        and `tracker`, and the RNG states unless `restore_rng` is False.
+        Weights-only checkpoints (just the core keys) also load.
+        Returns the checkpoint dict.
+        """
+        checkpoint = torch.load(path, map_location=agent.device, weights_only=False)
+        agent.policy.load_state_dict(checkpoint["policy_state_dict"])
+        agent.policy_old.load_state_dict(checkpoint["policy_state_dict"])
+        agent.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
+        if checkpoint.get("buffer_state") is not None:
+            agent.buffer.load_state_dict(checkpoint["buffer_state"])
+        if tracker is not None and checkpoint.get("tracker_state") is not None:
+            tracker.load_state_dict(checkpoint["tracker_state"])
+        if restore_rng and checkpoint.get("rng_state") is not None:
+            restore_rng_state(checkpoint["rng_state"])
+        print(f"  Checkpoint loaded from: {path} (episode {checkpoint['episode']})")
+        return checkpoint
@@ -0,0 +1,132 @@
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .policy import PPOPolicy
+
+
+def policy_dims_from_state_dict(state_dict: dict) -> dict:
+    """Recovers the PPOPolicy constructor arguments from its weights."""
+    return {
+        "state_dim": state_dict["backbone.0.weight"].shape[1],
+        "num_activities": state_dict["activity_head.weight"].shape[0],
+        "num_resources": state_dict["resource_head.weight"].shape[0],
+        "activities_embedding_dim": state_dict["activity_embedding.weight"].shape[1],
+    }
+
+
+def load_policy(checkpoint_path: str, map_location: str = "cpu") -> PPOPolicy:
+    """Builds a PPOPolicy from a training checkpoint without the agent or the simulator."""
+    checkpoint = torch.load(checkpoint_path, map_location=map_location, weights_only=False)
+    state_dict = checkpoint.get("policy_state_dict", checkpoint)
+    policy = PPOPolicy(**policy_dims_from_state_dict(state_dict))
+    policy.load_state_dict(state_dict)
+    return policy.eval()
+
+
+def resource_mask_table(skill_matrix: Optional[np.ndarray], num_activities: int, num_resources: int) -> np.ndarray:
+    """
+    (A, R) resource mask per activity, as SkillBasedMaskFunction computes it:
+    rows with no skilled resource and the END row (last) allow every resource.
+    Without a skill matrix every resource is allowed.
+    """
+    if skill_matrix is None:
+        return np.ones((num_activities, num_resources), dtype=np.float32)
+    table = np.array(skill_matrix, dtype=np.float32, copy=True)
+    table[~table.any(axis=1)] = 1.0
+    table[-1] = 1.0
+    return table
+
+
+class CompiledPolicy(nn.Module):
+    """
+    Self-contained inference graph for a trained PPOPolicy.
+
+    Inputs  : state (B, state_dim), activity_mask (B, A),
+              activity_noise (B, A), resource_noise (B, R).
+    Outputs : activity (B,), resource (B,), value (B,).
+
+    Actions are argmax(masked_logits + noise). Zero noise gives the greedy
+    action; standard Gumbel noise (-log(-log(U))) gives a sample from the
+    masked softmax, so both modes share one graph and the caller owns the
+    randomness. The resource mask is looked up from a skill table embedded in
+    the graph (see `resource_mask_table`), so no Python callback is needed.
+    """
+
+    def __init__(self, policy: PPOPolicy, skill_matrix: Optional[np.ndarray] = None):
+        super().__init__()
+        self.backbone = policy.backbone
+        self.activity_head = policy.activity_head
+        self.activity_embedding = policy.activity_embedding
+        self.resource_head = policy.resource_head
+        self.value_head = policy.value_head
+
+        num_activities = policy.activity_head.out_features
+        num_resources = policy.resource_head.out_features
+        table = resource_mask_table(skill_matrix, num_activities, num_resources)
+        self.register_buffer("resource_masks", torch.as_tensor(table))
+
+    def forward(self, state: torch.Tensor, activity_mask: torch.Tensor,
+                activity_noise: torch.Tensor, resource_noise: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+        features = self.backbone(state)
+
+        activity_logits = self.activity_head(features).masked_fill(activity_mask == 0, -1e9)
+        activity = torch.argmax(activity_logits + activity_noise, dim=-1)
+
+        res_input = torch.cat([features, self.activity_embedding(activity)], dim=-1)
+        resource_mask = self.resource_masks[activity]
+        resource_logits = self.resource_head(res_input).masked_fill(resource_mask == 0, -1e9)
+        resource = torch.argmax(resource_logits + resource_noise, dim=-1)
+
+        value = self.value_head(features).squeeze(-1)
+        return activity, resource, value
+
+
+def _example_inputs(compiled: CompiledPolicy, batch_size: int = 1):
+    state_dim = compiled.backbone[0].in_features
+    num_activities, num_resources = compiled.resource_masks.shape
+    return (
+        torch.zeros(batch_size, state_dim),
+        torch.ones(batch_size, num_activities),
+        torch.zeros(batch_size, num_activities),
+        torch.zeros(batch_size, num_resources),
+    )
+
+
+def export_torchscript(policy: PPOPolicy, path: str, skill_matrix: Optional[np.ndarray] = None):
+    """Saves a TorchScript module loadable with `torch.jit.load` alone."""
+    compiled = CompiledPolicy(policy, skill_matrix).eval()
+    scripted = torch.jit.script(compiled)
+    scripted = torch.jit.freeze(scripted)
+    scripted.save(path)
+    return path
+
+
+def export_onnx(policy: PPOPolicy, path: str, skill_matrix: Optional[np.ndarray] = None, opset_version: int = 17):
+    """Saves an ONNX graph with a dynamic batch dimension. Requires the onnx package."""
+    compiled = CompiledPolicy(policy, skill_matrix).eval()
+    batch = {0: "batch"}
+    torch.onnx.export(
+        compiled,
+        _example_inputs(compiled),
+        path,
+        input_names=["state", "activity_mask", "activity_noise", "resource_noise"],
+        output_names=["activity", "resource", "value"],
+        dynamic_axes={name: batch for name in
+                      ("state", "activity_mask", "activity_noise", "resource_noise", "activity", "resource", "value")},
+        opset_version=opset_version,
+        dynamo=False,
+    )
+    return path
+
+
+def export_numpy(policy: PPOPolicy, path: str, skill_matrix: Optional[np.ndarray] = None):
+    """Saves the weights and the resource mask table as an .npz for agent.numpy_policy.NumpyPolicy."""
+    arrays = {k.replace(".", "_"): v.detach().cpu().numpy() for k, v in policy.state_dict().items()}
+    arrays["resource_masks"] = resource_mask_table(
+        skill_matrix, policy.activity_head.out_features, policy.resource_head.out_features
+    )
+    np.savez(path, **arrays)
+    return path
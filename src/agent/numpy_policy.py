@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class NumpyPolicy:
+    """
+    Torch-free runner for a policy exported with `agent.export.export_numpy`.
+
+    Mirrors CompiledPolicy: two ReLU layers, masked activity logits, the
+    activity embedding for the conditional resource head, and the embedded
+    resource mask table. Only NumPy is needed at load and run time.
+    """
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.w0, self.b0 = data["backbone_0_weight"], data["backbone_0_bias"]
+            self.w2, self.b2 = data["backbone_2_weight"], data["backbone_2_bias"]
+            self.w_act, self.b_act = data["activity_head_weight"], data["activity_head_bias"]
+            self.embedding = data["activity_embedding_weight"]
+            self.w_res, self.b_res = data["resource_head_weight"], data["resource_head_bias"]
+            self.w_val, self.b_val = data["value_head_weight"], data["value_head_bias"]
+            self.resource_masks = data["resource_masks"]
+
+        # Resource head split so the concat [features, embedding] is never built
+        hidden = self.w2.shape[0]
+        self.w_res_features = np.ascontiguousarray(self.w_res[:, :hidden].T)
+        self.w_res_embedding = np.ascontiguousarray(self.w_res[:, hidden:].T)
+        self.w0, self.w2 = np.ascontiguousarray(self.w0.T), np.ascontiguousarray(self.w2.T)
+        self.w_act, self.w_val = np.ascontiguousarray(self.w_act.T), np.ascontiguousarray(self.w_val.T)
+
+    @property
+    def state_dim(self) -> int: return self.w0.shape[0]
+    @property
+    def num_activities(self) -> int: return self.w_act.shape[1]
+    @property
+    def num_resources(self) -> int: return self.w_res_features.shape[1]
+
+    def act(self, state, activity_mask, deterministic: bool = True, rng: np.random.Generator = None):
+        """
+        Chooses (activity, resource, value) for one state or a (B, state_dim) batch.
+
+        Greedy when `deterministic`; otherwise samples from the masked
+        softmaxes with Gumbel noise drawn from `rng`.
+        """
+        state = np.asarray(state, dtype=np.float32)
+        single = state.ndim == 1
+        state = np.atleast_2d(state)
+        activity_mask = np.atleast_2d(np.asarray(activity_mask))
+
+        features = np.maximum(state @ self.w0 + self.b0, 0.0)
+        features = np.maximum(features @ self.w2 + self.b2, 0.0)
+
+        activity_logits = np.where(activity_mask == 0, -1e9, features @ self.w_act + self.b_act)
+        if not deterministic:
+            rng = rng or np.random.default_rng()
+            activity_logits = activity_logits + rng.gumbel(size=activity_logits.shape)
+        activity = np.argmax(activity_logits, axis=-1)
+
+        resource_logits = features @ self.w_res_features + self.embedding[activity] @ self.w_res_embedding + self.b_res
+        resource_logits = np.where(self.resource_masks[activity] == 0, -1e9, resource_logits)
+        if not deterministic:
+            resource_logits = resource_logits + rng.gumbel(size=resource_logits.shape)
+        resource = np.argmax(resource_logits, axis=-1)
+
+        value = (features @ self.w_val + self.b_val)[:, 0]
+        if single:
+            return int(activity[0]), int(resource[0]), float(value[0])
+        return activity, resource, value
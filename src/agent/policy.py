@@ -104,6 +104,51 @@ class PPOPolicy(nn.Module):
 
         return log_prob, entropy, value
 
+    def act(self, state, activity_mask, resource_mask_callback, deterministic=False):
+        """
+        Fused inference pass: runs the backbone once and returns the sampled
+        (or greedy) activity and resource, their joint log prob and the value.
+
+        Batch-aware: `state` is (B, state_dim) and `activity_mask` is
+        (B, num_activities). The resource mask depends on the chosen activity,
+        so `resource_mask_callback` receives the (B,) tensor of chosen activity
+        indices and returns a (B, num_resources) mask.
+
+        Returns (activity, resource, log_prob, value, resource_mask).
+        """
+        features = self.backbone(state)
+
+        activity_logits = self.activity_head(features)
+        activity_logits = activity_logits.masked_fill(activity_mask == 0, -1e9)
+        activity_dist = Categorical(logits=activity_logits)
+        if deterministic:
+            activity = torch.argmax(activity_logits, dim=-1)
+        else:
+            activity = activity_dist.sample()
+
+        resource_mask = torch.as_tensor(
+            resource_mask_callback(activity), dtype=torch.float32, device=state.device
+        ).reshape(state.shape[0], -1)
+
+        act_emb = self.activity_embedding(activity)
+        res_input = torch.cat([features, act_emb], dim=-1)
+        resource_logits = self.resource_head(res_input)
+        resource_logits = resource_logits.masked_fill(resource_mask == 0, -1e9)
+        resource_dist = Categorical(logits=resource_logits)
+        if deterministic:
+            resource = torch.argmax(resource_logits, dim=-1)
+        else:
+            resource = resource_dist.sample()
+
+        log_prob = (
+            activity_dist.log_prob(activity)
+            + resource_dist.log_prob(resource)
+        )
+
+        value = self.value_head(features).squeeze(-1)
+
+        return activity, resource, log_prob, value, resource_mask
+
     def get_activity_logits(self, state):
         features = self.backbone(state)
         return self.activity_head(features)
@@ -0,0 +1,128 @@
+import copy
+import io
+import random
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.ao.quantization import quantize_dynamic
+
+from environment.simulator.core.engine import SimulatorEngine
+from environment.simulator.core.setup import SimulationSetup
+from environment.core.env import BusinessProcessEnvironment
+from .policy import PPOPolicy
+
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+class Bf16Policy(nn.Module):
+    """Runs a PPOPolicy under CPU bfloat16 autocast; outputs are returned in fp32."""
+
+    def __init__(self, policy: PPOPolicy):
+        super().__init__()
+        self.policy = policy
+
+    def act(self, state, activity_mask, resource_mask_callback, deterministic=False):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            activity, resource, log_prob, value, resource_mask = self.policy.act(
+                state, activity_mask, resource_mask_callback, deterministic
+            )
+        return activity, resource, log_prob.float(), value.float(), resource_mask
+
+    def forward(self, *args, **kwargs):
+        with torch.autocast("cpu", dtype=torch.bfloat16):
+            return self.policy(*args, **kwargs)
+
+
+def quantize_policy(policy: PPOPolicy, precision: str = "int8") -> nn.Module:
+    """
+    Inference-only copy of `policy` at the requested precision.
+
+    "int8" applies dynamic quantization to every nn.Linear (backbone and
+    heads): weights are stored as int8 and activations are quantized on the
+    fly, which suits the small batch-1 matmuls of a decision. "bf16" wraps the
+    policy in CPU bfloat16 autocast. "fp32" returns an unchanged copy. The
+    original policy is never modified, and the result keeps the `act` API.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}. Expected one of {PRECISIONS}.")
+    policy = copy.deepcopy(policy).cpu().eval()
+    if precision == "int8":
+        return quantize_dynamic(policy, {nn.Linear}, dtype=torch.qint8)
+    if precision == "bf16":
+        return Bf16Policy(policy).eval()
+    return policy
+
+
+def serialized_size(module: nn.Module) -> int:
+    """Size in bytes of the module's saved state_dict (what a checkpoint would hold)."""
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.getbuffer().nbytes
+
+
+def _run_episode(env: BusinessProcessEnvironment, simulator: SimulatorEngine, policy, candidate=None):
+    """Greedy episode driven by `policy`; counts decisions on which `candidate` agrees."""
+    obs, _ = env.reset()
+    agree = steps = 0
+    terminated = truncated = False
+    with torch.no_grad():
+        while not (terminated or truncated):
+            case = simulator.get_case_needing_decision()
+            if case is None:
+                break
+            state_t = torch.as_tensor(obs, dtype=torch.float32).unsqueeze(0)
+            mask_t = torch.as_tensor(env.get_activity_mask(case), dtype=torch.float32).unsqueeze(0)
+
+            def res_mask_cb(activity):
+                return env.get_resource_mask(simulator.all_activities[activity.item()], case)
+
+            activity, resource, _, _, _ = policy.act(state_t, mask_t, res_mask_cb, deterministic=True)
+            if candidate is not None:
+                c_activity, c_resource, _, _, _ = candidate.act(state_t, mask_t, res_mask_cb, deterministic=True)
+                agree += int(c_activity.item() == activity.item() and c_resource.item() == resource.item())
+            steps += 1
+            obs, _, terminated, truncated, _ = env.step(np.array([activity.item(), resource.item()]))
+
+    first_start, last_end = simulator.events.case_spans()
+    return (last_end - first_start), agree, steps
+
+
+def check_accuracy(reference: PPOPolicy, candidate: nn.Module, setup: SimulationSetup, sla_threshold: float,
+                   max_cases: int, episodes: int = 5, seed: int = 0, env_kwargs: dict = None) -> dict:
+    """
+    Measures the drift of a reduced-precision policy against the fp32 one.
+
+    Runs `episodes` greedy episodes with fixed seeds. Action agreement is
+    the share of decisions, along the reference policy's own trajectories, on
+    which the candidate picks the same (activity, resource). SLA compliance
+    is measured on separate episodes driven by each policy with the same seeds.
+    """
+    env_kwargs = env_kwargs or {}
+    reference = reference.eval()
+    agree = steps = 0
+    compliance = {"reference": [], "candidate": []}
+
+    for i in range(episodes):
+        for name, policy, compare in (("reference", reference, candidate), ("candidate", candidate, None)):
+            random.seed(seed + i)
+            np.random.seed(seed + i)
+            torch.manual_seed(seed + i)
+            simulator = SimulatorEngine(setup)
+            env = BusinessProcessEnvironment(simulator, sla_threshold, max_cases, **env_kwargs)
+            cycle_times, ep_agree, ep_steps = _run_episode(env, simulator, policy, compare)
+            compliance[name].append(float(np.mean(cycle_times < sla_threshold)) if len(cycle_times) else 0.0)
+            if compare is not None:
+                agree += ep_agree
+                steps += ep_steps
+
+    reference_cr = float(np.mean(compliance["reference"]))
+    candidate_cr = float(np.mean(compliance["candidate"]))
+    return {
+        "action_agreement": agree / steps if steps else 1.0,
+        "reference_cr": reference_cr,
+        "candidate_cr": candidate_cr,
+        "cr_delta": candidate_cr - reference_cr,
+        "decisions": steps,
+    }
@@ -0,0 +1,350 @@
+import multiprocessing as mp
+import queue
+import time
+import traceback
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import torch
+import torch.multiprocessing as torch_mp
+
+from environment.simulator.core.engine import SimulatorEngine
+from environment.simulator.core.setup import SimulationSetup
+from environment.simulator.core.replication import spawn_seeds, seed_global_rngs
+from environment.core.env import BusinessProcessEnvironment
+from .policy import PPOPolicy
+
+
+@dataclass
+class Trajectory:
+    """One episode collected by a rollout worker, as compact NumPy arrays."""
+    states: np.ndarray          # (T, state_dim) float32
+    activities: np.ndarray      # (T,) int64
+    resources: np.ndarray       # (T,) int64
+    logprobs: np.ndarray        # (T,) float32
+    state_values: np.ndarray    # (T,) float32
+    activity_masks: np.ndarray  # (T, num_activities) bool
+    resource_masks: np.ndarray  # (T, num_resources) bool
+    rewards: np.ndarray         # (T,) float32
+    dones: np.ndarray           # (T,) bool
+    total_reward: float
+    num_steps: int
+    cycle_times: list
+    duration_sec: float
+    policy_version: int = 0     # learner update count of the weights that acted
+
+
+def collect_episode(env: BusinessProcessEnvironment, simulator: SimulatorEngine,
+                    policy: PPOPolicy, deterministic: bool = False) -> Trajectory:
+    """Runs one episode with `policy` and records every decision."""
+    start = time.time()
+    states, activities, resources, logprobs, values = [], [], [], [], []
+    act_masks, res_masks, rewards, dones = [], [], [], []
+
+    obs, _ = env.reset()
+    terminated = truncated = False
+    policy.eval()
+    with torch.no_grad():
+        while not (terminated or truncated):
+            case = simulator.get_case_needing_decision()
+            if case is None:
+                break
+
+            activity_mask = env.get_activity_mask(case)
+
+            def res_mask_cb(activity):
+                return env.get_resource_mask(simulator.all_activities[activity.item()], case)
+
+            activity, resource, log_prob, value, res_mask = policy.act(
+                torch.as_tensor(obs, dtype=torch.float32).unsqueeze(0),
+                torch.as_tensor(activity_mask, dtype=torch.float32).unsqueeze(0),
+                res_mask_cb,
+                deterministic=deterministic,
+            )
+            act_idx, res_idx = activity.item(), resource.item()
+
+            next_obs, reward, terminated, truncated, _ = env.step(np.array([act_idx, res_idx]))
+
+            states.append(obs)
+            activities.append(act_idx)
+            resources.append(res_idx)
+            logprobs.append(log_prob.item())
+            values.append(value.item())
+            act_masks.append(activity_mask != 0)
+            res_masks.append(res_mask.numpy().reshape(-1) != 0)
+            rewards.append(reward)
+            dones.append(terminated or truncated)
+            obs = next_obs
+
+    # An episode cut short (no pending decision) still closes its last transition
+    if dones:
+        dones[-1] = True
+
+    num_act, num_res = simulator.num_activities, simulator.num_resources
+    first_start, last_end = simulator.events.case_spans()
+    return Trajectory(
+        states=np.asarray(states, dtype=np.float32).reshape(-1, env.state_dim),
+        activities=np.asarray(activities, dtype=np.int64),
+        resources=np.asarray(resources, dtype=np.int64),
+        logprobs=np.asarray(logprobs, dtype=np.float32),
+        state_values=np.asarray(values, dtype=np.float32),
+        activity_masks=np.asarray(act_masks, dtype=bool).reshape(-1, num_act),
+        resource_masks=np.asarray(res_masks, dtype=bool).reshape(-1, num_res),
+        rewards=np.asarray(rewards, dtype=np.float32),
+        dones=np.asarray(dones, dtype=bool),
+        total_reward=float(np.sum(rewards)),
+        num_steps=len(rewards),
+        cycle_times=(last_end - first_start).tolist(),
+        duration_sec=time.time() - start,
+    )
+
+
+def _rollout_worker(pipe, parent_pipe, setup: SimulationSetup, seed: int, sla_threshold: float,
+                    max_cases: int, env_kwargs: dict, policy_kwargs: dict):
+    # Replies are (True, result), or (False, formatted traceback) after which the worker exits
+    parent_pipe.close()
+    # One core per worker; the pool itself provides the parallelism
+    torch.set_num_threads(1)
+    seed_global_rngs(seed)
+    torch.manual_seed(seed)
+
+    try:
+        simulator = SimulatorEngine(setup)
+        env = BusinessProcessEnvironment(simulator, sla_threshold, max_cases, **env_kwargs)
+        policy = PPOPolicy(**policy_kwargs)
+        while True:
+            cmd, data = pipe.recv()
+            if cmd == "set_weights":
+                policy.load_state_dict(data)
+                pipe.send((True, None))
+            elif cmd == "collect":
+                pipe.send((True, [collect_episode(env, simulator, policy) for _ in range(data)]))
+            elif cmd == "close":
+                pipe.send((True, None))
+                break
+            else:
+                raise ValueError(f"Unknown command: {cmd}")
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        try:
+            pipe.send((False, traceback.format_exc()))
+        except (OSError, EOFError):
+            pass
+    finally:
+        pipe.close()
+
+
+class RolloutWorkerPool:
+    """
+    Pool of actor processes collecting episodes for the learner.
+
+    Each worker receives the fitted SimulationSetup once at start-up and owns
+    its own SimulatorEngine, BusinessProcessEnvironment and PPOPolicy copy.
+    The learner broadcasts policy weights after every update (`broadcast`);
+    `collect(n)` spreads n episodes over the workers and returns the compact
+    NumPy trajectories in worker order.
+
+    Worker i seeds the global RNGs (random, numpy, torch) from an independent
+    stream derived from `base_seed`.
+    """
+
+    def __init__(self, setup: SimulationSetup, num_workers: int, sla_threshold: float, max_cases: int,
+                 policy_kwargs: dict, env_kwargs: dict = None, base_seed: int = 42, context: str = None):
+        ctx = mp.get_context(context)
+        self.num_workers = num_workers
+        self._pipes, self._processes = [], []
+        for seed in spawn_seeds(base_seed, num_workers):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_rollout_worker,
+                args=(child, parent, setup, seed, sla_threshold, max_cases, env_kwargs or {}, policy_kwargs),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(proc)
+
+    def broadcast(self, state_dict: dict):
+        """Sends the current policy weights to every worker."""
+        state_dict = {k: v.detach().cpu() for k, v in state_dict.items()}
+        for pipe in self._pipes:
+            pipe.send(("set_weights", state_dict))
+        self._receive(self._pipes)
+
+    def collect(self, num_episodes: int) -> List[Trajectory]:
+        """Collects `num_episodes` episodes, spread as evenly as possible over the workers."""
+        share, extra = divmod(num_episodes, self.num_workers)
+        counts = [share + (i < extra) for i in range(self.num_workers)]
+        busy = []
+        for pipe, count in zip(self._pipes, counts):
+            if count > 0:
+                pipe.send(("collect", count))
+                busy.append(pipe)
+        return [trajectory for batch in self._receive(busy) for trajectory in batch]
+
+    def _receive(self, pipes) -> list:
+        """One reply per pipe; re-raises worker exceptions with their tracebacks."""
+        results, errors = [], []
+        for pipe in pipes:
+            try:
+                ok, result = pipe.recv()
+            except EOFError:
+                ok, result = False, "Worker process exited without replying.\n"
+            if ok:
+                results.append(result)
+            else:
+                errors.append(f"Worker {self._pipes.index(pipe)}:\n{result}")
+        if errors:
+            raise RuntimeError("Error in rollout worker:\n" + "\n".join(errors))
+        return results
+
+    def close(self):
+        for pipe in self._pipes:
+            try:
+                pipe.send(("close", None))
+                pipe.recv()
+            except (OSError, EOFError):
+                pass
+            pipe.close()
+        for proc in self._processes:
+            proc.join(timeout=5)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+@dataclass
+class _WorkerError:
+    """Queued by an async worker in place of a trajectory when it fails."""
+    traceback: str
+
+
+def _async_rollout_worker(trajectories, stop, shared_weights: dict, version, lock, setup: SimulationSetup,
+                          seed: int, sla_threshold: float, max_cases: int, env_kwargs: dict, policy_kwargs: dict):
+    torch.set_num_threads(1)
+    seed_global_rngs(seed)
+    torch.manual_seed(seed)
+
+    local_version = -1
+    try:
+        simulator = SimulatorEngine(setup)
+        env = BusinessProcessEnvironment(simulator, sla_threshold, max_cases, **env_kwargs)
+        policy = PPOPolicy(**policy_kwargs)
+        while not stop.is_set():
+            # Pick up the newest weights between episodes, never mid-episode
+            if version.value != local_version:
+                with lock:
+                    policy.load_state_dict(shared_weights)
+                    local_version = version.value
+
+            trajectory = collect_episode(env, simulator, policy)
+            trajectory.policy_version = local_version
+            while not stop.is_set():
+                try:
+                    trajectories.put(trajectory, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        error = _WorkerError(traceback.format_exc())
+        while not stop.is_set():
+            try:
+                trajectories.put(error, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+
+class AsyncRolloutWorkerPool:
+    """
+    Rollout workers that never wait for the learner.
+
+    Workers simulate continuously and push finished trajectories into a
+    bounded queue (`queue_size`); when it is full they block, which bounds
+    how stale the queued data can get. Weights live in shared-memory tensors:
+    `broadcast` copies the learner's weights in and bumps a version counter,
+    and each worker reloads them before its next episode. Every trajectory
+    carries the version that produced it, so the learner can measure policy
+    lag and correct for it (see PPOAgent.update(off_policy=True)).
+    """
+
+    def __init__(self, setup: SimulationSetup, num_workers: int, sla_threshold: float, max_cases: int,
+                 policy_kwargs: dict, initial_state_dict: dict, env_kwargs: dict = None,
+                 base_seed: int = 42, queue_size: int = None, context: str = None):
+        ctx = torch_mp.get_context(context)
+        self.num_workers = num_workers
+        self.policy_version = 0
+        self._trajectories = ctx.Queue(maxsize=queue_size or 2 * num_workers)
+        self._stop = ctx.Event()
+        self._lock = ctx.Lock()
+        self._version = ctx.Value("i", 0)
+        self._shared_weights = {
+            k: v.detach().cpu().clone().share_memory_() for k, v in initial_state_dict.items()
+        }
+        self._lags = []
+
+        self._processes = []
+        for seed in spawn_seeds(base_seed, num_workers):
+            proc = ctx.Process(
+                target=_async_rollout_worker,
+                args=(self._trajectories, self._stop, self._shared_weights, self._version, self._lock,
+                      setup, seed, sla_threshold, max_cases, env_kwargs or {}, policy_kwargs),
+                daemon=True,
+            )
+            proc.start()
+            self._processes.append(proc)
+
+    def broadcast(self, state_dict: dict):
+        """Publishes new weights; workers switch to them at their next episode."""
+        with self._lock:
+            for k, v in state_dict.items():
+                self._shared_weights[k].copy_(v.detach().cpu())
+            self.policy_version += 1
+            self._version.value = self.policy_version
+
+    def get(self, timeout: float = None) -> Trajectory:
+        """Next finished trajectory (blocks until one is available); re-raises worker exceptions."""
+        trajectory = self._trajectories.get(timeout=timeout)
+        if isinstance(trajectory, _WorkerError):
+            raise RuntimeError(f"Error in async rollout worker:\n{trajectory.traceback}")
+        self._lags.append(self.policy_version - trajectory.policy_version)
+        return trajectory
+
+    def queue_depth(self):
+        """Trajectories waiting in the queue, or None where the platform cannot tell."""
+        try:
+            return self._trajectories.qsize()
+        except NotImplementedError:
+            return None
+
+    def consume_policy_lag(self):
+        """Mean policy lag of the trajectories taken since the last call (None if none)."""
+        lags, self._lags = self._lags, []
+        return float(np.mean(lags)) if lags else None
+
+    def close(self):
+        self._stop.set()
+        # Drain so no worker stays blocked on a full queue
+        try:
+            while True:
+                self._trajectories.get_nowait()
+        except (queue.Empty, OSError):
+            pass
+        for proc in self._processes:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
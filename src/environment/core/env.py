@@ -42,6 +42,9 @@ class BusinessProcessEnvironment(gym.Env):
             shape=(self.state_dim,),
             dtype=np.float32
         )
+
+        # Preallocated observation buffer; vectorize_state writes into it in place
+        self._obs = np.zeros(self.state_dim, dtype=np.float32)
  
     def reset(self, seed=None, options=None):
         super().reset(seed=seed)
@@ -68,7 +71,7 @@ class BusinessProcessEnvironment(gym.Env):
 
         state, completed = self._advance_to_next_decision()
 
-        now = self.simulator.state()["internal_time"]
+        now = self.simulator.env.now
         completed_ids = {id(c) for c in completed}
 
         reward = 0.0
@@ -137,79 +140,52 @@ class BusinessProcessEnvironment(gym.Env):
           · hour_of_day  : (now % 86400) / 86400
           · day_of_week  : ((now // 86400) % 7) / 6
         """
-        sim_state = self.simulator.state()
-        now = sim_state["internal_time"]
-        num_act = self.simulator.num_activities
+        sim = self.simulator
+        now = sim.env.now
+        num_act = sim.num_activities
+        num_res = sim.num_resources
+        obs = self._obs
 
         # ── Block A: Global Process Snapshot ────────────────────────────────────
-        res_features = []
-        for res in self.simulator.all_resources:
-            occ = sim_state["resource_occupancy"].get(
-                res.id, {"in_use": 0, "capacity": 1, "waiting": 0}
-            )
-            capacity = max(occ["capacity"], 1)
-
-            utilization = occ["in_use"] / capacity
-
-            current_act = sim_state["resource_current_activity"].get(res.id)
-            if current_act is not None and current_act in self.simulator.all_activities:
-                assignment_enc = self.simulator.all_activities.index(current_act) / num_act
-            else:
-                assignment_enc = 0.0
-
-            queue_pressure = min(occ["waiting"] / 10.0, 1.0)
-
-            res_features.extend([utilization, assignment_enc, queue_pressure])
+        # Maintained incrementally by the engine; this is a few array copies.
+        # Values above 1 are clamped by the final clip.
+        res_block = obs[:3 * num_res].reshape(num_res, 3)
+        np.divide(sim.resource_in_use, sim.resource_capacity, out=res_block[:, 0])
+        res_block[:, 1] = sim.resource_activity_enc
+        np.divide(sim.resource_waiting, 10.0, out=res_block[:, 2])
 
         # Per-activity: cases in waiting_requests (resource-queue) for each activity
-        act_pending = {}
-        for _, (_, act) in self.simulator.waiting_requests.items():
-            act_pending[act] = act_pending.get(act, 0) + 1
-
-        act_features = [
-            min(act_pending.get(act, 0) / 10.0, 1.0)
-            for act in self.simulator.all_activities
-        ]
+        act_block = obs[3 * num_res:3 * num_res + num_act]
+        np.divide(sim.activity_pending, 10.0, out=act_block)
 
         # ── Block B: Case-Specific Features ─────────────────────────────────────
-        case = self.simulator.get_case_needing_decision()
+        case = sim.get_case_needing_decision()
+        case_block = obs[3 * num_res + num_act:3 * num_res + 2 * num_act + 3]
 
         if case is None:
             # Simulation ended or between decisions — safe zero vector
-            case_features = [0.0] * (num_act + 3)
+            case_block[:] = 0.0
         else:
             history = case.activity_history
             current_activity = history[-1] if history else None
 
             # Last activity encoded as (idx+1)/num_act so that 0 unambiguously means "new case"
-            if history and current_activity in self.simulator.all_activities:
-                last_act_enc = (self.simulator.all_activities.index(current_activity) + 1) / num_act
-            else:
-                last_act_enc = 0.0
+            last_idx = sim.activity_index.get(current_activity) if history else None
+            last_act_enc = (last_idx + 1) / num_act if last_idx is not None else 0.0
 
             trace_length_norm = min(len(history) / 20.0, 1.0)
             sla_urgency = min((now - case.start_time) / max(self.sla_threshold, 1.0), 1.0)
 
-            # Branching probabilities for current routing position
-            probs_dict = self.simulator.setup.routing_policy.get_activity_probabilities(case)
-
-            branching_probs = [
-                float(probs_dict.get(act, 0.0))
-                for act in self.simulator.all_activities
-            ]
-
-            case_features = branching_probs + [last_act_enc, trace_length_norm, sla_urgency]
+            # Branching probabilities for current routing position (dense, engine order)
+            case_block[:num_act] = sim.setup.routing_policy.get_activity_probability_vector(case)
+            case_block[num_act:] = (last_act_enc, trace_length_norm, sla_urgency)
 
         # ── Block C: Temporal Features ───────────────────────────────────────────
-        time_features = [
-            (now % 86400) / 86400.0,           # hour_of_day
-            ((now // 86400) % 7) / 6.0,        # day_of_week
-        ]
-
-        return np.clip(
-            np.array(res_features + act_features + case_features + time_features, dtype=np.float32),
-            0.0, 1.0,
-        )
+        obs[-2] = (now % 86400) / 86400.0          # hour_of_day
+        obs[-1] = ((now // 86400) % 7) / 6.0       # day_of_week
+
+        np.clip(obs, 0.0, 1.0, out=obs)
+        return obs.copy()
 
     @property
     def state_dim(self):
@@ -223,17 +199,26 @@ class BusinessProcessEnvironment(gym.Env):
 
     def get_activity_mask(self, case):
         """Returns a binary mask for feasible next activities."""
-        probs_dict = self.simulator.setup.routing_policy.get_activity_probabilities(case)
+        routing_policy = self.simulator.setup.routing_policy
         ctx = ActivityMaskContext(
-            probabilities=probs_dict,
+            probabilities=routing_policy.get_activity_probabilities(case),
             all_activities=self.simulator.all_activities,
+            activity_index=self.simulator.activity_index,
+            probability_vector=routing_policy.get_activity_probability_vector(case),
+            routing_state=routing_policy.routing_state(case),
         )
         return self.activity_mask_function.compute(ctx)
 
+    def invalidate_activity_masks(self):
+        """Call after replacing or refitting the routing policy of the simulator's setup."""
+        self.activity_mask_function.invalidate_cache()
+
     def get_resource_mask(self, activity_name, case=None):
         """Returns a binary mask of feasible resources for a given activity."""
         ctx = ResourceMaskContext(
             activity_name=activity_name,
             all_resources=self.simulator.all_resources,
+            activity_index=self.simulator.activity_index,
+            skill_matrix=self.simulator.skill_matrix,
         )
         return self.resource_mask_function.compute(ctx)
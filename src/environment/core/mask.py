@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, Callable, Optional
+from typing import TYPE_CHECKING, Callable, Hashable, Mapping, Optional
 
 import numpy as np
 
@@ -20,6 +20,9 @@ class ActivityMaskContext:
     """
     probabilities: dict[str, float]   # {activity_name: branching_probability}
     all_activities: list[str]         # ordered activity list (index ↔ position)
+    activity_index: Optional[Mapping] = None  # {activity_name: position}; avoids list scans
+    probability_vector: Optional[np.ndarray] = None  # `probabilities` as a dense vector in all_activities order
+    routing_state: Optional[Hashable] = None  # RoutingPolicy.routing_state(case); None disables caching
 
 
 @dataclass
@@ -30,6 +33,17 @@ class ResourceMaskContext:
     """
     activity_name: Optional[str]      # None means END
     all_resources: list["Resource"]   # ordered resource list (index ↔ position)
+    activity_index: Optional[Mapping] = None      # {activity_name: row in skill_matrix}
+    skill_matrix: Optional[np.ndarray] = None     # (num_activities, num_resources) 0/1
+
+
+def _activity_position(ctx: ActivityMaskContext, act_name) -> Optional[int]:
+    if ctx.activity_index is not None:
+        return ctx.activity_index.get(act_name)
+    try:
+        return ctx.all_activities.index(act_name)
+    except ValueError:
+        return None
 
 
 # ── Abstract base classes ────────────────────────────────────────────────────
@@ -39,6 +53,10 @@ class ActivityMaskFunction(ABC):
     def compute(self, ctx: ActivityMaskContext) -> np.ndarray:
         pass
 
+    def invalidate_cache(self):
+        """Drops memoized masks, e.g. after the routing policy changed. No-op by default."""
+        pass
+
 
 class ResourceMaskFunction(ABC):
     @abstractmethod
@@ -71,6 +89,12 @@ class NucleusMaskFunction(ActivityMaskFunction):
         exploiting low-probability early terminations.
         Default is 0.5 (END must be the majority transition to be allowed).
         Set to 0.0 to disable this filter (allow END whenever it has any probability).
+
+    Masks only depend on the branching probabilities, which in turn only
+    depend on the routing state of the case (current activity for first-order
+    routing, (previous, current) for second-order). When the context carries
+    a ``routing_state`` the mask is memoized under (state, k, p, p_min_end);
+    call ``invalidate_cache()`` if the routing policy is replaced or refitted.
     """
 
     def __init__(
@@ -82,9 +106,24 @@ class NucleusMaskFunction(ActivityMaskFunction):
         self.k = k
         self.p = p
         self.p_min_end = p_min_end
+        self._cache = {}
 
+    def invalidate_cache(self):
+        self._cache.clear()
 
     def compute(self, ctx: ActivityMaskContext) -> np.ndarray:
+        if ctx.routing_state is None:
+            return self._compute(ctx)
+
+        key = (ctx.routing_state, self.k, self.p, self.p_min_end)
+        mask = self._cache.get(key)
+        if mask is None:
+            mask = self._compute(ctx)
+            self._cache[key] = mask
+        # Callers own the returned array; the cached one is never handed out
+        return mask.copy()
+
+    def _compute(self, ctx: ActivityMaskContext) -> np.ndarray:
         num_activities = len(ctx.all_activities)
         mask = np.zeros(num_activities, dtype=np.float32)
 
@@ -120,12 +159,16 @@ class NucleusMaskFunction(ActivityMaskFunction):
             return mask
 
         # ── Step 1: Build probability mask ──────────────────────────
-        for act_name, prob in filtered_probs.items():
-            try:
-                idx = ctx.all_activities.index(act_name)
-                mask[idx] = prob
-            except ValueError:
-                continue
+        if ctx.probability_vector is not None and ctx.activity_index is not None:
+            mask[:] = ctx.probability_vector
+            end_idx = ctx.activity_index.get(None)
+            if not allow_end and end_idx is not None:
+                mask[end_idx] = 0.0
+        else:
+            for act_name, prob in filtered_probs.items():
+                idx = _activity_position(ctx, act_name)
+                if idx is not None:
+                    mask[idx] = prob
 
         # ── Step 2: Top-K filtering ─────────────────────────────────
         if self.k is not None and 0 < self.k < num_activities:
@@ -156,12 +199,10 @@ class NucleusMaskFunction(ActivityMaskFunction):
             # Fallback: allow the highest-probability non-END activity
             for act_name, prob in sorted(filtered_probs.items(), key=lambda x: -x[1]):
                 if act_name is not None:
-                    try:
-                        idx = ctx.all_activities.index(act_name)
+                    idx = _activity_position(ctx, act_name)
+                    if idx is not None:
                         binary_mask[idx] = 1.0
                         break
-                    except ValueError:
-                        continue
             # If still nothing (no non-END activities), allow END
             if binary_mask.sum() == 0:
                 binary_mask[-1] = 1.0
@@ -181,13 +222,20 @@ class SkillBasedMaskFunction(ResourceMaskFunction):
         if ctx.activity_name is None:
             return np.ones(num_resources, dtype=np.float32)
 
-        mask = np.zeros(num_resources, dtype=np.float32)
-        for i, res in enumerate(ctx.all_resources):
-            if ctx.activity_name in res.skills:
-                mask[i] = 1.0
+        if ctx.skill_matrix is not None and ctx.activity_index is not None:
+            row = ctx.activity_index.get(ctx.activity_name)
+            mask = (
+                ctx.skill_matrix[row].copy() if row is not None
+                else np.zeros(num_resources, dtype=np.float32)
+            )
+        else:
+            mask = np.zeros(num_resources, dtype=np.float32)
+            for i, res in enumerate(ctx.all_resources):
+                if ctx.activity_name in res.skills:
+                    mask[i] = 1.0
 
         # Fallback: allow all if no resource has the skill
-        if mask.sum() == 0:
+        if not mask.any():
             return np.ones(num_resources, dtype=np.float32)
 
         return mask
\ No newline at end of file
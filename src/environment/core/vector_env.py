@@ -0,0 +1,302 @@
+import copy
+import multiprocessing as mp
+import traceback
+from functools import partial
+from typing import Callable, Optional, Sequence
+
+import gymnasium as gym
+import numpy as np
+from gymnasium.vector.utils import batch_space
+
+from environment.simulator.core.engine import SimulatorEngine
+from environment.simulator.core.setup import SimulationSetup
+from environment.simulator.core.replication import spawn_seeds, seed_global_rngs
+from environment.core.env import BusinessProcessEnvironment
+
+
+def _build_env(setup: SimulationSetup, sla_threshold: float, max_cases: int, env_kwargs: dict):
+    # Own copy of the setup, so policy state such as pre-sampled buffers is not
+    # shared (and reset) across environments in sync mode; workers get one by pickling
+    return BusinessProcessEnvironment(SimulatorEngine(copy.deepcopy(setup)), sla_threshold, max_cases, **env_kwargs)
+
+
+def make_env_fn(setup: SimulationSetup, sla_threshold: float, max_cases: int, **env_kwargs) -> Callable:
+    """
+    Picklable factory for one BusinessProcessEnvironment (own SimulatorEngine
+    and own copy of the setup).
+    Extra keyword arguments (reward/mask functions) are passed to the env.
+    """
+    return partial(_build_env, setup, sla_threshold, max_cases, env_kwargs)
+
+
+def _merge_info(infos: dict, info: dict, i: int, num_envs: int) -> dict:
+    """Gymnasium vector info convention: infos[key][i] = value, infos['_key'][i] = True."""
+    for key, value in info.items():
+        if key not in infos:
+            infos[key] = np.empty(num_envs, dtype=object)
+            infos[f"_{key}"] = np.zeros(num_envs, dtype=bool)
+        infos[key][i] = value
+        infos[f"_{key}"][i] = True
+    return infos
+
+
+class _EnvRunner:
+    """
+    Drives one BusinessProcessEnvironment for the vector env: same-step
+    autoreset, episode accounting and mask queries. Used in-process and
+    inside subprocess workers alike.
+    """
+
+    def __init__(self, env: BusinessProcessEnvironment):
+        self.env = env
+        self.simulator = env.simulator
+        self._episode_reward = 0.0
+        self._episode_steps = 0
+
+    def reset(self, seed: Optional[int] = None):
+        if seed is not None:
+            seed_global_rngs(seed)
+        self._episode_reward = 0.0
+        self._episode_steps = 0
+        obs, info = self.env.reset()
+        return obs, info
+
+    def step(self, action):
+        obs, reward, terminated, truncated, info = self.env.step(action)
+        self._episode_reward += reward
+        self._episode_steps += 1
+
+        # The simulation can run dry (no pending decision) before max_cases complete
+        if not terminated and self.simulator.get_case_needing_decision() is None:
+            truncated = True
+
+        if terminated or truncated:
+            first_start, last_end = self.simulator.events.case_spans()
+            final_info = dict(info)
+            final_info.update({
+                "episode_reward": self._episode_reward,
+                "episode_steps": self._episode_steps,
+                "cycle_times": (last_end - first_start).tolist(),
+            })
+            info = {"final_obs": obs, "final_info": final_info}
+            obs, _ = self.reset()
+        return obs, reward, terminated, truncated, info
+
+    def activity_mask(self) -> np.ndarray:
+        case = self.simulator.get_case_needing_decision()
+        if case is None:
+            mask = np.zeros(self.simulator.num_activities, dtype=np.float32)
+            mask[-1] = 1.0  # only END
+            return mask
+        return self.env.get_activity_mask(case)
+
+    def resource_mask(self, activity_idx: int) -> np.ndarray:
+        activity = self.simulator.all_activities[activity_idx]
+        return self.env.get_resource_mask(activity, self.simulator.get_case_needing_decision())
+
+
+def _worker(index: int, env_fn: Callable, pipe, parent_pipe, obs_buf, act_mask_buf, res_mask_buf,
+            shapes: tuple):
+    # Replies are (True, result), or (False, formatted traceback) after which the worker exits
+    parent_pipe.close()
+    num_envs, obs_dim, num_act, num_res = shapes
+    obs = np.frombuffer(obs_buf, dtype=np.float32).reshape(num_envs, obs_dim)
+    act_masks = np.frombuffer(act_mask_buf, dtype=np.float32).reshape(num_envs, num_act)
+    res_masks = np.frombuffer(res_mask_buf, dtype=np.float32).reshape(num_envs, num_res)
+
+    try:
+        runner = _EnvRunner(env_fn())
+        while True:
+            cmd, data = pipe.recv()
+            if cmd == "reset":
+                obs[index], info = runner.reset(seed=data)
+                pipe.send((True, info))
+            elif cmd == "step":
+                obs[index], reward, terminated, truncated, info = runner.step(data)
+                pipe.send((True, (reward, terminated, truncated, info)))
+            elif cmd == "activity_mask":
+                act_masks[index] = runner.activity_mask()
+                pipe.send((True, None))
+            elif cmd == "resource_mask":
+                res_masks[index] = runner.resource_mask(data)
+                pipe.send((True, None))
+            elif cmd == "close":
+                pipe.send((True, None))
+                break
+            else:
+                raise ValueError(f"Unknown command: {cmd}")
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        try:
+            pipe.send((False, traceback.format_exc()))
+        except (OSError, EOFError):
+            pass
+    finally:
+        pipe.close()
+
+
+class BusinessProcessVectorEnv(gym.vector.VectorEnv):
+    """
+    Runs N BusinessProcessEnvironment copies (each with its own SimulatorEngine)
+    behind Gymnasium's vector API, so one batched policy forward pass can
+    serve every environment.
+
+    Modes
+    -----
+    "sync"       : all environments step in this process, one after another.
+    "subprocess" : one worker process per environment. Observations and masks
+                   are written by the workers into shared-memory buffers, so
+                   only actions, rewards and flags travel through the pipes.
+
+    Episodes auto-reset in the same step they end (AutoresetMode.SAME_STEP):
+    the returned observation is the first one of the new episode, and
+    ``infos["final_obs"]`` / ``infos["final_info"]`` hold the last observation
+    and the episode summary (reward, steps, cycle times).
+
+    Actions have shape (N, 2) = (activity index, resource index). Because the
+    resource mask depends on the chosen activity, masks are queried through
+    `get_activity_masks()` and `get_resource_masks(activity_indices)`, both
+    returning stacked (N, ·) arrays.
+
+    Seeding: `reset(seed=s)` derives one independent seed per environment
+    (see `spawn_seeds`). The simulation policies draw from the process-global
+    RNGs, so per-environment streams are only isolated in subprocess mode; in
+    sync mode the environments share one stream and a run is reproducible as
+    a whole.
+    """
+
+    metadata = {"autoreset_mode": gym.vector.AutoresetMode.SAME_STEP}
+
+    def __init__(self, env_fns: Sequence[Callable[[], BusinessProcessEnvironment]],
+                 mode: str = "sync", context: Optional[str] = None):
+        if mode not in ("sync", "subprocess"):
+            raise ValueError(f"Unknown vector env mode: {mode}")
+        self.mode = mode
+        self.num_envs = len(env_fns)
+
+        # One local copy is always built to read the spaces and dimensions
+        probe = env_fns[0]()
+        self.single_observation_space = probe.observation_space
+        self.single_action_space = probe.action_space
+        self.observation_space = batch_space(self.single_observation_space, self.num_envs)
+        self.action_space = batch_space(self.single_action_space, self.num_envs)
+        self.num_activities = probe.simulator.num_activities
+        self.num_resources = probe.simulator.num_resources
+        obs_dim = self.single_observation_space.shape[0]
+
+        if mode == "sync":
+            self._runners = [_EnvRunner(probe)] + [_EnvRunner(fn()) for fn in env_fns[1:]]
+            self._obs = np.zeros((self.num_envs, obs_dim), dtype=np.float32)
+            self._act_masks = np.zeros((self.num_envs, self.num_activities), dtype=np.float32)
+            self._res_masks = np.zeros((self.num_envs, self.num_resources), dtype=np.float32)
+            return
+
+        ctx = mp.get_context(context)
+        shapes = (self.num_envs, obs_dim, self.num_activities, self.num_resources)
+        obs_buf = ctx.RawArray("f", self.num_envs * obs_dim)
+        act_mask_buf = ctx.RawArray("f", self.num_envs * self.num_activities)
+        res_mask_buf = ctx.RawArray("f", self.num_envs * self.num_resources)
+        self._obs = np.frombuffer(obs_buf, dtype=np.float32).reshape(self.num_envs, obs_dim)
+        self._act_masks = np.frombuffer(act_mask_buf, dtype=np.float32).reshape(self.num_envs, self.num_activities)
+        self._res_masks = np.frombuffer(res_mask_buf, dtype=np.float32).reshape(self.num_envs, self.num_resources)
+
+        self._pipes, self._processes = [], []
+        for i, env_fn in enumerate(env_fns):
+            parent, child = ctx.Pipe()
+            proc = ctx.Process(
+                target=_worker,
+                args=(i, env_fn, child, parent, obs_buf, act_mask_buf, res_mask_buf, shapes),
+                daemon=True,
+            )
+            proc.start()
+            child.close()
+            self._pipes.append(parent)
+            self._processes.append(proc)
+
+    # ── Dispatch helpers ──────────────────────────────────────────────────
+
+    def _broadcast(self, cmd: str, data: Optional[Sequence] = None) -> list:
+        """Runs `cmd` on every environment (in parallel in subprocess mode)."""
+        data = data if data is not None else [None] * self.num_envs
+        if self.mode == "sync":
+            results = []
+            for i, runner in enumerate(self._runners):
+                if cmd == "reset":
+                    self._obs[i], info = runner.reset(seed=data[i])
+                    results.append(info)
+                elif cmd == "step":
+                    self._obs[i], reward, terminated, truncated, info = runner.step(data[i])
+                    results.append((reward, terminated, truncated, info))
+                elif cmd == "activity_mask":
+                    self._act_masks[i] = runner.activity_mask()
+                    results.append(None)
+                elif cmd == "resource_mask":
+                    self._res_masks[i] = runner.resource_mask(data[i])
+                    results.append(None)
+            return results
+
+        for pipe, item in zip(self._pipes, data):
+            pipe.send((cmd, item))
+        return self._receive()
+
+    def _receive(self) -> list:
+        """One reply per worker; re-raises worker exceptions with their tracebacks."""
+        results, errors = [], []
+        for i, pipe in enumerate(self._pipes):
+            try:
+                ok, result = pipe.recv()
+            except EOFError:
+                ok, result = False, "Worker process exited without replying.\n"
+            if ok:
+                results.append(result)
+            else:
+                errors.append(f"Environment {i}:\n{result}")
+        if errors:
+            raise RuntimeError("Error in vector env worker:\n" + "\n".join(errors))
+        return results
+
+    # ── Gymnasium vector API ──────────────────────────────────────────────
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None):
+        seeds = spawn_seeds(seed, self.num_envs) if seed is not None else None
+        results = self._broadcast("reset", seeds)
+        infos = {}
+        for i, info in enumerate(results):
+            infos = _merge_info(infos, info, i, self.num_envs)
+        return self._obs.copy(), infos
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs, 2)
+        results = self._broadcast("step", list(actions))
+
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+        terminations = np.zeros(self.num_envs, dtype=bool)
+        truncations = np.zeros(self.num_envs, dtype=bool)
+        infos = {}
+        for i, (reward, terminated, truncated, info) in enumerate(results):
+            rewards[i], terminations[i], truncations[i] = reward, terminated, truncated
+            infos = _merge_info(infos, info, i, self.num_envs)
+        return self._obs.copy(), rewards, terminations, truncations, infos
+
+    def get_activity_masks(self) -> np.ndarray:
+        """(N, num_activities) masks for the cases currently awaiting a decision."""
+        self._broadcast("activity_mask")
+        return self._act_masks.copy()
+
+    def get_resource_masks(self, activity_indices) -> np.ndarray:
+        """(N, num_resources) masks given one chosen activity index per environment."""
+        self._broadcast("resource_mask", [int(a) for a in np.asarray(activity_indices).reshape(-1)])
+        return self._res_masks.copy()
+
+    def close_extras(self, **kwargs):
+        if self.mode == "subprocess":
+            for pipe in self._pipes:
+                try:
+                    pipe.send(("close", None))
+                    pipe.recv()
+                except (OSError, EOFError):
+                    pass
+                pipe.close()
+            for proc in self._processes:
+                proc.join(timeout=5)
@@ -1,11 +1,31 @@
 from pathlib import Path
+import numpy as np
 import pandas as pd
 
+
+def _format_timestamps(df: pd.DataFrame) -> pd.DataFrame:
+    """Formats datetime columns as 'YYYY-mm-dd HH:MM:SS.fff' in one vectorised pass per column."""
+    for col in df.columns:
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        values = df[col]
+        if getattr(values.dt, "tz", None) is not None:
+            values = values.dt.tz_localize(None)  # keep wall-clock time, as strftime did
+        text = np.datetime_as_string(values.to_numpy().astype("datetime64[ms]"), unit="ms")
+        df[col] = np.char.replace(text, "T", " ")
+    return df
+
+
 def export_event_log_to_csv(event_log, path: str):
     path_obj = Path(path)
 
     # Create directory if it doesn't exist
     path_obj.parent.mkdir(parents=True, exist_ok=True)
 
-    df = pd.DataFrame(event_log)
+    # Columnar stores/views convert directly; plain lists of dicts still work
+    if hasattr(event_log, "to_dataframe"):
+        df = event_log.to_dataframe()
+    else:
+        df = pd.DataFrame(event_log)
+    df = _format_timestamps(df)
     df.to_csv(path_obj, index=False)
\ No newline at end of file
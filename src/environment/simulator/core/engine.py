@@ -1,6 +1,9 @@
 import simpy
+import numpy as np
 import pandas as pd
+from types import MappingProxyType
 from environment.simulator.core.setup import SimulationSetup
+from environment.simulator.core.event_store import EventStore
 from environment.entities.Case import Case
 import json as js
 
@@ -19,11 +22,25 @@ class SimulatorEngine:
 
         # for i, r in enumerate(self._resources):
         #     print(f"Resource index {i}: {r.name}")
+
+        # Immutable lookups shared with env, masks and policies (no list scans)
+        self._activity_index = MappingProxyType({a: i for i, a in enumerate(self._activities)})
+        self._resource_index = MappingProxyType({r.id: i for i, r in enumerate(self._resources)})
+        self._skill_matrix = self._build_skill_matrix()
+        self.setup.routing_policy.bind_activities(self._activities)
+        self.resource_capacity = np.array(
+            [max(r.capacity, 1) for r in self._resources], dtype=np.float32
+        )
         self.reset()
 
     def reset(self, max_cases=None):
+        if self.setup.processing_time_policy is not None:
+            self.setup.processing_time_policy.reset()
+        if self.setup.waiting_time_policy is not None:
+            self.setup.waiting_time_policy.reset()
         self.env = simpy.Environment()
-        self.event_log = []
+        self.events = EventStore()
+        self.event_log = self.events.view()  # list-of-dicts compatible view
         self.active_cases = 0
         self.no_more_arrivals = False
         self.current_activities = {}
@@ -32,6 +49,14 @@ class SimulatorEngine:
         self.completed_cases = []
         self.pending_decisions = []
 
+        # Observation counters, updated on request / grant / release so the
+        # RL state never has to rescan resources or waiting requests.
+        num_res, num_act = len(self._resources), len(self._activities)
+        self.resource_in_use = np.zeros(num_res, dtype=np.float32)        # granted requests
+        self.resource_waiting = np.zeros(num_res, dtype=np.float32)       # queued requests
+        self.resource_activity_enc = np.zeros(num_res, dtype=np.float32)  # activity index / A (0 = idle)
+        self.activity_pending = np.zeros(num_act, dtype=np.float32)       # cases waiting for a resource
+
         self.simpy_resources = {
             r.id: simpy.Resource(self.env, capacity=r.capacity)
             for r in self._resources
@@ -43,6 +68,17 @@ class SimulatorEngine:
         self.env.process(self.case_generator(max_cases))
 
 
+    def _build_skill_matrix(self) -> np.ndarray:
+        """Dense (num_activities x num_resources) 0/1 matrix; the END row is all zeros."""
+        skills = np.zeros((len(self._activities), len(self._resources)), dtype=np.float32)
+        for j, res in enumerate(self._resources):
+            for act in res.skills:
+                i = self._activity_index.get(act)
+                if i is not None:
+                    skills[i, j] = 1.0
+        skills.setflags(write=False)
+        return skills
+
     def simulate(self, until: float = None, max_cases: int = None, convert_to_absolute_time: bool = False):
         """Standard SimPy simulation (Fast)"""
         self.is_rl_mode = False 
@@ -130,21 +166,31 @@ class SimulatorEngine:
         # 3. Resource contention — queue here if resource is busy (emergent from SimPy)
         process = self.env.active_process
         self.waiting_requests[process] = (case, activity)
+        r_pos = self._resource_index[resource.id]
+        a_pos = self._activity_index[activity]
+        self.activity_pending[a_pos] += 1
     
         with simpy_resource.request() as req:
+            queued = not req.triggered
+            if queued:
+                self.resource_waiting[r_pos] += 1
             yield req
             del self.waiting_requests[process]
+            self.activity_pending[a_pos] -= 1
+            if queued:
+                self.resource_waiting[r_pos] -= 1
+            self.resource_in_use[r_pos] += 1
     
             # 4. Process the activity
             self.resource_current_activity[resource.id] = activity
+            self.resource_activity_enc[r_pos] = a_pos / len(self._activities)
             duration = self.setup.processing_time_policy.get_activity_duration(activity, resource)
             yield self.env.timeout(duration)
             self.resource_current_activity.pop(resource.id, None)
+            self.resource_activity_enc[r_pos] = 0.0
+            self.resource_in_use[r_pos] -= 1
     
-            self.event_log.append({
-                "case_id": case.case_id, "activity": activity, "resource": resource.id,
-                "start_time": self.env.now - duration, "end_time": self.env.now
-            })
+            self.events.append(case.case_id, activity, resource.id, self.env.now - duration, self.env.now)
     
 
     
@@ -190,9 +236,13 @@ class SimulatorEngine:
         return None
 
     def _convert_event_log_to_absolute_time(self):
-        for event in self.event_log:
-            event["start_time"] = (self.start_timestamp + pd.to_timedelta(event["start_time"], unit='seconds')).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            event["end_time"] = (self.start_timestamp + pd.to_timedelta(event["end_time"], unit='seconds')).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        """
+        Anchors the event log at `start_timestamp`. Offsets are kept as-is;
+        conversions then emit datetime64 columns in one vectorised pass and
+        the CSV exporter formats them, while `event_log` rows show
+        'YYYY-mm-dd HH:MM:SS.fff' strings as before. Safe to call more than once.
+        """
+        self.events.set_time_origin(self.start_timestamp, unit="s")
 
     def apply_decision(self, activity, resource):
         """Resumes a paused case with the agent's choice"""
@@ -217,5 +267,11 @@ class SimulatorEngine:
     def num_activities(self): return len(self._activities)
     @property
     def num_resources(self): return len(self._resources)
+    @property
+    def activity_index(self): return self._activity_index
+    @property
+    def resource_index(self): return self._resource_index
+    @property
+    def skill_matrix(self): return self._skill_matrix
 
 
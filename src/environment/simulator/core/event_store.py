@@ -0,0 +1,208 @@
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+class EventStore:
+    """
+    Growable columnar buffer for the simulated event log.
+
+    Each executed activity is one row spread over five typed arrays:
+    case code (int64), activity code (int32), resource code (int32), and
+    start/end time (float64, internal simulation time). Case ids, activities
+    and resources are interned, so every distinct value is stored once in a
+    lookup table (`case_ids`, `activities`, `resources`). Arrays double in
+    size when full.
+
+    `to_dataframe` / `to_arrow` wrap the code arrays as categorical /
+    dictionary columns without copying them. `view()` gives a read-only,
+    list-of-dicts compatible view for existing consumers.
+
+    Times are always stored as internal offsets. Once `time_origin` is set
+    (see `set_time_origin`), conversions expose start/end as datetime64
+    columns computed in one vectorised pass; string formatting is left to
+    the CSV exporter. Rows (`row`, `view()`) keep the former event log
+    format: 'YYYY-mm-dd HH:MM:SS.fff' strings.
+    """
+
+    COLUMNS = ("case_id", "activity", "resource", "start_time", "end_time")
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self._case = np.empty(capacity, dtype=np.int64)
+        self._activity = np.empty(capacity, dtype=np.int32)
+        self._resource = np.empty(capacity, dtype=np.int32)
+        self._start = np.empty(capacity, dtype=np.float64)
+        self._end = np.empty(capacity, dtype=np.float64)
+
+        self.case_ids = []
+        self.activities = []
+        self.resources = []
+        self._case_codes = {}
+        self._activity_codes = {}
+        self._resource_codes = {}
+
+        self.time_origin = None
+        self.time_unit = "s"
+
+    def set_time_origin(self, origin, unit: str = "s"):
+        """Anchors internal offsets to an absolute timestamp. Idempotent; stored data is untouched."""
+        self.time_origin = pd.Timestamp(origin)
+        self.time_unit = unit
+
+    @staticmethod
+    def _intern(value, codes: dict, table: list) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = len(table)
+            codes[value] = code
+            table.append(value)
+        return code
+
+    def _grow(self):
+        capacity = max(2 * len(self._start), 1)
+        for name in ("_case", "_activity", "_resource", "_start", "_end"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def append(self, case_id, activity, resource_id, start_time: float, end_time: float):
+        i = self._size
+        if i == len(self._start):
+            self._grow()
+        self._case[i] = self._intern(case_id, self._case_codes, self.case_ids)
+        self._activity[i] = self._intern(activity, self._activity_codes, self.activities)
+        self._resource[i] = self._intern(resource_id, self._resource_codes, self.resources)
+        self._start[i] = start_time
+        self._end[i] = end_time
+        self._size = i + 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ── Column access (views, no copies) ───────────────────────────────
+
+    @property
+    def case_codes(self) -> np.ndarray: return self._case[:self._size]
+    @property
+    def activity_codes(self) -> np.ndarray: return self._activity[:self._size]
+    @property
+    def resource_codes(self) -> np.ndarray: return self._resource[:self._size]
+    @property
+    def start_times(self) -> np.ndarray: return self._start[:self._size]
+    @property
+    def end_times(self) -> np.ndarray: return self._end[:self._size]
+
+    def row(self, i: int) -> dict:
+        start, end = float(self._start[i]), float(self._end[i])
+        if self.time_origin is not None:
+            start = self._format_time(start)
+            end = self._format_time(end)
+        return {
+            "case_id": self.case_ids[self._case[i]],
+            "activity": self.activities[self._activity[i]],
+            "resource": self.resources[self._resource[i]],
+            "start_time": start,
+            "end_time": end,
+        }
+
+    def _format_time(self, offset: float) -> str:
+        absolute = self.time_origin + pd.to_timedelta(offset, unit=self.time_unit)
+        return absolute.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+    def case_spans(self):
+        """Returns (first_start, last_end) per case code, as two float arrays."""
+        n = len(self.case_ids)
+        first_start = np.full(n, np.inf)
+        last_end = np.full(n, -np.inf)
+        np.minimum.at(first_start, self.case_codes, self.start_times)
+        np.maximum.at(last_end, self.case_codes, self.end_times)
+        return first_start, last_end
+
+    # ── Conversions ────────────────────────────────────────────────────
+
+    def absolute_times(self, offsets: np.ndarray) -> pd.DatetimeIndex:
+        """Vectorised offset -> datetime64 conversion against `time_origin`."""
+        return self.time_origin + pd.to_timedelta(offsets, unit=self.time_unit)
+
+    def to_dataframe(self, absolute_time: bool = None) -> pd.DataFrame:
+        """
+        Categorical columns over the interned tables; codes are not copied.
+
+        :param absolute_time: Emit start/end as datetime64 instead of offsets.
+                              Defaults to True once a time origin is set.
+        """
+        if absolute_time is None:
+            absolute_time = self.time_origin is not None
+        start, end = self.start_times, self.end_times
+        if absolute_time:
+            start, end = self.absolute_times(start), self.absolute_times(end)
+
+        return pd.DataFrame({
+            "case_id": pd.Categorical.from_codes(self.case_codes, categories=self.case_ids),
+            "activity": pd.Categorical.from_codes(self.activity_codes, categories=self.activities),
+            "resource": pd.Categorical.from_codes(self.resource_codes, categories=self.resources),
+            "start_time": start,
+            "end_time": end,
+        }, copy=False)
+
+    def to_arrow(self, absolute_time: bool = None):
+        """Arrow table with dictionary-encoded columns. Requires pyarrow."""
+        import pyarrow as pa
+
+        def _dict(codes, table):
+            return pa.DictionaryArray.from_arrays(pa.array(codes), pa.array(table))
+
+        if absolute_time is None:
+            absolute_time = self.time_origin is not None
+        start, end = self.start_times, self.end_times
+        if absolute_time:
+            start, end = self.absolute_times(start), self.absolute_times(end)
+
+        return pa.table({
+            "case_id": _dict(self.case_codes, self.case_ids),
+            "activity": _dict(self.activity_codes, self.activities),
+            "resource": _dict(self.resource_codes, self.resources),
+            "start_time": pa.array(start),
+            "end_time": pa.array(end),
+        })
+
+    def view(self) -> "EventLogView":
+        return EventLogView(self)
+
+
+class EventLogView(Sequence):
+    """
+    Read-only list-of-dicts view over an EventStore.
+
+    Rows are materialised on access, so iterating the view behaves like the
+    former `list[dict]` event log without storing one dict per event.
+    """
+
+    def __init__(self, store: EventStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store.row(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("event log index out of range")
+        return self._store.row(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._store.row(i)
+
+    @property
+    def store(self) -> EventStore:
+        return self._store
+
+    def to_dataframe(self, absolute_time: bool = None) -> pd.DataFrame:
+        return self._store.to_dataframe(absolute_time)
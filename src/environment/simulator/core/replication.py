@@ -0,0 +1,90 @@
+import copy
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from environment.simulator.core.setup import SimulationSetup
+from environment.simulator.core.engine import SimulatorEngine
+from environment.simulator.adapters.event_log_to_csv import export_event_log_to_csv
+
+
+def spawn_seeds(base_seed: int, n: int) -> List[int]:
+    """
+    Derives `n` statistically independent seeds from a single base seed.
+
+    Uses NumPy's SeedSequence so that replication i always gets the same
+    stream regardless of how many replications run or in which order.
+    """
+    children = np.random.SeedSequence(base_seed).spawn(n)
+    return [int(child.generate_state(1, dtype=np.uint32)[0]) for child in children]
+
+
+def seed_global_rngs(seed: int):
+    """Seeds the global `random` and `np.random` generators used by the policies."""
+    random.seed(seed)
+    np.random.seed(seed)
+
+
+def _run_replication(setup: SimulationSetup, seed: int, max_cases: Optional[int],
+                     convert_to_absolute_time: bool, path: Optional[str]):
+    seed_global_rngs(seed)
+    simulator = SimulatorEngine(setup)
+    event_log = simulator.simulate(max_cases=max_cases, convert_to_absolute_time=convert_to_absolute_time)
+
+    if path is not None:
+        export_event_log_to_csv(event_log, path)
+        return path
+    return event_log
+
+
+def run_replications(
+    setup: SimulationSetup,
+    n_replications: int,
+    base_seed: int = 42,
+    max_cases: int = None,
+    convert_to_absolute_time: bool = True,
+    path_template: str = None,
+    max_workers: int = None,
+) -> list:
+    """
+    Runs independent replications of the same SimulationSetup in a process pool.
+
+    Each replication builds its own SimulatorEngine in a worker process and
+    seeds the global RNGs with its own stream derived from `base_seed`, so the
+    result for replication i does not depend on the number of workers.
+
+    :param setup: The fitted simulation setup (shipped once per replication).
+    :param n_replications: Number of replications to run.
+    :param base_seed: Seed from which one independent stream per replication is derived.
+    :param max_cases: Cases per replication (None = until arrivals stop).
+    :param convert_to_absolute_time: Convert start/end times to absolute timestamps.
+    :param path_template: If given, e.g. "out/log_{i}.csv", each replication is
+                          exported by its worker and the list of paths is returned
+                          instead of the event logs (i is 1-based).
+    :param max_workers: Pool size (default: min(n_replications, os.cpu_count())).
+    :return: One event log (or one CSV path) per replication, in replication order.
+    """
+    seeds = spawn_seeds(base_seed, n_replications)
+    paths = [
+        path_template.format(i=i + 1) if path_template is not None else None
+        for i in range(n_replications)
+    ]
+    max_workers = max_workers or min(n_replications, os.cpu_count() or 1)
+
+    if max_workers <= 1:
+        # Copy per replication, as the pool does by pickling, so that policy
+        # state such as pre-sampled buffers never leaks between replications.
+        return [
+            _run_replication(copy.deepcopy(setup), seeds[i], max_cases, convert_to_absolute_time, paths[i])
+            for i in range(n_replications)
+        ]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(_run_replication, setup, seeds[i], max_cases, convert_to_absolute_time, paths[i])
+            for i in range(n_replications)
+        ]
+        return [f.result() for f in futures]
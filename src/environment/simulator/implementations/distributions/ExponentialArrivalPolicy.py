@@ -10,7 +10,7 @@ class ExponentialArrivalPolicy(ArrivalPolicy):
             raise ValueError("Lambda parameter for ExponentialArrivalPolicy must be positive.")
         self.lambda_param = lambda_param
 
-    def get_next_arrival_time(self) -> float:
+    def get_next_arrival_time(self, current_time: float = None) -> float:
         return float(np.random.exponential(1 / self.lambda_param))
 
     def __str__(self):
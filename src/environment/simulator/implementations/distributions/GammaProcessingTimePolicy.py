@@ -0,0 +1,31 @@
+import numpy as np
+
+from environment.simulator.implementations.distributions.ParametricProcessingTimePolicy import ParametricProcessingTimePolicy
+
+
+class GammaProcessingTimePolicy(ParametricProcessingTimePolicy):
+    """
+    Samples activity durations from a Gamma distribution.
+
+    Parameters are (shape, scale). A shape of inf marks a group whose
+    durations were all equal; it always returns `scale`.
+    """
+
+    DEFAULT_PARAMS = (1.0, 1.0)
+
+    def sample(self, shape: float, scale: float) -> float:
+        if np.isinf(shape):
+            return scale
+        return float(np.random.gamma(shape, scale))
+
+    @staticmethod
+    def fit_params(mean, mean_log, std_log):
+        # Closed-form approximation of the maximum-likelihood shape (Minka),
+        # from s = log(mean) - mean(log); within ~1.5% of the exact solution
+        s = np.log(mean) - mean_log
+        constant = s <= 1e-12
+        s = np.where(constant, 1.0, s)
+        shape = (3 - s + np.sqrt((s - 3) ** 2 + 24 * s)) / (12 * s)
+        shape = np.where(constant, np.inf, shape)
+        scale = np.where(constant, mean, mean / shape)
+        return shape, scale
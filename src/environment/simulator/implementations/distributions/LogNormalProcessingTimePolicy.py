@@ -1,9 +1,10 @@
 import numpy as np
-from environment.simulator.policies.ProcessingTimePolicy import ProcessingTimePolicy
 from typing import Dict, Tuple
 
+from environment.simulator.implementations.distributions.ParametricProcessingTimePolicy import ParametricProcessingTimePolicy
 
-class LogNormalProcessingTimePolicy(ProcessingTimePolicy):
+
+class LogNormalProcessingTimePolicy(ParametricProcessingTimePolicy):
     """
     Samples activity durations from a Log-Normal distribution.
 
@@ -11,11 +12,14 @@ class LogNormalProcessingTimePolicy(ProcessingTimePolicy):
     This naturally produces right-skewed durations matching real processes.
     """
 
-    def __init__(self, params_by_activity: Dict[str, Tuple[float, float]]):
-        self.params = params_by_activity
+    DEFAULT_PARAMS = (0.0, 0.1)
 
-    def get_activity_duration(self, activity: str, resource=None) -> float:
-        mu, sigma = self.params.get(activity, (0.0, 0.1))
+    def sample(self, mu: float, sigma: float) -> float:
         if sigma <= 0:
             return max(0.0, np.exp(mu))
         return float(np.random.lognormal(mean=mu, sigma=sigma))
+
+    @staticmethod
+    def fit_params(mean, mean_log, std_log):
+        # Maximum likelihood: the moments of log(duration)
+        return mean_log, std_log
@@ -0,0 +1,58 @@
+from abc import abstractmethod
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from environment.simulator.policies.ProcessingTimePolicy import ProcessingTimePolicy
+
+
+class ParametricProcessingTimePolicy(ProcessingTimePolicy):
+    """
+    Base for processing time policies that sample from a two-parameter
+    distribution fitted per activity, and optionally per (activity, resource)
+    pair with the activity parameters as fallback.
+
+    Subclasses implement `sample` for one parameter tuple and `fit_params`,
+    which turns per-group moments of the observed durations into parameter
+    arrays, so an initializer can fit every group in one grouped aggregation.
+    """
+
+    DEFAULT_PARAMS: Tuple[float, float] = (0.0, 0.0)
+
+    def __init__(
+        self,
+        params_by_activity: Dict[str, Tuple[float, float]],
+        params_by_activity_resource: Optional[Dict[tuple, Tuple[float, float]]] = None,
+    ):
+        self.params = params_by_activity
+        self.pair_params = params_by_activity_resource or {}
+
+    def get_params(self, activity, resource=None) -> Tuple[float, float]:
+        if resource is not None:
+            params = self.pair_params.get((activity, resource.id))
+            if params is not None:
+                return params
+        return self.params.get(activity, self.DEFAULT_PARAMS)
+
+    def get_activity_duration(self, activity, resource=None) -> float:
+        return self.sample(*self.get_params(activity, resource))
+
+    @abstractmethod
+    def sample(self, a: float, b: float) -> float:
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def fit_params(mean: np.ndarray, mean_log: np.ndarray, std_log: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parameter arrays from per-group moments of positive durations: the
+        mean, the mean of the log and the (population) std of the log.
+        """
+        pass
+
+    def __str__(self) -> str:
+        lines = [type(self).__name__]
+        for activity, (a, b) in self.params.items():
+            lines.append(f"  {activity}: ({a:.4f}, {b:.4f})")
+        lines.append(f"  ({len(self.pair_params)} (activity, resource) pairs)")
+        return "\n".join(lines)
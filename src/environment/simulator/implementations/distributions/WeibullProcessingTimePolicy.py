@@ -0,0 +1,28 @@
+import numpy as np
+
+from environment.simulator.implementations.distributions.ParametricProcessingTimePolicy import ParametricProcessingTimePolicy
+
+
+class WeibullProcessingTimePolicy(ParametricProcessingTimePolicy):
+    """
+    Samples activity durations from a Weibull distribution.
+
+    Parameters are (shape, scale). A shape of inf marks a group whose
+    durations were all equal; it always returns `scale`.
+    """
+
+    DEFAULT_PARAMS = (1.0, 1.0)
+
+    def sample(self, shape: float, scale: float) -> float:
+        if np.isinf(shape):
+            return scale
+        return float(scale * np.random.weibull(shape))
+
+    @staticmethod
+    def fit_params(mean, mean_log, std_log):
+        # Log-moment estimator: log(X) is Gumbel-distributed with
+        # std = pi / (shape * sqrt(6)) and mean = log(scale) - euler_gamma / shape
+        with np.errstate(divide="ignore"):
+            shape = np.where(std_log > 0, np.pi / (np.sqrt(6) * std_log), np.inf)
+        scale = np.exp(mean_log + np.euler_gamma / shape)
+        return shape, scale
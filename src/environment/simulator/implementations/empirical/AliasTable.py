@@ -0,0 +1,48 @@
+import random
+
+import numpy as np
+
+
+class AliasTable:
+    """
+    Walker alias table over a finite discrete distribution.
+
+    Built once in O(n) with Vose's method; each draw then costs one uniform
+    number from the global `random` module, one multiply and one comparison,
+    independent of the number of outcomes.
+    """
+
+    def __init__(self, outcomes, weights):
+        self.outcomes = list(outcomes)
+        n = len(self.outcomes)
+        w = np.asarray(list(weights), dtype=np.float64)
+        if n == 0 or w.sum() <= 0:
+            raise ValueError("AliasTable requires at least one outcome with positive weight.")
+
+        scaled = w * (n / w.sum())
+        prob = np.ones(n, dtype=np.float64)
+        alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            prob[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Leftovers are 1 up to rounding error and keep prob = 1
+
+        self._n = n
+        self._prob = prob.tolist()
+        self._alias = [self.outcomes[a] for a in alias]
+
+    def sample(self):
+        u = random.random() * self._n
+        i = int(u)
+        if u - i < self._prob[i]:
+            return self.outcomes[i]
+        return self._alias[i]
+
+    def __len__(self) -> int:
+        return self._n
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+class BatchedEmpiricalSampler:
+    """
+    Uniform sampler over a fixed array of observed values.
+
+    Samples are kept in one contiguous float64 array. Draws are served from a
+    buffer of pre-sampled values that is refilled in bulk with a single
+    vectorised `np.random.randint` call, so a draw is a list index and a
+    cursor increment. The refill size starts small and doubles up to
+    `max_batch`, which keeps rarely used keys cheap in memory.
+
+    Randomness comes from the global `np.random` state, so seeding it keeps
+    simulations reproducible. Buffers are not pickled: a copy shipped to a
+    worker process starts empty and draws from that worker's own RNG stream.
+    """
+
+    def __init__(self, samples, max_batch: int = 4096, min_batch: int = 64):
+        self.values = np.ascontiguousarray(samples, dtype=np.float64)
+        if self.values.size == 0:
+            raise ValueError("BatchedEmpiricalSampler requires at least one sample.")
+        self._max_batch = max_batch
+        self._min_batch = min(min_batch, max_batch)
+        self._batch = self._min_batch
+        self._buffer = []
+        self._cursor = 0
+
+    def sample(self) -> float:
+        if self._cursor >= len(self._buffer):
+            self._refill()
+        value = self._buffer[self._cursor]
+        self._cursor += 1
+        return value
+
+    def _refill(self):
+        idx = np.random.randint(0, self.values.size, size=self._batch)
+        self._buffer = self.values[idx].tolist()
+        self._cursor = 0
+        self._batch = min(self._batch * 2, self._max_batch)
+
+    def discard_buffer(self):
+        """Drops pre-sampled values and restarts the refill schedule, so the
+        draws that follow depend only on the current RNG state."""
+        self._buffer = []
+        self._cursor = 0
+        self._batch = self._min_batch
+
+    def __len__(self) -> int:
+        return self.values.size
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_buffer"] = []
+        state["_cursor"] = 0
+        return state
@@ -1,9 +1,7 @@
-import random
-from collections import defaultdict
-
 import numpy as np
 
 from environment.simulator.policies.ProcessingTimePolicy import ProcessingTimePolicy
+from environment.simulator.implementations.empirical.BatchedEmpiricalSampler import BatchedEmpiricalSampler
 
 
 class EmpiricalResourceActivityProcessingTimePolicy(ProcessingTimePolicy):
@@ -15,23 +13,47 @@ class EmpiricalResourceActivityProcessingTimePolicy(ProcessingTimePolicy):
     """
 
     def __init__(self, samples_by_activity_resource: dict, samples_by_activity: dict):
-        # keys: (activity, resource) -> list[float]
-        self._by_pair = samples_by_activity_resource
-        # fallback keys: activity -> list[float]
-        self._by_activity = samples_by_activity
+        # keys: (activity, resource) -> np.ndarray[float]
+        self._by_pair = {
+            key: np.asarray(samples, dtype=np.float64)
+            for key, samples in samples_by_activity_resource.items()
+            if len(samples) > 0
+        }
+        # fallback keys: activity -> np.ndarray[float]
+        self._by_activity = {
+            act: np.asarray(samples, dtype=np.float64)
+            for act, samples in samples_by_activity.items()
+            if len(samples) > 0
+        }
 
-    def get_activity_duration(self, activity, resource=None) -> float:
-        resource_id = resource.id if resource is not None else None
-        key = (activity, resource_id)
+        # Fallback chain resolved up front: every key maps straight to the
+        # sampler that serves it (None when neither level has samples).
+        self._activity_samplers = {
+            act: BatchedEmpiricalSampler(samples) for act, samples in self._by_activity.items()
+        }
+        self._resolved = {
+            key: BatchedEmpiricalSampler(samples) for key, samples in self._by_pair.items()
+        }
 
-        if key in self._by_pair and self._by_pair[key]:
-            return random.choice(self._by_pair[key])
+    def reset(self):
+        for sampler in self._activity_samplers.values():
+            sampler.discard_buffer()
+        for sampler in self._resolved.values():
+            if sampler is not None:
+                sampler.discard_buffer()
 
-        # Fallback: activity-only distribution
-        if activity in self._by_activity and self._by_activity[activity]:
-            return random.choice(self._by_activity[activity])
+    def _resolve(self, key):
+        # Unseen (activity, resource) pair: memoize its activity-only fallback
+        sampler = self._activity_samplers.get(key[0])
+        self._resolved[key] = sampler
+        return sampler
 
-        return 0.0
+    def get_activity_duration(self, activity, resource=None) -> float:
+        key = (activity, resource.id if resource is not None else None)
+        sampler = self._resolved.get(key)
+        if sampler is None and key not in self._resolved:
+            sampler = self._resolve(key)
+        return sampler.sample() if sampler is not None else 0.0
 
     def __str__(self) -> str:
         lines = ["EmpiricalResourceActivityProcessingTimePolicy"]
@@ -41,7 +63,7 @@ class EmpiricalResourceActivityProcessingTimePolicy(ProcessingTimePolicy):
             pairs = {
                 res: samples
                 for (act, res), samples in self._by_pair.items()
-                if act == activity and samples
+                if act == activity and len(samples) > 0
             }
             for resource_id, samples in sorted(pairs.items()):
                 arr = np.array(samples)
@@ -1,8 +1,7 @@
-import random
-
 import numpy as np
 
 from environment.simulator.policies.WaitingTImePolicy import WaitingTimePolicy
+from environment.simulator.implementations.empirical.BatchedEmpiricalSampler import BatchedEmpiricalSampler
 
 
 class ExtraneousWaitingTimePolicy(WaitingTimePolicy):
@@ -17,25 +16,48 @@ class ExtraneousWaitingTimePolicy(WaitingTimePolicy):
 
     def __init__(
         self,
-        samples_by_activity_resource: dict,  # {(activity, resource_id): [float, ...]}
-        samples_by_activity: dict,           # {activity: [float, ...]}
+        samples_by_activity_resource: dict,  # {(activity, resource_id): array-like of float}
+        samples_by_activity: dict,           # {activity: array-like of float}
         fallback_delay: float = 0.0,
     ):
-        self._by_pair = samples_by_activity_resource
-        self._by_activity = samples_by_activity
+        self._by_pair = {
+            key: np.asarray(samples, dtype=np.float64)
+            for key, samples in samples_by_activity_resource.items()
+            if len(samples) > 0
+        }
+        self._by_activity = {
+            act: np.asarray(samples, dtype=np.float64)
+            for act, samples in samples_by_activity.items()
+            if len(samples) > 0
+        }
         self._fallback = fallback_delay
 
-    def get_waiting_time(self, activity, resource) -> float:
-        resource_id = resource.id if resource is not None else None
-        key = (activity, resource_id)
+        # Fallback chain resolved once: key -> sampler (None = fixed fallback delay)
+        self._activity_samplers = {
+            act: BatchedEmpiricalSampler(samples) for act, samples in self._by_activity.items()
+        }
+        self._resolved = {
+            key: BatchedEmpiricalSampler(samples) for key, samples in self._by_pair.items()
+        }
 
-        if key in self._by_pair and self._by_pair[key]:
-            return float(random.choice(self._by_pair[key]))
+    def reset(self):
+        for sampler in self._activity_samplers.values():
+            sampler.discard_buffer()
+        for sampler in self._resolved.values():
+            if sampler is not None:
+                sampler.discard_buffer()
 
-        if activity in self._by_activity and self._by_activity[activity]:
-            return float(random.choice(self._by_activity[activity]))
+    def _resolve(self, key):
+        sampler = self._activity_samplers.get(key[0])
+        self._resolved[key] = sampler
+        return sampler
 
-        return self._fallback
+    def get_waiting_time(self, activity, resource) -> float:
+        key = (activity, resource.id if resource is not None else None)
+        sampler = self._resolved.get(key)
+        if sampler is None and key not in self._resolved:
+            sampler = self._resolve(key)
+        return sampler.sample() if sampler is not None else self._fallback
 
     # ------------------------------------------------------------------ #
     # Diagnostics                                                          #
@@ -1,26 +1,83 @@
 
-import random
+from collections import defaultdict
+
+import numpy as np
+
 from environment.entities.Case import Case
 from environment.simulator.policies.RoutingPolicy import RoutingPolicy
+from environment.simulator.implementations.empirical.AliasTable import AliasTable
+
+
+def code_labels(activities) -> np.ndarray:
+    """Lookup array from activity code to label; code -1 maps to None."""
+    labels = np.empty(len(activities) + 1, dtype=object)
+    labels[:-1] = list(activities)
+    labels[-1] = None
+    return labels
+
+
+def probabilities_from_counts(states: list, next_states: list, counts: list) -> dict:
+    """{state: {next: count / state total}}, with keys in the order of the rows."""
+    totals = defaultdict(int)
+    for state, count in zip(states, counts):
+        totals[state] += count
+    probabilities = {}
+    for state, nxt, count in zip(states, next_states, counts):
+        probabilities.setdefault(state, {})[nxt] = count / totals[state]
+    return probabilities
 
 
 class ProbabilisticRoutingPolicy(RoutingPolicy):
     def __init__(self, probabilities):
         self.probabilities = probabilities
+        # Compiled once: O(1) alias-method sampling per routing decision
+        self._tables = {
+            state: AliasTable(choices.keys(), choices.values())
+            for state, choices in probabilities.items()
+            if choices and sum(choices.values()) > 0
+        }
+        self._vectors = {}
+        self._empty_vector = None
+
+    @classmethod
+    def from_counts(cls, activities, states: np.ndarray, next_states: np.ndarray, counts: np.ndarray):
+        """
+        Builds the policy from transition count arrays: `states[i]` -> `next_states[i]`
+        was observed `counts[i]` times. Entries are indices into `activities`;
+        -1 stands for None (start of case as a state, end of case as a next state).
+        """
+        labels = code_labels(activities)
+        return cls(probabilities_from_counts(
+            labels[states].tolist(), labels[next_states].tolist(), np.asarray(counts).tolist()
+        ))
+
+    def bind_activities(self, activities: list):
+        super().bind_activities(activities)
+        self._vectors = {
+            state: self._to_vector(choices)
+            for state, choices in self.probabilities.items()
+        }
+        self._empty_vector = self._to_vector({})
+
+    def routing_state(self, case: "Case"):
+        # First-order: probabilities depend on the current activity only
+        return (case.activity_history[-1] if case.activity_history else None,)
 
     def get_activity_probabilities(self, case: "Case") -> dict:
         current = case.activity_history[-1] if case.activity_history else None
         return self.probabilities.get(current, {})
 
+    def get_activity_probability_vector(self, case: "Case") -> np.ndarray:
+        current = case.activity_history[-1] if case.activity_history else None
+        vector = self._vectors.get(current)
+        return vector if vector is not None else self._empty_vector
+
     def get_next_activity(self, case: "Case"):
         current = case.activity_history[-1] if case.activity_history else None
-        choices = self.probabilities.get(current)
-        if not choices:
+        table = self._tables.get(current)
+        if table is None:
             return None
-        return random.choices(
-            list(choices.keys()),
-            weights=choices.values()
-        )[0]
+        return table.sample()
     
     def __str__(self):
         lines = ["ProbabilisticRoutingPolicy:"]
@@ -1,8 +1,11 @@
-import random
+import numpy as np
 
 from environment.entities.Case import Case
 from environment.simulator.policies.RoutingPolicy import RoutingPolicy
-from environment.simulator.implementations.empirical.ProbabilisticRoutingPolicy import ProbabilisticRoutingPolicy
+from environment.simulator.implementations.empirical.AliasTable import AliasTable
+from environment.simulator.implementations.empirical.ProbabilisticRoutingPolicy import (
+    ProbabilisticRoutingPolicy, code_labels, probabilities_from_counts
+)
 
 
 class SecondOrderRoutingPolicy(RoutingPolicy):
@@ -23,6 +26,42 @@ class SecondOrderRoutingPolicy(RoutingPolicy):
         # probabilities: {(prev, current): {next: weight, ...}, ...}
         self.probabilities = probabilities
         self.fallback = fallback
+        self._tables = {
+            bigram: AliasTable(choices.keys(), choices.values())
+            for bigram, choices in probabilities.items()
+            if choices and sum(choices.values()) > 0
+        }
+        self._vectors = {}
+
+    @classmethod
+    def from_counts(cls, activities, states: np.ndarray, next_states: np.ndarray, counts: np.ndarray,
+                    fallback: ProbabilisticRoutingPolicy):
+        """
+        Builds the policy from trigram count arrays: the bigram `states[i]`
+        (shape (M, 2): previous, current) was followed by `next_states[i]`
+        `counts[i]` times. Entries are indices into `activities`; -1 stands for None.
+        """
+        labels = code_labels(activities)
+        bigrams = list(zip(labels[states[:, 0]].tolist(), labels[states[:, 1]].tolist()))
+        return cls(
+            probabilities_from_counts(bigrams, labels[next_states].tolist(), np.asarray(counts).tolist()),
+            fallback,
+        )
+
+    def bind_activities(self, activities: list):
+        super().bind_activities(activities)
+        self.fallback.bind_activities(activities)
+        self._vectors = {
+            bigram: self._to_vector(choices)
+            for bigram, choices in self.probabilities.items()
+            if choices
+        }
+
+    def routing_state(self, case: Case):
+        history = case.activity_history
+        current = history[-1] if history else None
+        previous = history[-2] if len(history) >= 2 else None
+        return (previous, current)
 
     def get_activity_probabilities(self, case: Case) -> dict:
         history = case.activity_history
@@ -33,14 +72,23 @@ class SecondOrderRoutingPolicy(RoutingPolicy):
             return probs
         return self.fallback.get_activity_probabilities(case)
 
+    def get_activity_probability_vector(self, case: Case) -> np.ndarray:
+        history = case.activity_history
+        current = history[-1] if history else None
+        previous = history[-2] if len(history) >= 2 else None
+        vector = self._vectors.get((previous, current))
+        if vector is not None:
+            return vector
+        return self.fallback.get_activity_probability_vector(case)
+
     def get_next_activity(self, case: Case):
         history = case.activity_history
         current = history[-1] if history else None
         previous = history[-2] if len(history) >= 2 else None
 
-        choices = self.probabilities.get((previous, current))
-        if choices:
-            return random.choices(list(choices.keys()), weights=choices.values())[0]
+        table = self._tables.get((previous, current))
+        if table is not None:
+            return table.sample()
 
         # Fallback to first-order when bigram was never observed
         return self.fallback.get_next_activity(case)
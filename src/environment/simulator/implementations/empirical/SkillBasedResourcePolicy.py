@@ -12,15 +12,20 @@ class SkillBasedResourcePolicy(ResourceAllocationPolicy):
 
     def __init__(self, resources: List[Resource]):
         self.resources = resources
+        # activity -> skilled resources, computed once per activity
+        self._skilled = {}
 
     def select_resource(self, activity, case=None) -> "Resource":
-        skilled = [
-            r for r in self.resources
-            if activity in r.skills
-        ]
+        skilled = self._skilled.get(activity)
+        if skilled is None:
+            skilled = [
+                r for r in self.resources
+                if activity in r.skills
+            ]
+            self._skilled[activity] = skilled
         if not skilled:
             raise RuntimeError(
-                f"No skilled resource for activity {activity.name}"
+                f"No skilled resource for activity {activity}"
             )
         return random.choice(skilled)
 
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import numpy as np
+
+HOURS_PER_WEEK = 7 * 24
+SECONDS_PER_WEEK = HOURS_PER_WEEK * 3600
+
+
+class WeeklyAvailabilityTable:
+    """
+    A 7x24 availability matrix compiled into a 168-slot lookup table.
+
+    For every hour-of-week slot the table stores how many seconds must be
+    added to a time falling in that slot to reach the first open slot, so
+    `next_working_time` is pure arithmetic on the simulation clock:
+
+        slot = ((origin + t) mod week) // 3600
+        next = t + wait_seconds[slot]
+
+    `origin` is the offset of `start_ts` from Monday 00:00 (local time), which
+    is the same weekday/hour convention as `datetime.fromtimestamp`. Like the
+    hour-stepping loop it replaces, the minute offset within the hour is kept
+    (18:30 on a closed slot resolves to 08:30 of the next open hour).
+
+    The clock is the naive wall clock of `start_ts`, advanced by exactly
+    `t` seconds: DST transitions of the local time zone after `start_ts` do
+    not shift it. This is the same clock the engine uses when it exports
+    `start_timestamp + t` as naive timestamps, so weekday and hour match the
+    exported log. (The datetime loop this replaced re-read the local offset
+    on every call and drifted by an hour from the exported times across a
+    DST change; in zones without DST the two agree.)
+    """
+
+    def __init__(self, availability: np.ndarray, start_ts: float):
+        flat = np.asarray(availability, dtype=bool).reshape(HOURS_PER_WEEK)
+
+        dt = datetime.fromtimestamp(start_ts)
+        self._origin = (
+            dt.weekday() * 86400 + dt.hour * 3600 + dt.minute * 60
+            + dt.second + dt.microsecond / 1e6
+        )
+
+        self._open = flat.tolist()
+        self._wait = None
+        if flat.any():
+            open_slots = np.flatnonzero(flat)
+            slots = np.arange(HOURS_PER_WEEK)
+            pos = np.searchsorted(open_slots, slots)
+            wrapped = pos == len(open_slots)
+            target = np.where(wrapped, open_slots[0] + HOURS_PER_WEEK, open_slots[pos % len(open_slots)])
+            self._wait = ((target - slots) * 3600.0).tolist()
+
+    def _slot(self, t: float) -> int:
+        return int(((self._origin + t) % SECONDS_PER_WEEK) // 3600)
+
+    def is_working_time(self, t: float) -> bool:
+        return self._open[self._slot(t)]
+
+    def next_working_time(self, t: float) -> float:
+        if self._wait is None:
+            raise RuntimeError("Calendar has no working hours")
+        return t + self._wait[self._slot(t)]
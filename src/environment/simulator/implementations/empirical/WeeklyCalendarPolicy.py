@@ -1,7 +1,15 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from environment.simulator.policies.CalendarPolicy import CalendarPolicy
+from environment.simulator.implementations.empirical.WeeklyAvailabilityTable import WeeklyAvailabilityTable
 
 class WeeklyCalendarPolicy(CalendarPolicy):
+    """
+    One weekly 7x24 availability matrix for every resource.
+
+    Availability is looked up on the naive wall clock of `start_timestamp`
+    advanced by the simulation time, ignoring DST changes of the local time
+    zone (see WeeklyAvailabilityTable).
+    """
 
     def __init__(self, availability, raw_matrix, start_timestamp: str):
         """
@@ -10,21 +18,13 @@ class WeeklyCalendarPolicy(CalendarPolicy):
         self.availability = availability
         self.raw_matrix = raw_matrix
         self.start_ts = datetime.fromisoformat(start_timestamp).timestamp()
+        self._table = WeeklyAvailabilityTable(availability, self.start_ts)
 
     def is_working_time(self, t: float) -> bool:
-        dt = datetime.fromtimestamp(self.start_ts + t)
-        return self.availability[dt.weekday(), dt.hour]
+        return self._table.is_working_time(t)
 
     def next_working_time(self, t: float) -> float:
-        time = self.start_ts + t
-        dt = datetime.fromtimestamp(time)
-
-        for _ in range(7 * 24):
-            if self.availability[dt.weekday(), dt.hour]:
-                return (dt.timestamp() - self.start_ts)
-            dt += timedelta(hours=1)
-
-        raise RuntimeError("Calendar has no working hours")
+        return self._table.next_working_time(t)
 
     def __str__(self) -> str:
         days = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
@@ -1,9 +1,18 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 import numpy as np
 from environment.simulator.policies.CalendarPolicy import CalendarPolicy
+from environment.simulator.implementations.empirical.WeeklyAvailabilityTable import WeeklyAvailabilityTable
 
 
 class WeeklyResourceCalendarPolicy(CalendarPolicy):
+    """
+    Weekly 7x24 availability per resource, with a global matrix for
+    resources that have none.
+
+    Availability is looked up on the naive wall clock of `start_timestamp`
+    advanced by the simulation time, ignoring DST changes of the local time
+    zone (see WeeklyAvailabilityTable).
+    """
 
     def __init__(
         self,
@@ -15,24 +24,25 @@ class WeeklyResourceCalendarPolicy(CalendarPolicy):
         self.global_availability = global_availability
         self.start_ts = datetime.fromisoformat(start_timestamp).timestamp()
 
+        # Each 7x24 matrix is compiled once into an O(1) lookup table
+        self._resource_tables = {
+            rid: WeeklyAvailabilityTable(matrix, self.start_ts)
+            for rid, matrix in resource_availability.items()
+        }
+        self._global_table = WeeklyAvailabilityTable(global_availability, self.start_ts)
+
         self.global_counter = 0
         self.resources_counter = 0
-    def _matrix(self, resource_id=None) -> np.ndarray:
-        if resource_id and resource_id in self.resource_availability:
+    def _table(self, resource_id=None) -> WeeklyAvailabilityTable:
+        table = self._resource_tables.get(resource_id) if resource_id else None
+        if table is not None:
             self.resources_counter += 1
-            return self.resource_availability[resource_id]
+            return table
         self.global_counter += 1
-        return self.global_availability
+        return self._global_table
 
     def is_working_time(self, t: float, resource_id=None) -> bool:
-        dt = datetime.fromtimestamp(self.start_ts + t)
-        return bool(self._matrix(resource_id)[dt.weekday(), dt.hour])
+        return self._table(resource_id).is_working_time(t)
 
     def next_working_time(self, t: float, resource_id=None) -> float:
-        matrix = self._matrix(resource_id)
-        dt = datetime.fromtimestamp(self.start_ts + t)
-        for _ in range(7 * 24):
-            if matrix[dt.weekday(), dt.hour]:
-                return dt.timestamp() - self.start_ts
-            dt += timedelta(hours=1)
-        raise RuntimeError("Calendar has no working hours")
+        return self._table(resource_id).next_working_time(t)
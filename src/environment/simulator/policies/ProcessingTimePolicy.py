@@ -29,3 +29,11 @@ class ProcessingTimePolicy(ABC):
         :return: The duration of the activity in simulation time units.
         """
         pass
+
+    def reset(self):
+        """
+        Called by the engine at the start of every simulation run. Policies
+        that keep pre-sampled randomness drop it here, so a run depends only on
+        the global RNG state at reset. Default: nothing to do.
+        """
+        pass
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 if TYPE_CHECKING:
     from src.environment.entities.Case import Case
     from src.environment.entities.Activity import Activity
@@ -36,4 +38,38 @@ class RoutingPolicy(ABC):
         Used for masking and state representation. Must not require callers
         to know the internal key schema of the policy.
         """
-        pass
\ No newline at end of file
+        pass
+
+    def routing_state(self, case: "Case"):
+        """
+        Hashable summary of everything `get_activity_probabilities` depends on
+        for this case, used to memoize derived data such as activity masks.
+        Returns None (no caching) unless the implementation overrides it.
+        """
+        return None
+
+    def bind_activities(self, activities: list):
+        """
+        Fixes the activity order used by `get_activity_probability_vector`.
+        Called by the engine with its own activity order (END/None last).
+        Implementations may override it to precompile dense vectors.
+        """
+        self._activity_order = list(activities)
+        self._activity_index = {a: i for i, a in enumerate(self._activity_order)}
+
+    def get_activity_probability_vector(self, case: "Case") -> np.ndarray:
+        """
+        Dense, read-only version of `get_activity_probabilities` aligned with
+        the order given to `bind_activities`. This default converts the dict
+        on every call; compiled policies return cached vectors instead.
+        """
+        return self._to_vector(self.get_activity_probabilities(case))
+
+    def _to_vector(self, probabilities: dict) -> np.ndarray:
+        vector = np.zeros(len(self._activity_order), dtype=np.float64)
+        for act, prob in probabilities.items():
+            idx = self._activity_index.get(act)
+            if idx is not None:
+                vector[idx] = prob
+        vector.setflags(write=False)
+        return vector
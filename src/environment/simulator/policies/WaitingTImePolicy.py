@@ -24,3 +24,11 @@ class WaitingTimePolicy(ABC):
         :return: The waiting time of the event in simulation time units.
         """
         pass
+
+    def reset(self):
+        """
+        Called by the engine at the start of every simulation run. Policies
+        that keep pre-sampled randomness drop it here, so a run depends only on
+        the global RNG state at reset. Default: nothing to do.
+        """
+        pass
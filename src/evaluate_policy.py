@@ -20,12 +20,14 @@ import torch
 
 from environment.simulator.adapters.event_log_to_csv import export_event_log_to_csv
 from initializer.implementations.DDPSInitializer import DDPSInitializer
+from initializer.cache import SetupCache, DEFAULT_CACHE_DIR
 from environment.simulator.core.setup import SimulationSetup
 from environment.core.env import BusinessProcessEnvironment
 from environment.core.mask import NucleusMaskFunction
 from environment.simulator.core.log_names import LogColumnNames
 from environment.simulator.core.engine import SimulatorEngine
 from agent.agent import PPOAgent
+from agent.quantize import PRECISIONS, quantize_policy, check_accuracy, serialized_size
 
 from metrics.evaluation.policy_evaluator import PolicyEvaluator
 from train import run_single_episode, load_checkpoint
@@ -34,6 +36,11 @@ from train import run_single_episode, load_checkpoint
 def parse_args():
     parser = argparse.ArgumentParser(description="OPRA Policy Evaluation")
     parser.add_argument("--log_path", type=str, default="data/logs/LoanApp/LoanApp.csv")
+    parser.add_argument("--setup_cache", type=str, default=DEFAULT_CACHE_DIR,
+                        help="Directory of the fitted-setup cache")
+    parser.add_argument("--no_setup_cache", action="store_true", help="Always refit the setup")
+    parser.add_argument("--setup_jobs", type=int, default=1,
+                        help="Processes fitting the setup policies concurrently (-1 = one per CPU)")
     parser.add_argument("--checkpoint", type=str, required=True, help="Path to model checkpoint")
     parser.add_argument("--K", type=int, default=10, help="Number of evaluation runs")
     parser.add_argument("--max_cases", type=int, default=None, help="Cases per run (default: same as original log)")
@@ -45,6 +52,10 @@ def parse_args():
     parser.add_argument("--top_k", type=int, default=3)
     parser.add_argument("--p_min_end", type=float, default=0.1)
     parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--precision", type=str, default="fp32", choices=PRECISIONS,
+                        help="Inference precision: fp32, dynamic int8 quantization, or bf16 autocast")
+    parser.add_argument("--accuracy_episodes", type=int, default=3,
+                        help="Greedy episodes used to compare a reduced-precision policy with fp32 (0 = skip)")
     return parser.parse_args()
 
 
@@ -62,10 +73,13 @@ def run_evaluation():
     )
 
     # --- Setup ---
-    initializer = DDPSInitializer()
+    initializer = DDPSInitializer(n_jobs=args.setup_jobs)
     start_timestamp = log[log_names.start_timestamp].min()
     time_unit = "seconds"
-    setup: SimulationSetup = initializer.build(log, log_names, start_timestamp, time_unit)
+    if args.no_setup_cache:
+        setup: SimulationSetup = initializer.build(log, log_names, start_timestamp, time_unit)
+    else:
+        setup = SetupCache(args.setup_cache).get_or_build(args.log_path, log_names, time_unit, initializer, log=log)
 
     # --- Determine max_cases ---
     num_original_cases = log[log_names.case_id].nunique()
@@ -106,6 +120,32 @@ def run_evaluation():
     )
     load_checkpoint(agent, args.checkpoint)
 
+    # --- Reduced-precision inference (opt-in) ---
+    if args.precision != "fp32":
+        reference = agent.policy_old
+        agent.policy_old = quantize_policy(reference, args.precision)
+        print(
+            f"Inference precision: {args.precision} "
+            f"(weights {serialized_size(reference) / 1024:.0f} KiB -> {serialized_size(agent.policy_old) / 1024:.0f} KiB)"
+        )
+        if args.accuracy_episodes > 0:
+            report = check_accuracy(
+                reference,
+                agent.policy_old,
+                setup,
+                sla_threshold=sla_threshold,
+                max_cases=max_cases,
+                episodes=args.accuracy_episodes,
+                seed=args.seed,
+                env_kwargs={"activity_mask_function": env.activity_mask_function},
+            )
+            print(
+                f"  Accuracy check ({args.accuracy_episodes} greedy episodes, {report['decisions']} decisions): "
+                f"action agreement={report['action_agreement']:.2%}, "
+                f"CR fp32={report['reference_cr']:.2%}, CR {args.precision}={report['candidate_cr']:.2%} "
+                f"(delta {report['cr_delta']:+.2%})"
+            )
+
     # --- Run K evaluation simulations ---
     sim_log_dir = os.path.join(args.output_dir, args.log_name, args.policy_name, "simulated_logs")
     os.makedirs(sim_log_dir, exist_ok=True)
@@ -135,6 +175,7 @@ def run_evaluation():
             simulator=simulator_k,
             agent=agent,
             deterministic=False,  # Stochastic evaluation
+            eval_mode=True,
         )
         duration = time.time() - t0
 
@@ -0,0 +1,80 @@
+"""
+OPRA Policy Export Script.
+
+Turns a training checkpoint into a self-contained inference artifact:
+TorchScript (.pt), ONNX (.onnx) or NumPy weights (.npz). Masking and action
+selection are part of the exported graph; the skill-based resource mask is
+taken from the simulation setup fitted on the event log.
+
+Usage:
+    python src/export_policy.py --checkpoint best_model.pt --format torchscript --output policy.pt
+    python src/export_policy.py --checkpoint best_model.pt --format numpy --output policy.npz
+"""
+
+import argparse
+
+import pandas as pd
+
+from initializer.implementations.DDPSInitializer import DDPSInitializer
+from initializer.cache import SetupCache, DEFAULT_CACHE_DIR
+from environment.simulator.core.log_names import LogColumnNames
+from environment.simulator.core.engine import SimulatorEngine
+from agent.export import load_policy, export_torchscript, export_onnx, export_numpy
+
+
+EXPORTERS = {
+    "torchscript": export_torchscript,
+    "onnx": export_onnx,
+    "numpy": export_numpy,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OPRA Policy Export")
+    parser.add_argument("--checkpoint", type=str, required=True, help="Path to model checkpoint")
+    parser.add_argument("--format", type=str, default="torchscript", choices=sorted(EXPORTERS))
+    parser.add_argument("--output", type=str, required=True, help="Path of the exported artifact")
+    parser.add_argument("--log_path", type=str, default="data/logs/LoanApp/LoanApp.csv",
+                        help="Event log used to fit the setup (for the resource skill table)")
+    parser.add_argument("--setup_cache", type=str, default=DEFAULT_CACHE_DIR,
+                        help="Directory of the fitted-setup cache")
+    parser.add_argument("--no_setup_cache", action="store_true", help="Always refit the setup")
+    parser.add_argument("--no_skills", action="store_true",
+                        help="Do not embed the skill table; every resource is allowed for every activity")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    policy = load_policy(args.checkpoint)
+
+    skill_matrix = None
+    if not args.no_skills:
+        log_names = LogColumnNames(
+            case_id="case_id",
+            activity="activity",
+            resource="resource",
+            start_timestamp="start_time",
+            end_timestamp="end_time",
+        )
+        if args.no_setup_cache:
+            log = pd.read_csv(args.log_path)
+            setup = DDPSInitializer().build(log, log_names, log[log_names.start_timestamp].min(), "seconds")
+        else:
+            # A cache hit skips reading the log altogether
+            setup = SetupCache(args.setup_cache).get_or_build(args.log_path, log_names, "seconds", DDPSInitializer())
+        simulator = SimulatorEngine(setup)
+        expected = (policy.activity_head.out_features, policy.resource_head.out_features)
+        if (simulator.num_activities, simulator.num_resources) != expected:
+            raise ValueError(
+                f"Checkpoint expects {expected[0]} activities x {expected[1]} resources, "
+                f"setup has {simulator.num_activities} x {simulator.num_resources}."
+            )
+        skill_matrix = simulator.skill_matrix
+
+    path = EXPORTERS[args.format](policy, args.output, skill_matrix=skill_matrix)
+    print(f"Exported {args.format} policy to: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,16 @@ from environment.simulator.core.log_names import LogColumnNames
 
 class Initializer(ABC):
 
+    # Part of the SetupCache key: bump in a subclass whenever a change to its
+    # fitting code alters the setup it builds, so cached setups are refit.
+    VERSION = 1
+
+    # True when build() takes the log's file path and reads it itself
+    STREAMING = False
+
+    # Constructor options that do not change the fitted setup; left out of the SetupCache key
+    NON_FIT_PARAMS = ()
+
     @abstractmethod
     def build(
         self,
@@ -0,0 +1,184 @@
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+
+
+class TransitionCounts:
+    """
+    Counts of (state, next) transitions in order of first appearance.
+    Merging two accumulators adds their counts; keys new to `self` are
+    appended in the other's order.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def add(self, states, next_states, counts):
+        for state, nxt, count in zip(states, next_states, counts):
+            self.counts[(state, nxt)] += count
+
+    def merge(self, other: "TransitionCounts") -> "TransitionCounts":
+        self.counts.update(other.counts)
+        return self
+
+    def as_lists(self):
+        """(states, next_states, counts) lists, in order of first appearance."""
+        if not self.counts:
+            return [], [], []
+        keys, counts = zip(*self.counts.items())
+        states, next_states = zip(*keys)
+        return list(states), list(next_states), list(counts)
+
+
+class WeeklyCounts:
+    """
+    Weekday x hour (7x24) count matrix of timestamps, with the earliest and
+    latest timestamp seen. Optionally one matrix per key (e.g. per resource),
+    kept in order of first appearance.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros((7, 24), dtype=np.float64)
+        self.by_key = {}
+        self.first = None
+        self.last = None
+
+    def add(self, timestamps: pd.Series, keys=None):
+        valid = timestamps.notna().values
+        timestamps = timestamps[valid]
+        if timestamps.empty:
+            return
+        weekdays = timestamps.dt.weekday.values
+        hours = timestamps.dt.hour.values
+        np.add.at(self.counts, (weekdays, hours), 1)
+        self._update_span(timestamps.min(), timestamps.max())
+
+        if keys is not None:
+            codes, uniques = pd.factorize(np.asarray(keys)[valid])
+            known = codes >= 0
+            per_key = np.zeros((len(uniques), 7, 24), dtype=np.float64)
+            np.add.at(per_key, (codes[known], weekdays[known], hours[known]), 1)
+            for key, counts in zip(uniques.tolist(), per_key):
+                if key in self.by_key:
+                    self.by_key[key] += counts
+                else:
+                    self.by_key[key] = counts
+
+    def _update_span(self, first, last):
+        self.first = first if self.first is None else min(self.first, first)
+        self.last = last if self.last is None else max(self.last, last)
+
+    def merge(self, other: "WeeklyCounts") -> "WeeklyCounts":
+        self.counts += other.counts
+        for key, counts in other.by_key.items():
+            if key in self.by_key:
+                self.by_key[key] = self.by_key[key] + counts
+            else:
+                self.by_key[key] = counts.copy()
+        if other.first is not None:
+            self._update_span(other.first, other.last)
+        return self
+
+
+class ReservoirSampler:
+    """
+    Per-key uniform samples of at most `capacity` values (Algorithm R).
+
+    While a key has seen no more than `capacity` values its sample holds all
+    of them in arrival order, so small logs fit exactly as in memory. Two
+    samplers over disjoint parts of a log merge into a uniform sample of the
+    union.
+    """
+
+    def __init__(self, capacity: int = 20_000, seed: int = 0):
+        self.capacity = capacity
+        self.samples = {}
+        self.seen = {}
+        self._rng = np.random.default_rng(seed)
+
+    def add(self, frame: pd.DataFrame, keys):
+        """Adds the frame's "value" column, grouped by `keys`."""
+        if frame.empty:
+            return
+        for key, values in frame.groupby(keys, sort=False, dropna=False)["value"]:
+            self._add(key, values.to_numpy(dtype=np.float64))
+
+    def _add(self, key, values: np.ndarray):
+        sample = self.samples.get(key, np.empty(0, dtype=np.float64))
+        seen = self.seen.get(key, 0)
+
+        free = self.capacity - len(sample)
+        if free > 0:
+            sample = np.concatenate([sample, values[:free]])
+            seen += min(free, len(values))
+            values = values[free:]
+
+        if len(values):
+            # Value number seen + j + 1 replaces a random slot with probability capacity / (seen + j + 1)
+            slots = self._rng.integers(0, seen + 1 + np.arange(len(values)))
+            accepted = np.flatnonzero(slots < self.capacity)
+            # Later values overwrite earlier ones in the same slot
+            slots, accepted = slots[accepted][::-1], accepted[::-1]
+            unique_slots, last = np.unique(slots, return_index=True)
+            sample[unique_slots] = values[accepted[last]]
+            seen += len(values)
+
+        self.samples[key] = sample
+        self.seen[key] = seen
+
+    def merge(self, other: "ReservoirSampler") -> "ReservoirSampler":
+        for key, theirs in other.samples.items():
+            ours = self.samples.get(key)
+            if ours is None:
+                self.samples[key] = theirs.copy()
+                self.seen[key] = other.seen[key]
+                continue
+            n_ours, n_theirs = self.seen[key], other.seen[key]
+            if n_ours + n_theirs <= self.capacity:
+                merged = np.concatenate([ours, theirs])
+            else:
+                # Share of the merged sample drawn from each side, as if sampled from the union
+                size = min(self.capacity, n_ours + n_theirs)
+                from_ours = self._rng.hypergeometric(n_ours, n_theirs, size)
+                merged = np.concatenate([
+                    self._rng.choice(ours, from_ours, replace=False),
+                    self._rng.choice(theirs, size - from_ours, replace=False),
+                ])
+            self.samples[key] = merged
+            self.seen[key] = n_ours + n_theirs
+        return self
+
+    def as_frame(self, keys) -> pd.DataFrame:
+        """Samples as rows of `keys` columns plus "value", key by key."""
+        names = [keys] if isinstance(keys, str) else list(keys)
+        if not self.samples:
+            return pd.DataFrame({**{name: [] for name in names}, "value": []})
+        lengths = [len(sample) for sample in self.samples.values()]
+        columns = {}
+        for i, name in enumerate(names):
+            labels = [key if len(names) == 1 else key[i] for key in self.samples]
+            columns[name] = np.repeat(np.array(labels, dtype=object), lengths)
+        columns["value"] = np.concatenate(list(self.samples.values()))
+        return pd.DataFrame(columns)
+
+
+class SkillSets:
+    """{resource: set of activities it performed}."""
+
+    def __init__(self):
+        self.skills = defaultdict(set)
+
+    def add(self, resources, activities):
+        frame = pd.DataFrame({"res": resources, "act": activities})
+        for resource, acts in frame.groupby("res", sort=False)["act"]:
+            self.skills[resource].update(acts.unique())
+
+    def merge(self, other: "SkillSets") -> "SkillSets":
+        for resource, acts in other.skills.items():
+            self.skills[resource] |= acts
+        return self
+
+    def as_dict(self) -> dict:
+        """Skill sets ordered by resource, like a sorted groupby."""
+        return {resource: self.skills[resource] for resource in sorted(self.skills)}
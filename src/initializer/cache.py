@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import uuid
+from dataclasses import asdict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from environment.simulator.core.log_names import LogColumnNames
+from environment.simulator.core.setup import SimulationSetup
+from initializer.Initializer import Initializer
+
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = "data/cache/setups"
+
+_ALIGN = 64                    # byte alignment of each out-of-band buffer
+_MIN_OUT_OF_BAND = 1 << 12     # smaller buffers stay inside the pickle stream
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SetupCache:
+    """
+    Content-addressed on-disk cache of fitted SimulationSetup objects.
+
+    The key hashes the log file contents (sha256), the LogColumnNames, the
+    time unit, the start timestamp, the initializer class with its VERSION and
+    its simple constructor options, and the cache format. Editing the log or
+    the fitting code (with a VERSION bump) therefore never serves a stale
+    setup.
+
+    Each entry is a directory with:
+        setup.pkl    : pickle protocol 5 stream of the setup
+        buffers.bin  : every large NumPy array, out-of-band and 64-byte aligned
+        buffers.json : (offset, length) of each buffer
+    On load, buffers.bin is memory-mapped read-only and the arrays are rebuilt
+    as views on it, so sample arrays are paged in lazily instead of copied.
+    Entries are written to a temporary directory and renamed into place. An
+    existing entry is never replaced: it was built from the same inputs, so
+    concurrent jobs that miss on the same key keep whichever copy landed
+    first. An entry that cannot be read counts as a miss.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR):
+        self.directory = directory
+
+    @staticmethod
+    def _initializer_params(initializer: Initializer) -> dict:
+        return {
+            k: v for k, v in sorted(vars(initializer).items())
+            if not k.startswith("_") and k not in initializer.NON_FIT_PARAMS
+            and isinstance(v, (bool, int, float, str, type(None)))
+        }
+
+    def key(self, log_path: str, log_names: LogColumnNames, time_unit: str,
+            initializer: Initializer, start_timestamp=None) -> str:
+        payload = {
+            "log_sha256": file_sha256(log_path),
+            "log_names": asdict(log_names),
+            "time_unit": time_unit,
+            "start_timestamp": None if start_timestamp is None else str(start_timestamp),
+            "initializer": f"{type(initializer).__module__}.{type(initializer).__qualname__}",
+            "initializer_version": getattr(type(initializer), "VERSION", 0),
+            "initializer_params": self._initializer_params(initializer),
+            "format": CACHE_FORMAT_VERSION,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:32]
+
+    def _entry(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def load(self, key: str) -> Optional[SimulationSetup]:
+        entry = self._entry(key)
+        if not os.path.exists(os.path.join(entry, "setup.pkl")):
+            return None
+
+        try:
+            with open(os.path.join(entry, "buffers.json")) as f:
+                spans = json.load(f)
+            buffers = []
+            if spans:
+                data = np.memmap(os.path.join(entry, "buffers.bin"), dtype=np.uint8, mode="r")
+                buffers = [data[offset:offset + length] for offset, length in spans]
+            with open(os.path.join(entry, "setup.pkl"), "rb") as f:
+                return pickle.load(f, buffers=buffers)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+            print(f"Ignoring unreadable setup cache entry {entry}: {e!r}")
+            return None
+
+    def save(self, key: str, setup: SimulationSetup) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        entry = self._entry(key)
+        tmp = f"{entry}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp)
+
+        out_of_band = []
+
+        def buffer_callback(buffer: pickle.PickleBuffer):
+            if buffer.raw().nbytes < _MIN_OUT_OF_BAND:
+                return True  # serialise in-band
+            out_of_band.append(buffer)
+            return False
+
+        try:
+            with open(os.path.join(tmp, "setup.pkl"), "wb") as f:
+                pickle.dump(setup, f, protocol=5, buffer_callback=buffer_callback)
+
+            spans = []
+            with open(os.path.join(tmp, "buffers.bin"), "wb") as f:
+                offset = 0
+                for buffer in out_of_band:
+                    raw = buffer.raw()
+                    padding = -offset % _ALIGN
+                    f.write(b"\0" * padding)
+                    offset += padding
+                    f.write(raw)
+                    spans.append((offset, raw.nbytes))
+                    offset += raw.nbytes
+            with open(os.path.join(tmp, "buffers.json"), "w") as f:
+                json.dump(spans, f)
+
+            # Same key, same content: another writer's entry is as good as ours
+            if not os.path.exists(entry):
+                try:
+                    os.replace(tmp, entry)
+                except OSError:
+                    if not os.path.isdir(entry):
+                        raise
+        finally:
+            if os.path.exists(tmp):
+                shutil.rmtree(tmp)
+        return entry
+
+    def get_or_build(self, log_path: str, log_names: LogColumnNames, time_unit: str,
+                     initializer: Initializer, log: pd.DataFrame = None, start_timestamp=None) -> SimulationSetup:
+        """
+        Returns the cached setup for this log and configuration, fitting and
+        storing it on a miss. `log` avoids re-reading the CSV when the caller
+        already has it (streaming initializers always read `log_path`);
+        `start_timestamp` defaults to the earliest start.
+        """
+        key = self.key(log_path, log_names, time_unit, initializer, start_timestamp)
+        setup = self.load(key)
+        if setup is not None:
+            print(f"Simulation setup loaded from cache: {self._entry(key)}")
+            return setup
+
+        if initializer.STREAMING:
+            log = log_path
+        elif log is None:
+            log = pd.read_csv(log_path)
+        if start_timestamp is None and isinstance(log, pd.DataFrame):
+            start_timestamp = log[log_names.start_timestamp].min()
+        setup = initializer.build(log, log_names, start_timestamp, time_unit)
+        print(f"Simulation setup cached: {self.save(key, setup)}")
+        return setup
@@ -1,6 +1,11 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
 import pandas as pd
 import numpy as np
-from collections import defaultdict, Counter
 
 from environment.simulator.core.log_names import LogColumnNames
 from environment.simulator.implementations.empirical.SkillBasedResourcePolicy import SkillBasedResourcePolicy
@@ -13,6 +18,7 @@ from environment.simulator.policies import ArrivalPolicy, CalendarPolicy, Proces
 from environment.simulator.implementations.empirical.ExtraneousWaitingTimePolicy import ExtraneousWaitingTimePolicy
 from environment.simulator.policies.WaitingTImePolicy import WaitingTimePolicy
 from initializer.Initializer import Initializer
+from initializer.shared_log import SharedLog
 from environment.simulator.core.setup import SimulationSetup
 from environment.entities.Resource import Resource
 from environment.simulator.implementations.empirical.ProbabilisticRoutingPolicy import ProbabilisticRoutingPolicy
@@ -23,146 +29,215 @@ from environment.simulator.implementations.empirical.EmpiricalResourceActivityPr
 
 class DDPSInitializer(Initializer):
 
+    # The worker count does not change the fitted setup
+    NON_FIT_PARAMS = ("n_jobs",)
+
+    def __init__(self, second_order_routing: bool = False, n_jobs: int = 1):
+        # Route on (previous, current) activity instead of the current one alone
+        self.second_order_routing = second_order_routing
+        # > 1 fits the policies concurrently in a process pool (-1 = one per CPU)
+        self.n_jobs = n_jobs
+        self.stage_timings = {}
+
     def build(self, log, log_names: LogColumnNames, start_timestamp: str, time_unit: str) -> SimulationSetup:
+        """
+        Fits every policy on the log. The fits are independent, so with
+        n_jobs > 1 they run in a process pool that reads the parsed log from
+        shared memory. Seconds spent per stage end up in `stage_timings`.
+        """
         self.log_names = log_names
+        self.stage_timings = {}
+        build_start = time.perf_counter()
 
         # ── Pre-parse timestamps once ────────────────────────────────
         # Avoids repeated pd.to_datetime() calls in every sub-method
-        log = log.copy()
-        log[log_names.start_timestamp] = pd.to_datetime(
-            log[log_names.start_timestamp], format="mixed"
-        )
-        log[log_names.end_timestamp] = pd.to_datetime(
-            log[log_names.end_timestamp], format="mixed"
-        )
-
-        routing = self._build_routing_policy(log)
-        print("First-order Markov routing policy built.")
-
-        processing_times = self._build_resource_activity_processing_time_policy(log, time_unit)
-        print("Empirical resource-activity processing time policy built.")
-
-        # ── Build calendar ONCE, reuse in waiting time policy ────────
-        calendar = self._build_calendar_policy(log, start_timestamp)
-        print("Weekly calendar policy built.")
-
-        waiting_times = self._build_waiting_time_policy(log, time_unit, calendar)
-        print("Empirical extraneous waiting time policy built.")
-
-        arrivals = self._build_arrival_policy(log, time_unit, start_timestamp)
-        print("Empirical Weekly arrival policy built.")
-
-        resource_list = self._build_resource_list(log)
-        print("Skill-based resource policy built.")
-
-        resource_policy = SkillBasedResourcePolicy(resource_list)
-        print("Resource policy built.")
-
+        with self._timed("parse"):
+            log = log.copy()
+            log[log_names.start_timestamp] = pd.to_datetime(
+                log[log_names.start_timestamp], format="mixed"
+            )
+            log[log_names.end_timestamp] = pd.to_datetime(
+                log[log_names.end_timestamp], format="mixed"
+            )
+
+        stages = self._fit_stages(start_timestamp, time_unit)
+        n_jobs = (os.cpu_count() or 1) if self.n_jobs == -1 else self.n_jobs
+        if n_jobs > 1:
+            policies = self._fit_in_pool(log, stages, n_jobs)
+        else:
+            policies = {}
+            for stage, (method, args) in stages.items():
+                with self._timed(stage):
+                    policies[stage] = getattr(self, method)(log, *args)
+
+        resource_list = policies["resources"]
         activities = sorted(self._extract_activities(log))
-        print("Activities extracted.")
+        self.stage_timings["total"] = time.perf_counter() - build_start
+        self._print_stage_timings(n_jobs)
 
         return SimulationSetup(
             time_unit=time_unit,
             start_timestamp=start_timestamp,
-            routing_policy=routing,
-            waiting_time_policy=waiting_times,
-            processing_time_policy=processing_times,
-            calendar_policy=calendar,
-            arrival_policy=arrivals,
-            resource_policy=resource_policy,
+            routing_policy=policies["routing"],
+            waiting_time_policy=policies["waiting_times"],
+            processing_time_policy=policies["processing_times"],
+            calendar_policy=policies["calendar"],
+            arrival_policy=policies["arrivals"],
+            resource_policy=SkillBasedResourcePolicy(resource_list),
             activities=activities,
             resources=resource_list,
         )
 
+    def _fit_stages(self, start_timestamp: str, time_unit: str) -> dict:
+        """{stage: (method name, arguments after the log)}; the fits share nothing but the log."""
+        routing = "_build_second_order_routing_policy" if self.second_order_routing else "_build_routing_policy"
+        return {
+            "routing": (routing, ()),
+            "processing_times": ("_build_resource_activity_processing_time_policy", (time_unit,)),
+            "calendar": ("_build_calendar_policy", (start_timestamp,)),
+            "waiting_times": ("_build_waiting_time_policy", (time_unit,)),
+            "arrivals": ("_build_arrival_policy", (time_unit, start_timestamp)),
+            "resources": ("_build_resource_list", ()),
+        }
+
+    def _fit_in_pool(self, log, stages: dict, n_jobs: int) -> dict:
+        names = self.log_names
+        with self._timed("share"):
+            shared = SharedLog(log, [
+                names.case_id, names.activity, names.resource, names.start_timestamp, names.end_timestamp
+            ])
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(stages)),
+                initializer=_init_fit_worker,
+                initargs=(shared.spec, self),
+            ) as pool:
+                futures = {
+                    stage: pool.submit(_fit_stage, method, args)
+                    for stage, (method, args) in stages.items()
+                }
+                results = {stage: future.result() for stage, future in futures.items()}
+        finally:
+            shared.close()
+
+        policies = {}
+        for stage, (policy, seconds) in results.items():
+            policies[stage] = policy
+            self.stage_timings[stage] = seconds
+        return policies
+
+    @contextmanager
+    def _timed(self, stage: str):
+        start = time.perf_counter()
+        yield
+        self.stage_timings[stage] = time.perf_counter() - start
+
+    def _print_stage_timings(self, n_jobs: int = 1):
+        jobs = f", {n_jobs} jobs" if n_jobs > 1 else ""
+        print(f"{type(self).__name__}: setup fitted in {self.stage_timings['total']:.2f}s{jobs}")
+        for stage, seconds in self.stage_timings.items():
+            if stage != "total":
+                print(f"  {stage:<17}{seconds:8.2f}s")
+
     # ─────────────────────────────────────────────────────────────────
-    # ROUTING — vectorised with shift() instead of iterrows()
+    # ROUTING — integer-coded transitions counted in one pass
     # ─────────────────────────────────────────────────────────────────
     def _build_routing_policy(self, log) -> RoutingPolicy:
-        col_case = self.log_names.case_id
-        col_act = self.log_names.activity
-
-        # Sort so that shift() gives us the correct next activity
-        sorted_log = log.sort_values(by=[col_case, self.log_names.start_timestamp])
-        activities = sorted_log[col_act].values
-        case_ids = sorted_log[col_case].values
-
-        # Identify boundaries where case changes
-        same_case = case_ids[:-1] == case_ids[1:]
-
-        # Build current→next pairs
-        current_acts = activities[:-1]
-        next_acts = activities[1:]
-
-        # Mask cross-case transitions: for these, current is terminal (→ None)
-        # and next is a start (None →)
-        counts = defaultdict(Counter)
-
-        # ── Within-case transitions ──
-        mask = same_case
-        for cur, nxt in zip(current_acts[mask], next_acts[mask]):
-            counts[cur][nxt] += 1
-
-        # ── Start-of-case transitions (None → first activity) ──
-        # First event in log is always a start
-        counts[None][activities[0]] += 1
-        # Every position where the previous row was a different case
-        not_same = ~same_case
-        for nxt in next_acts[not_same]:
-            counts[None][nxt] += 1
-
-        # ── End-of-case transitions (last activity → None) ──
-        for cur in current_acts[not_same]:
-            counts[cur][None] += 1
-        # Last event in log is always a case end
-        counts[activities[-1]][None] += 1
-
-        # ── Normalise ──
-        transition_probs = {}
-        for current, counter in counts.items():
-            total = sum(counter.values())
-            if total == 0:
-                transition_probs[current] = {}
-            else:
-                transition_probs[current] = {
-                    nxt: cnt / total for nxt, cnt in counter.items()
-                }
-
-        return ProbabilisticRoutingPolicy(transition_probs)
+        codes, activities, same_case = self._encode_activities(self._sort_by_case(log))
+        states, next_states, counts = self._first_order_counts(codes, same_case, len(activities))
+        return ProbabilisticRoutingPolicy.from_counts(activities, states, next_states, counts)
 
     def _build_second_order_routing_policy(self, log) -> RoutingPolicy:
         """
         Second-order Markov routing policy:
         P(next_activity | previous_activity, current_activity).
+
+        One trigram per event: the previous activity in the case (None for the
+        first event), the event's activity, and the next one (None for the
+        last). The first-order fallback is counted on the same sorted, coded log.
         """
-        col_case = self.log_names.case_id
-        col_act = self.log_names.activity
+        codes, activities, same_case = self._encode_activities(self._sort_by_case(log))
+        n_codes = len(activities)
 
-        sorted_log = log.sort_values(by=[col_case, self.log_names.start_timestamp])
-        activities = sorted_log[col_act].values
-        case_ids = sorted_log[col_case].values
+        trigrams, counts = self._count_transitions(self._trigram_codes(codes, same_case), n_codes)
+        fallback = ProbabilisticRoutingPolicy.from_counts(
+            activities, *self._first_order_counts(codes, same_case, n_codes)
+        )
+        return SecondOrderRoutingPolicy.from_counts(
+            activities, trigrams[:, :2], trigrams[:, 2], counts, fallback
+        )
 
-        counts = defaultdict(Counter)
+    def _encode_activities(self, sorted_log):
+        """
+        Integer activity codes of a case-sorted log (in order of first
+        appearance), the code -> activity list, and per event whether it
+        belongs to the same case as the previous event.
+        """
+        codes, activities = pd.factorize(sorted_log[self.log_names.activity], use_na_sentinel=False)
+        case_ids = sorted_log[self.log_names.case_id].values
+        same_case = np.zeros(len(codes), dtype=bool)
+        same_case[1:] = case_ids[1:] == case_ids[:-1]
+        return codes.astype(np.int64), activities.tolist(), same_case
 
-        for _, group in sorted_log.groupby(col_case, sort=False):
-            acts = group[col_act].values
-            # Build history: [None, a0, a1, ..., aN, None]
-            history = np.empty(len(acts) + 2, dtype=object)
-            history[0] = None
-            history[1:-1] = acts
-            history[-1] = None
+    @staticmethod
+    def _trigram_codes(codes, same_case) -> list:
+        """
+        [previous, current, next] code columns, one row per event; the
+        previous / next activity is -1 (None) at case boundaries.
+        """
+        prev_codes = np.full_like(codes, -1)
+        prev_codes[1:] = np.where(same_case[1:], codes[:-1], -1)
+        next_codes = np.full_like(codes, -1)
+        next_codes[:-1] = np.where(same_case[1:], codes[1:], -1)
+        return [prev_codes, codes, next_codes]
 
-            for i in range(1, len(history) - 1):
-                counts[(history[i - 1], history[i])][history[i + 1]] += 1
+    @staticmethod
+    def _first_order_phases(codes, same_case) -> list:
+        """
+        (states, next_states) code arrays of the first-order transitions, in
+        three phases: within-case, case starts (None -> first) and case ends
+        (last -> None).
+        """
+        within = np.flatnonzero(same_case[1:])
+        first = np.flatnonzero(~same_case)
+        last = np.append(first[1:] - 1, len(codes) - 1)
+        sentinel = np.full(len(first), -1, dtype=np.int64)
+        return [
+            (codes[within], codes[within + 1]),
+            (sentinel, codes[first]),
+            (codes[last], sentinel),
+        ]
 
-        transition_probs = {}
-        for bigram, counter in counts.items():
-            total = sum(counter.values())
-            transition_probs[bigram] = {
-                nxt: cnt / total for nxt, cnt in counter.items()
-            }
+    def _first_order_counts(self, codes, same_case, n_codes):
+        """
+        (states, next_states, counts) of the first-order transitions, -1 = None.
+        Phases are concatenated in order, so the fitted dicts keep the same
+        key order as before.
+        """
+        phases = self._first_order_phases(codes, same_case)
+        pairs, counts = self._count_transitions([
+            np.concatenate([states for states, _ in phases]),
+            np.concatenate([next_states for _, next_states in phases]),
+        ], n_codes)
+        return pairs[:, 0], pairs[:, 1], counts
 
-        fallback = self._build_routing_policy(log)
-        return SecondOrderRoutingPolicy(transition_probs, fallback)
+    @staticmethod
+    def _count_transitions(columns: list, n_codes: int):
+        """
+        Counts the distinct rows of equally long code columns (-1 = None), in
+        order of first appearance. Returns (rows (M, len(columns)), counts (M,)).
+        """
+        base = n_codes + 1
+        keys = np.zeros(len(columns[0]), dtype=np.int64)
+        for column in columns:
+            keys = keys * base + (column + 1)
+        group, unique = pd.factorize(keys)
+        counts = np.bincount(group)
+
+        rows = np.empty((len(unique), len(columns)), dtype=np.int64)
+        for i in reversed(range(len(columns))):
+            unique, rows[:, i] = np.divmod(unique, base)
+        return rows - 1, counts
 
     # ─────────────────────────────────────────────────────────────────
     # PROCESSING TIMES — fully vectorised column arithmetic
@@ -192,73 +267,84 @@ class DDPSInitializer(Initializer):
         Builds an EmpiricalResourceActivityProcessingTimePolicy stratified by
         (activity, resource) pair, with an activity-only fallback.
         """
-        col_res = self.log_names.resource
+        durations = self._processing_durations(log, time_unit)
+        return EmpiricalResourceActivityProcessingTimePolicy(
+            self._grouped_samples(durations, ["act", "res"]),
+            self._grouped_samples(durations, "act"),
+        )
+
+    def _processing_durations(self, log, time_unit: str) -> pd.DataFrame:
+        """(act, res, value) of every event with both timestamps and a duration >= 0, in log order."""
         starts = log[self.log_names.start_timestamp]
         ends = log[self.log_names.end_timestamp]
 
         durations_sec = (ends - starts).dt.total_seconds()
         valid = starts.notna() & ends.notna() & (durations_sec >= 0)
 
-        activities = log.loc[valid, self.log_names.activity].values
-        resources = log.loc[valid, col_res].values
-        durations = self._time_unit_conversion(durations_sec[valid].values, time_unit)
-
-        by_pair = defaultdict(list)
-        by_activity = defaultdict(list)
-        for act, res, dur in zip(activities, resources, durations):
-            by_pair[(act, res)].append(dur)
-            by_activity[act].append(dur)
-
-        return EmpiricalResourceActivityProcessingTimePolicy(dict(by_pair), dict(by_activity))
+        return pd.DataFrame({
+            "act": log.loc[valid, self.log_names.activity].values,
+            "res": log.loc[valid, self.log_names.resource].values,
+            "value": self._time_unit_conversion(durations_sec[valid].values, time_unit),
+        })
 
     # ─────────────────────────────────────────────────────────────────
     # WAITING TIMES — analytical off-time instead of minute-by-minute loop
     # ─────────────────────────────────────────────────────────────────
     def _build_waiting_time_policy(
-        self, log, time_unit: str, calendar_policy: CalendarPolicy
+        self, log, time_unit: str, calendar_policy: CalendarPolicy = None
     ) -> WaitingTimePolicy:
         """
         Empirical waiting time policy stratified by (activity, resource) pair
         with an activity-only fallback.  Raw inter-event gaps within each case
-        are used directly (no calendar subtraction).
+        are used directly (no calendar subtraction), so `calendar_policy` is
+        not needed.
         """
-        col_case = self.log_names.case_id
-        col_start = self.log_names.start_timestamp
-        col_end = self.log_names.end_timestamp
-        col_act = self.log_names.activity
-        col_res = self.log_names.resource
-
-        by_pair = defaultdict(list)
-        by_activity = defaultdict(list)
-
-        sorted_log = log.sort_values(by=[col_case, col_start])
-
-        for _, group in sorted_log.groupby(col_case, sort=False):
-            if len(group) < 2:
-                continue
-
-            prev_ends = group[col_end].iloc[:-1].values
-            curr_starts = group[col_start].iloc[1:].values
-            acts = group[col_act].iloc[1:].values
-            resources = group[col_res].iloc[1:].values
+        delays = self._waiting_delays(self._sort_by_case(log), time_unit)
+        return ExtraneousWaitingTimePolicy(
+            self._grouped_samples(delays, ["act", "res"], cap_quantile=0.995),
+            self._grouped_samples(delays, "act", cap_quantile=0.995),
+        )
 
-            gaps_sec = (curr_starts - prev_ends).astype("timedelta64[s]").astype(np.float64)
+    def _waiting_delays(self, sorted_log, time_unit: str) -> pd.DataFrame:
+        """
+        (act, res, value) of every positive gap between an event's start and
+        the previous event's end in the same case. `sorted_log` must be
+        ordered by case, then start time.
+        """
+        cases = sorted_log[self.log_names.case_id].values
+        starts = sorted_log[self.log_names.start_timestamp].values
+        ends = sorted_log[self.log_names.end_timestamp].values
 
-            for idx in range(len(gaps_sec)):
-                gap = gaps_sec[idx]
-                if gap <= 0 or np.isnan(gap):
-                    continue
-                delay = self._time_unit_conversion(gap, time_unit)
-                act = acts[idx]
-                res = resources[idx]
-                by_pair[(act, res)].append(delay)
-                by_activity[act].append(delay)
+        # Each event is compared with its predecessor in the same case
+        same_case = cases[1:] == cases[:-1]
+        gaps_sec = (starts[1:] - ends[:-1]).astype("timedelta64[s]").astype(np.float64)
+        valid = same_case & (gaps_sec > 0)
 
-        # p99.5 filter per key
-        def _filter(d):
-            return {k: [v for v in vs if v <= np.percentile(vs, 99.5)] for k, vs in d.items()}
+        return pd.DataFrame({
+            "act": sorted_log[self.log_names.activity].values[1:][valid],
+            "res": sorted_log[self.log_names.resource].values[1:][valid],
+            "value": self._time_unit_conversion(gaps_sec[valid], time_unit),
+        })
 
-        return ExtraneousWaitingTimePolicy(_filter(by_pair), _filter(by_activity))
+    @staticmethod
+    def _grouped_samples(frame: pd.DataFrame, keys, cap_quantile: float = None) -> dict:
+        """
+        {key: array of the frame's "value" column}, in log order. With
+        `cap_quantile`, values above their key's quantile are dropped.
+        """
+        if frame.empty:
+            return {}
+        if cap_quantile is not None:
+            grouped = frame.groupby(keys, sort=False, dropna=False)["value"]
+            frame = frame[frame["value"] <= grouped.transform("quantile", cap_quantile)]
+        return {
+            key: group.to_numpy()
+            for key, group in frame.groupby(keys, sort=False, dropna=False)["value"]
+        }
+
+    def _sort_by_case(self, log):
+        """Events ordered by case, then start time."""
+        return log.sort_values(by=[self.log_names.case_id, self.log_names.start_timestamp])
 
     # ─────────────────────────────────────────────────────────────────
     # CALENDAR — vectorised with .dt accessors
@@ -266,45 +352,64 @@ class DDPSInitializer(Initializer):
     def _build_calendar_policy(
         self, log, start_timestamp: str, participation_threshold: float = 0.1
     ) -> CalendarPolicy:
+        global_counts, resource_counts, pair_counts = self._calendar_counts(log)
+        return self._calendar_from_counts(
+            global_counts, resource_counts, pair_counts, start_timestamp, participation_threshold
+        )
+
+    def _calendar_counts(self, log):
+        """
+        Weekday x hour counts of event starts: over the whole log, and per
+        resource ({resource: 7x24}, in order of first appearance), plus the
+        number of events per (resource, activity) pair.
+        """
         col_act = self.log_names.activity
         col_res = self.log_names.resource
         ts_col  = self.log_names.start_timestamp
 
-        valid = log[ts_col].notna()
-        sub   = log[valid]
+        sub = log[log[ts_col].notna()]
+        weekdays = sub[ts_col].dt.weekday.values
+        hours    = sub[ts_col].dt.hour.values
 
-        # ── Global matrix (same logic as before) ────────────────────────
-        weekdays_all = sub[ts_col].dt.weekday.values
-        hours_all    = sub[ts_col].dt.hour.values
         global_counts = np.zeros((7, 24), dtype=np.float64)
-        np.add.at(global_counts, (weekdays_all, hours_all), 1)
+        np.add.at(global_counts, (weekdays, hours), 1)
+
+        res_codes, resources = pd.factorize(sub[col_res])
+        known = res_codes >= 0
+        per_resource = np.zeros((len(resources), 7, 24), dtype=np.float64)
+        np.add.at(per_resource, (res_codes[known], weekdays[known], hours[known]), 1)
+        resource_counts = dict(zip(resources.tolist(), per_resource))
+
+        pair_counts = sub.groupby([col_res, col_act]).size().to_dict()
+        return global_counts, resource_counts, pair_counts
+
+    def _calendar_from_counts(
+        self, global_counts, resource_counts: dict, pair_counts: dict, start_timestamp: str,
+        participation_threshold: float = 0.1,
+    ) -> CalendarPolicy:
+        # ── Global matrix (same logic as before) ────────────────────────
         non_zero = global_counts > 0
         threshold_global = np.percentile(global_counts[non_zero].flatten(), 20)
         global_avail = global_counts > threshold_global
 
         # ── RParticipation per resource ──────────────────────────────────
-        # pair_counts: MultiIndex Series (resource, activity) -> count
-        pair_counts = sub.groupby([col_res, col_act]).size()
         # activity_max[a] = max events by any resource for activity a
-        activity_max = pair_counts.groupby(level=col_act).max()
+        activity_max = defaultdict(int)
+        by_resource = defaultdict(dict)
+        for (r, a), count in pair_counts.items():
+            activity_max[a] = max(activity_max[a], count)
+            by_resource[r][a] = count
 
         resource_avail: dict = {}
-        resources = sub[col_res].dropna().unique()
-
-        for r in resources:
-            if r not in pair_counts:
+        for r, r_counts in resource_counts.items():
+            if r not in by_resource:
                 continue
-            r_pairs     = pair_counts[r]                         # Series a->count
-            numerator   = r_pairs.sum()
-            denominator = activity_max.reindex(r_pairs.index).sum()
+            r_pairs     = by_resource[r]                         # activity -> count
+            numerator   = sum(r_pairs.values())
+            denominator = sum(activity_max[a] for a in r_pairs)
             participation = numerator / denominator if denominator > 0 else 0.0
 
             if participation >= participation_threshold:
-                r_sub      = sub[sub[col_res] == r]
-                r_weekdays = r_sub[ts_col].dt.weekday.values
-                r_hours    = r_sub[ts_col].dt.hour.values
-                r_counts   = np.zeros((7, 24), dtype=np.float64)
-                np.add.at(r_counts, (r_weekdays, r_hours), 1)
                 nz = r_counts > 0
                 if nz.any():
                     thr = np.percentile(r_counts[nz].flatten(), 5)
@@ -314,7 +419,7 @@ class DDPSInitializer(Initializer):
                     # else: all counts equal the threshold (e.g. single unique value)
                     # — fall back to global to avoid an empty calendar
 
-        print(f"  Per-resource calendars: {len(resource_avail)}/{len(resources)} resources "
+        print(f"  Per-resource calendars: {len(resource_avail)}/{len(resource_counts)} resources "
               f"above participation threshold ({participation_threshold}).")
 
         return WeeklyResourceCalendarPolicy(resource_avail, global_avail, start_timestamp)
@@ -343,17 +448,27 @@ class DDPSInitializer(Initializer):
             .dropna()
         )
         timestamps = pd.to_datetime(case_starts)
+        return self._arrival_from_counts(
+            self._weekly_counts(timestamps), timestamps.min(), timestamps.max(), start_timestamp, time_unit
+        )
 
-        # Build a 7x24 arrival rate matrix (arrivals per hour per slot)
-        rate_matrix = np.zeros((7, 24), dtype=np.float64)
-        np.add.at(rate_matrix, (timestamps.dt.weekday.values, timestamps.dt.hour.values), 1)
-
+    @staticmethod
+    def _weekly_counts(timestamps: pd.Series) -> np.ndarray:
+        """7x24 matrix of how many timestamps fall in each weekday x hour slot."""
+        counts = np.zeros((7, 24), dtype=np.float64)
+        np.add.at(counts, (timestamps.dt.weekday.values, timestamps.dt.hour.values), 1)
+        return counts
+
+    def _arrival_from_counts(self, arrival_counts, first_arrival, last_arrival, start_timestamp: str,
+                             time_unit: str) -> ArrivalPolicy:
+        """Weekly arrival policy from the weekday x hour counts of case starts."""
         # Normalize by the number of weeks observed to get a per-week, per-slot rate
-        total_hours = (timestamps.max() - timestamps.min()).total_seconds() / 3600
+        total_hours = (last_arrival - first_arrival).total_seconds() / 3600
         n_weeks = max(1.0, total_hours / (7 * 24))
-        rate_matrix /= n_weeks
+        rate_matrix = arrival_counts / n_weeks
 
         return WeeklyArrivalPolicy(rate_matrix, start_timestamp, time_unit)
+
     # ─────────────────────────────────────────────────────────────────
     # RESOURCES — vectorised groupby instead of iterrows()
     # ─────────────────────────────────────────────────────────────────
@@ -366,7 +481,10 @@ class DDPSInitializer(Initializer):
             .apply(set)
             .to_dict()
         )
+        return self._resource_list_from_skills(skills)
 
+    @staticmethod
+    def _resource_list_from_skills(skills: dict) -> list:
         return [
             Resource(id=name, skills=skill_set)
             for name, skill_set in skills.items()
@@ -400,4 +518,22 @@ class DDPSInitializer(Initializer):
             return interval_seconds / 60
         elif time_unit == "hours":
             return interval_seconds / 3600
-        return interval_seconds
\ No newline at end of file
+        return interval_seconds
+
+# ── Pool workers (module level so they pickle by reference) ─────────────
+_FIT_LOG = None
+_FIT_SHM = None
+_FIT_INITIALIZER = None
+
+
+def _init_fit_worker(spec, initializer: DDPSInitializer):
+    """Attaches the shared log once per worker process."""
+    global _FIT_LOG, _FIT_SHM, _FIT_INITIALIZER
+    _FIT_LOG, _FIT_SHM = SharedLog.attach(spec)
+    _FIT_INITIALIZER = initializer
+
+
+def _fit_stage(method: str, args: tuple):
+    start = time.perf_counter()
+    policy = getattr(_FIT_INITIALIZER, method)(_FIT_LOG, *args)
+    return policy, time.perf_counter() - start
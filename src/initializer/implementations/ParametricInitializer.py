@@ -16,21 +16,41 @@ from environment.simulator.implementations.empirical.WeeklyCalendarPolicy import
 # New parametric policies
 from environment.simulator.implementations.distributions.ExponentialArrivalPolicy import ExponentialArrivalPolicy
 from environment.simulator.implementations.distributions.LogNormalProcessingTimePolicy import LogNormalProcessingTimePolicy
+from environment.simulator.implementations.distributions.GammaProcessingTimePolicy import GammaProcessingTimePolicy
+from environment.simulator.implementations.distributions.WeibullProcessingTimePolicy import WeibullProcessingTimePolicy
 
 from initializer.implementations.DDPSInitializer import DDPSInitializer
 
-from collections import defaultdict # Import defaultdict at the top
+
+PROCESSING_TIME_DISTRIBUTIONS = {
+    "lognormal": LogNormalProcessingTimePolicy,
+    "gamma": GammaProcessingTimePolicy,
+    "weibull": WeibullProcessingTimePolicy,
+}
 
 
 class ParametricInitializer(DDPSInitializer): # Inherit from DDPSInitializer to reuse common methods
 
+    def __init__(self, distribution: str = "lognormal"):
+        super().__init__()
+        if distribution not in PROCESSING_TIME_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown distribution: {distribution}. Expected one of {sorted(PROCESSING_TIME_DISTRIBUTIONS)}."
+            )
+        self.distribution = distribution
+
     def build(self, log, log_names: LogColumnNames, start_timestamp: str, time_unit: str) -> SimulationSetup:
         self.log_names = log_names
 
+        # Pre-parse timestamps once, as DDPSInitializer does
+        log = log.copy()
+        log[log_names.start_timestamp] = pd.to_datetime(log[log_names.start_timestamp], format="mixed")
+        log[log_names.end_timestamp] = pd.to_datetime(log[log_names.end_timestamp], format="mixed")
+
         routing = self._build_routing_policy(log) # Reuses from DDPSInitializer
         processing_times = self._build_processing_time_policy(log, time_unit) # Overridden
-        waiting_times = self._build_waiting_time_policy(log, time_unit) # Reuses from DDPSInitializer (passes for now)
         calendar = self._build_calendar_policy(log, start_timestamp) # Reuses from DDPSInitializer
+        waiting_times = self._build_waiting_time_policy(log, time_unit, calendar) # Reuses from DDPSInitializer
         arrivals = self._build_arrival_policy(log, time_unit) # Overridden
         resource_list = self._build_resource_list(log) # Reuses from DDPSInitializer
         resource_policy = SkillBasedResourcePolicy(resource_list)
@@ -55,16 +75,8 @@ class ParametricInitializer(DDPSInitializer): # Inherit from DDPSInitializer to
             .min()
             .sort_values()
         )
-        # convert to timestamps
-        start_times = pd.to_datetime(case_starts).astype("int64") / 1e9
-
-        # compute inter-arrival times
-        inter_arrivals = np.diff(start_times)
-
-        if time_unit == "minutes":
-            inter_arrivals /= 60
-        elif time_unit == "hours":
-            inter_arrivals /= 3600
+        # compute inter-arrival times (in seconds, whatever the datetime resolution)
+        inter_arrivals = self._time_unit_conversion(case_starts.diff().dt.total_seconds().values[1:], time_unit)
 
         # filter invalid values
         inter_arrivals = inter_arrivals[inter_arrivals > 0]
@@ -80,35 +92,35 @@ class ParametricInitializer(DDPSInitializer): # Inherit from DDPSInitializer to
         return ExponentialArrivalPolicy(lambda_param)
 
     def _build_processing_time_policy(self, log, time_unit: str) -> ProcessingTimePolicy:
-        durations_by_activity = defaultdict(list)
-
-        for _, row in log.iterrows():
-            start = pd.to_datetime(row[self.log_names.start_timestamp])
-            end = pd.to_datetime(row[self.log_names.end_timestamp])
-            if pd.isna(start) or pd.isna(end):
-                continue
-
-            duration = (end - start).total_seconds()  # convert to seconds
-            if time_unit == "minutes":
-                duration /= 60
-            elif time_unit == "hours":
-                duration /= 3600
-            if duration <= 0:  # NOTE: strict inequality, skip zero-duration events
-                continue
-
-            act = row[self.log_names.activity]
-            durations_by_activity[act].append(duration)
-
-        params_by_activity = {}
-        for activity, durations in durations_by_activity.items():
-            durations = np.array(durations)
-            durations = durations[durations > 0]  # safety filter
-            if len(durations) > 0:
-                log_durations = np.log(durations)
-                mu = float(np.mean(log_durations))
-                sigma = float(np.std(log_durations))
-                params_by_activity[activity] = (mu, sigma)
-            else:
-                params_by_activity[activity] = (0.0, 0.1)
-
-        return LogNormalProcessingTimePolicy(params_by_activity)
+        """
+        Fits the configured distribution per activity and per (activity,
+        resource) pair, from grouped moments of the positive durations.
+        """
+        starts = log[self.log_names.start_timestamp]
+        ends = log[self.log_names.end_timestamp]
+        durations = self._time_unit_conversion((ends - starts).dt.total_seconds(), time_unit)
+        valid = durations > 0  # NOTE: strict inequality, skip zero-duration (and missing) events
+
+        frame = pd.DataFrame({
+            "activity": log.loc[valid, self.log_names.activity].values,
+            "resource": log.loc[valid, self.log_names.resource].values,
+            "duration": durations[valid].values,
+        })
+        frame["log_duration"] = np.log(frame["duration"])
+
+        policy_cls = PROCESSING_TIME_DISTRIBUTIONS[self.distribution]
+        return policy_cls(
+            self._fit_duration_params(frame, "activity", policy_cls),
+            self._fit_duration_params(frame, ["activity", "resource"], policy_cls),
+        )
+
+    @staticmethod
+    def _fit_duration_params(frame: pd.DataFrame, keys, policy_cls) -> dict:
+        """{key: params} for every group of `keys`, all groups fitted at once."""
+        grouped = frame.groupby(keys, sort=False)
+        a, b = policy_cls.fit_params(
+            grouped["duration"].mean().values,
+            grouped["log_duration"].mean().values,
+            grouped["log_duration"].std(ddof=0).values,
+        )
+        return dict(zip(grouped.size().index, zip(a.tolist(), b.tolist())))
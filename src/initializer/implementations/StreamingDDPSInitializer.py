@@ -0,0 +1,232 @@
+import os
+import time
+from collections import Counter
+
+import pandas as pd
+
+from environment.simulator.core.log_names import LogColumnNames
+from environment.simulator.core.setup import SimulationSetup
+from environment.simulator.implementations.empirical.SkillBasedResourcePolicy import SkillBasedResourcePolicy
+from environment.simulator.implementations.empirical.ExtraneousWaitingTimePolicy import ExtraneousWaitingTimePolicy
+from environment.simulator.implementations.empirical.ProbabilisticRoutingPolicy import (
+    ProbabilisticRoutingPolicy, code_labels, probabilities_from_counts
+)
+from environment.simulator.implementations.empirical.SecondOrderRoutingPolicy import SecondOrderRoutingPolicy
+from environment.simulator.implementations.empirical.EmpiricalResourceActivityProcessingTimePolicy import EmpiricalResourceActivityProcessingTimePolicy
+from initializer.accumulators import TransitionCounts, WeeklyCounts, ReservoirSampler, SkillSets
+from initializer.implementations.DDPSInitializer import DDPSInitializer
+
+
+class StreamingDDPSInitializer(DDPSInitializer):
+    """
+    DDPSInitializer for logs larger than memory.
+
+    The log is read in chunks (CSV, Parquet, a DataFrame or any iterable of
+    DataFrames) and folded into mergeable accumulators: transition counts for
+    routing, weekday x hour count matrices for the calendar and arrivals,
+    per-key reservoir samples for processing times and waiting gaps, and
+    resource skill sets. Memory depends on the number of cases and keys, not
+    on the number of events.
+
+    Each case's events must arrive together: the trailing case of a chunk is
+    carried over to the next one, and a case that shows up again after it was
+    closed raises a ValueError (sort the log by case first). Within a case,
+    events may come in any order.
+
+    For a log sorted by case, with no key above `reservoir_size` samples, the
+    setup is identical to DDPSInitializer.build; beyond that, processing
+    times and gaps are uniform samples of `reservoir_size` values per key.
+    """
+
+    # SetupCache passes the log path instead of a parsed DataFrame
+    STREAMING = True
+
+    def __init__(self, chunksize: int = 500_000, reservoir_size: int = 20_000, seed: int = 0,
+                 second_order_routing: bool = False):
+        super().__init__(second_order_routing)
+        self.chunksize = chunksize
+        self.reservoir_size = reservoir_size
+        self.seed = seed
+
+    def build(self, log, log_names: LogColumnNames, start_timestamp=None, time_unit: str = "seconds") -> SimulationSetup:
+        """`start_timestamp` defaults to the earliest event start."""
+        self.log_names = log_names
+        self.stage_timings = {}
+        build_start = time.perf_counter()
+        self._reset_accumulators()
+
+        n_events = n_chunks = 0
+        carry = None
+        with self._timed("stream"):
+            for chunk in self._iter_chunks(log):
+                chunk = self._parse_timestamps(chunk)
+                self._add_events(chunk, time_unit)
+
+                chunk = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+                # The last case may continue in the next chunk
+                tail = (chunk[log_names.case_id] == chunk[log_names.case_id].iloc[-1]).values
+                self._add_cases(chunk[~tail], time_unit)
+                carry = chunk[tail]
+                n_events += len(chunk) - len(carry)
+                n_chunks += 1
+
+            if carry is not None:
+                self._add_cases(carry, time_unit)
+                n_events += len(carry)
+        print(f"Streamed {n_events} events in {n_chunks} chunks.")
+
+        if start_timestamp is None:
+            start_timestamp = str(self._event_starts.first)
+        setup = self._build_setup(start_timestamp, time_unit)
+        self.stage_timings["total"] = time.perf_counter() - build_start
+        self._print_stage_timings()
+        return setup
+
+    # ─────────────────────────────────────────────────────────────────
+    # INPUT
+    # ─────────────────────────────────────────────────────────────────
+    def _iter_chunks(self, log):
+        names = self.log_names
+        columns = [names.case_id, names.activity, names.resource, names.start_timestamp, names.end_timestamp]
+
+        if isinstance(log, pd.DataFrame):
+            for start in range(0, len(log), self.chunksize):
+                yield log.iloc[start:start + self.chunksize]
+        elif isinstance(log, (str, os.PathLike)) and str(log).endswith(".parquet"):
+            # Requires pyarrow
+            import pyarrow.parquet as pq
+            for batch in pq.ParquetFile(log).iter_batches(batch_size=self.chunksize, columns=columns):
+                yield batch.to_pandas()
+        elif isinstance(log, (str, os.PathLike)):
+            yield from pd.read_csv(log, usecols=columns, chunksize=self.chunksize)
+        else:
+            yield from log
+
+    def _parse_timestamps(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk = chunk.copy()
+        for col in (self.log_names.start_timestamp, self.log_names.end_timestamp):
+            chunk[col] = pd.to_datetime(chunk[col], format="mixed")
+        return chunk
+
+    # ─────────────────────────────────────────────────────────────────
+    # ACCUMULATION
+    # ─────────────────────────────────────────────────────────────────
+    def _reset_accumulators(self):
+        # First-order transitions by phase (within-case, starts, ends) so the
+        # merged counts keep the key order of the in-memory fit
+        self._first_order = [TransitionCounts() for _ in range(3)]
+        self._second_order = TransitionCounts()
+        self._event_starts = WeeklyCounts()
+        self._case_starts = WeeklyCounts()
+        self._pair_counts = Counter()
+        self._durations_by_pair = ReservoirSampler(self.reservoir_size, self.seed)
+        self._durations_by_activity = ReservoirSampler(self.reservoir_size, self.seed + 1)
+        self._delays_by_pair = ReservoirSampler(self.reservoir_size, self.seed + 2)
+        self._delays_by_activity = ReservoirSampler(self.reservoir_size, self.seed + 3)
+        self._skills = SkillSets()
+        self._activities = set()
+        self._closed_cases = set()
+
+    def _add_events(self, chunk: pd.DataFrame, time_unit: str):
+        """Statistics of single events, in log order."""
+        col_act = self.log_names.activity
+        col_res = self.log_names.resource
+        ts_col = self.log_names.start_timestamp
+
+        durations = self._processing_durations(chunk, time_unit)
+        self._durations_by_pair.add(durations, ["act", "res"])
+        self._durations_by_activity.add(durations, "act")
+
+        self._event_starts.add(chunk[ts_col], keys=chunk[col_res].values)
+        sub = chunk[chunk[ts_col].notna()]
+        self._pair_counts.update(sub.groupby([col_res, col_act]).size().to_dict())
+
+        self._skills.add(chunk[col_res].values, chunk[col_act].values)
+        self._activities.update(chunk[col_act].unique())
+
+    def _add_cases(self, cases: pd.DataFrame, time_unit: str):
+        """Statistics that need every event of a case: routing, gaps, arrivals."""
+        if cases.empty:
+            return
+        col_case = self.log_names.case_id
+
+        case_ids = cases[col_case].unique()
+        reopened = self._closed_cases.intersection(case_ids)
+        if reopened:
+            raise ValueError(
+                f"Case {next(iter(reopened))!r} appears again after its events were processed; "
+                f"the log must list each case's events together (e.g. sorted by case)."
+            )
+        self._closed_cases.update(case_ids)
+
+        sorted_cases = self._sort_by_case(cases)
+
+        # ── Routing ──
+        codes, activities, same_case = self._encode_activities(sorted_cases)
+        labels = code_labels(activities)
+        for counter, (states, next_states) in zip(self._first_order, self._first_order_phases(codes, same_case)):
+            pairs, counts = self._count_transitions([states, next_states], len(activities))
+            counter.add(labels[pairs[:, 0]].tolist(), labels[pairs[:, 1]].tolist(), counts.tolist())
+        if self.second_order_routing:
+            trigrams, counts = self._count_transitions(self._trigram_codes(codes, same_case), len(activities))
+            bigrams = zip(labels[trigrams[:, 0]].tolist(), labels[trigrams[:, 1]].tolist())
+            self._second_order.add(list(bigrams), labels[trigrams[:, 2]].tolist(), counts.tolist())
+
+        # ── Waiting gaps ──
+        delays = self._waiting_delays(sorted_cases, time_unit)
+        self._delays_by_pair.add(delays, ["act", "res"])
+        self._delays_by_activity.add(delays, "act")
+
+        # ── Arrivals ──
+        case_starts = cases.groupby(col_case)[self.log_names.start_timestamp].min().dropna()
+        self._case_starts.add(case_starts)
+
+    # ─────────────────────────────────────────────────────────────────
+    # POLICIES
+    # ─────────────────────────────────────────────────────────────────
+    def _build_setup(self, start_timestamp, time_unit: str) -> SimulationSetup:
+        with self._timed("routing"):
+            first_order = TransitionCounts()
+            for counter in self._first_order:
+                first_order.merge(counter)
+            routing = ProbabilisticRoutingPolicy(probabilities_from_counts(*first_order.as_lists()))
+            if self.second_order_routing:
+                routing = SecondOrderRoutingPolicy(probabilities_from_counts(*self._second_order.as_lists()), routing)
+
+        with self._timed("processing_times"):
+            processing_times = EmpiricalResourceActivityProcessingTimePolicy(
+                self._durations_by_pair.samples, self._durations_by_activity.samples
+            )
+
+        with self._timed("calendar"):
+            calendar = self._calendar_from_counts(
+                self._event_starts.counts, self._event_starts.by_key, dict(self._pair_counts), start_timestamp
+            )
+
+        with self._timed("waiting_times"):
+            waiting_times = ExtraneousWaitingTimePolicy(
+                self._grouped_samples(self._delays_by_pair.as_frame(["act", "res"]), ["act", "res"], cap_quantile=0.995),
+                self._grouped_samples(self._delays_by_activity.as_frame("act"), "act", cap_quantile=0.995),
+            )
+
+        with self._timed("arrivals"):
+            arrivals = self._arrival_from_counts(
+                self._case_starts.counts, self._case_starts.first, self._case_starts.last, start_timestamp, time_unit
+            )
+
+        with self._timed("resources"):
+            resource_list = self._resource_list_from_skills(self._skills.as_dict())
+            resource_policy = SkillBasedResourcePolicy(resource_list)
+
+        return SimulationSetup(
+            time_unit=time_unit,
+            start_timestamp=start_timestamp,
+            routing_policy=routing,
+            waiting_time_policy=waiting_times,
+            processing_time_policy=processing_times,
+            calendar_policy=calendar,
+            arrival_policy=arrivals,
+            resource_policy=resource_policy,
+            activities=sorted(self._activities),
+            resources=resource_list,
+        )
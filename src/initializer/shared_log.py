@@ -0,0 +1,57 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+_ALIGN = 64
+
+
+class SharedLog:
+    """
+    Columns of a parsed event log in one shared memory block, so pool
+    workers can read the log without it being pickled to each of them.
+
+    Numeric and datetime64 columns are copied in as they are and come back
+    in the workers as views on the block. Other columns (strings, categories)
+    are stored as int32 codes into their unique values; the uniques travel
+    in the picklable `spec` and workers rebuild the column with its original
+    dtype. Only the creating process unlinks the block.
+    """
+
+    def __init__(self, log: pd.DataFrame, columns: list):
+        layout, arrays, offset = [], [], 0
+        for col in columns:
+            values = log[col]
+            if values.dtype.kind in "biufmM" and isinstance(values.dtype, np.dtype):
+                data, uniques = values.to_numpy(), None
+            else:
+                codes, uniques = pd.factorize(values)  # missing values -> -1
+                data = codes.astype(np.int32)
+            offset += -offset % _ALIGN
+            layout.append((col, offset, data.dtype.str, len(data), uniques))
+            arrays.append(data)
+            offset += data.nbytes
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (_, col_offset, _, _, _), data in zip(layout, arrays):
+            np.ndarray(data.shape, data.dtype, buffer=self._shm.buf, offset=col_offset)[:] = data
+        self.spec = (self._shm.name, layout)
+
+    @staticmethod
+    def attach(spec):
+        """(DataFrame, SharedMemory) in a worker; keep the handle alive while the frame is used."""
+        name, layout = spec
+        shm = shared_memory.SharedMemory(name=name)
+        columns = {}
+        for col, offset, dtype, length, uniques in layout:
+            data = np.ndarray((length,), np.dtype(dtype), buffer=shm.buf, offset=offset)
+            if uniques is None:
+                columns[col] = data
+            else:
+                columns[col] = uniques.take(data, allow_fill=True, fill_value=np.nan)
+        return pd.DataFrame(columns, copy=False), shm
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
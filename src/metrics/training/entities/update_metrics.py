@@ -14,3 +14,5 @@ class UpdateMetrics:
     total_loss: float
     approx_kl: Optional[float] = None
     clip_fraction: Optional[float] = None
+    policy_lag: Optional[float] = None  # mean policy versions between acting and learning (async mode)
+    queue_depth: Optional[int] = None   # trajectories waiting in the actor queue (async mode)
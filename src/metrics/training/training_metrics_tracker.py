@@ -43,6 +43,22 @@ class TrainingMetricsTracker:
         """Record one PPO update's metrics."""
         self.update_history.append(metrics)
 
+    def state_dict(self) -> Dict:
+        """Plain-data snapshot of the accumulated history, for checkpoints."""
+        return {
+            "episode_history": [asdict(m) for m in self.episode_history],
+            "update_history": [asdict(m) for m in self.update_history],
+            "best_compliance": self._best_compliance,
+            "best_episode": self._best_episode,
+        }
+
+    def load_state_dict(self, state: Dict):
+        """Restores the history saved by `state_dict` (used when resuming)."""
+        self.episode_history = [EpisodeMetrics(**m) for m in state["episode_history"]]
+        self.update_history = [UpdateMetrics(**m) for m in state["update_history"]]
+        self._best_compliance = state["best_compliance"]
+        self._best_episode = state["best_episode"]
+
     def recent_avg(self, window: int = 10, key: str = "sla_compliance_rate") -> float:
         """Moving average of a metric over the last `window` episodes."""
         if not self.episode_history:
@@ -116,4 +132,8 @@ class TrainingMetricsTracker:
             f"ValueLoss={metrics.value_loss:.4f}  "
             f"Entropy={metrics.entropy:.4f}  "
             f"TotalLoss={metrics.total_loss:.4f}"
+            + (f"  KL={metrics.approx_kl:.4f}" if metrics.approx_kl is not None else "")
+            + (f"  ClipFrac={metrics.clip_fraction:.3f}" if metrics.clip_fraction is not None else "")
+            + (f"  Lag={metrics.policy_lag:.2f}" if metrics.policy_lag is not None else "")
+            + (f"  Queue={metrics.queue_depth}" if metrics.queue_depth is not None else "")
         )
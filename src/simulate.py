@@ -1,18 +1,16 @@
 import pandas as pd
 
-from environment.simulator.adapters.event_log_to_csv import export_event_log_to_csv
 from initializer.implementations.DDPSInitializer import DDPSInitializer
+from initializer.cache import SetupCache
 from environment.simulator.core.setup import SimulationSetup
 from environment.simulator.core.log_names import LogColumnNames
 
-from environment.simulator.core.engine import SimulatorEngine
+from environment.simulator.core.replication import run_replications
 
-import random
-import numpy as np
-
-# Set seeds for reproducibility
-random.seed(42)
-np.random.seed(42)
+SEED = 42
+N_REPLICATIONS = 10
+LOG_PATH = "data/logs/AcademicCredentials/AcademicCredentials_train.csv"
+SETUP_CACHE_DIR = "data/cache/setups"  # None to always refit
 
 def run_basic_simulation():
     """
@@ -24,7 +22,7 @@ def run_basic_simulation():
     To run this script:
     python src/simulate.py
     """
-    log = pd.read_csv("data/logs/AcademicCredentials/AcademicCredentials_train.csv")
+    log = pd.read_csv(LOG_PATH)
 
     initializer = DDPSInitializer()
 
@@ -39,21 +37,27 @@ def run_basic_simulation():
     start_timestamp = log[log_names.start_timestamp].min()
     time_unit = "seconds"
 
-    setup: SimulationSetup = initializer.build(log, log_names, start_timestamp, time_unit)
-    simulator = SimulatorEngine(setup)
+    if SETUP_CACHE_DIR is None:
+        setup: SimulationSetup = initializer.build(log, log_names, start_timestamp, time_unit)
+    else:
+        setup = SetupCache(SETUP_CACHE_DIR).get_or_build(LOG_PATH, log_names, time_unit, initializer, log=log)
     # print(setup.routing_policy)
     # print(setup.arrival_policy)
     # get cases
     # simulate 10 cases (or all if max_cases=None)
     ncases = len(log[log_names.case_id].unique())
-    print(f"Running basic DDPS simulation with {ncases} cases...")
-    for i in range(10):
-        print(f"  Simulating case {i+1}/{ncases}...")
-        event_log = simulator.simulate(max_cases=ncases, convert_to_absolute_time=True)
-        path = f"data/simulated_logs/AcademicCredentialsV3/AcademicCredentials_DDPS_{i+1}.csv"
-        export_event_log_to_csv(event_log, path)
+    print(f"Running basic DDPS simulation with {ncases} cases x {N_REPLICATIONS} replications...")
+    paths = run_replications(
+        setup,
+        n_replications=N_REPLICATIONS,
+        base_seed=SEED,
+        max_cases=ncases,
+        convert_to_absolute_time=True,
+        path_template="data/simulated_logs/AcademicCredentialsV3/AcademicCredentials_DDPS_{i}.csv",
+    )
+    for path in paths:
         print(f"Basic DDPS simulation finished. Simulated event log exported to {path}")
-    print(simulator.setup.calendar_policy.global_counter, simulator.setup.calendar_policy.resources_counter)
+
 if __name__ == "__main__":
     run_basic_simulation()
 
@@ -0,0 +1,179 @@
+"""
+OPRA Hyperparameter Sweep.
+
+Fits the SimulationSetup once, ships it to a pool of training workers and
+runs a grid or random search over train.py hyperparameters. Every trial gets
+its own run directory (data/training_runs/<sweep_name>/trial_XXX). With
+--patience, trials that stop improving end early and free their worker for
+the next pending trial.
+
+Search space: each swept parameter takes a comma-separated list of values
+("3e-4,1e-3"). In random search a range "lo:hi" is also accepted and sampled
+uniformly (log-uniformly for --lr). Any other train.py argument is passed
+through unchanged to every trial.
+
+Usage:
+    python src/sweep.py --lr 1e-4,3e-4 --top_k 2,3 --episodes 50 --max_workers 4
+    python src/sweep.py --search random --n_trials 20 --lr 1e-5:1e-3 --top_p 0.8:0.99 --patience 15
+"""
+
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import torch
+
+from train import parse_args as parse_train_args, run_training, build_setup, compute_original_cycle_times, LOG_NAMES
+
+
+SWEEP_PARAMS = {
+    "lr": float,
+    "top_k": int,
+    "top_p": float,
+    "p_min_end": float,
+    "percentile": int,
+}
+
+LOG_SCALE = {"lr"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="OPRA Hyperparameter Sweep")
+    parser.add_argument("--search", type=str, default="grid", choices=["grid", "random"])
+    parser.add_argument("--n_trials", type=int, default=10, help="Trials to sample in random search")
+    parser.add_argument("--max_workers", type=int, default=None, help="Concurrent trials (default: CPU count)")
+    parser.add_argument("--sweep_name", type=str, default=None, help="Parent directory name for the trials")
+    parser.add_argument("--sweep_seed", type=int, default=0, help="Seed for sampling random-search trials")
+    for name in SWEEP_PARAMS:
+        parser.add_argument(f"--{name}", type=str, default=None, help=f"Values for {name}: a,b,c or lo:hi")
+    args, train_argv = parser.parse_known_args()
+    return args, train_argv
+
+
+def _parse_values(name: str, spec: str):
+    cast = SWEEP_PARAMS[name]
+    if ":" in spec:
+        lo, hi = spec.split(":")
+        return (cast(lo), cast(hi))
+    return [cast(v) for v in spec.split(",")]
+
+
+def build_trials(args) -> list:
+    """One dict of overrides per trial."""
+    space = {name: _parse_values(name, getattr(args, name))
+             for name in SWEEP_PARAMS if getattr(args, name) is not None}
+    if not space:
+        return [{}]
+
+    if args.search == "grid":
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                raise ValueError(f"Grid search needs explicit values for --{name}, got a range.")
+        names = list(space)
+        return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+    rng = random.Random(args.sweep_seed)
+    trials = []
+    for _ in range(args.n_trials):
+        trial = {}
+        for name, values in space.items():
+            if not isinstance(values, tuple):
+                trial[name] = rng.choice(values)
+            elif SWEEP_PARAMS[name] is int:
+                trial[name] = rng.randint(*values)
+            elif name in LOG_SCALE:
+                trial[name] = math.exp(rng.uniform(math.log(values[0]), math.log(values[1])))
+            else:
+                trial[name] = rng.uniform(*values)
+        trials.append(trial)
+    return trials
+
+
+# ── Worker side ──────────────────────────────────────────────────────────
+
+_SETUP = None
+_ORIGINAL_CYCLE_TIMES = None
+
+
+def _init_worker(setup, original_cycle_times):
+    """Receives the fitted setup once per worker process, not once per trial."""
+    global _SETUP, _ORIGINAL_CYCLE_TIMES
+    _SETUP = setup
+    _ORIGINAL_CYCLE_TIMES = original_cycle_times
+    # Trials run side by side; one core each
+    torch.set_num_threads(1)
+
+
+def _run_trial(index: int, overrides: dict, train_argv: list, run_name: str) -> dict:
+    train_args = parse_train_args(train_argv)
+    for name, value in overrides.items():
+        setattr(train_args, name, value)
+    train_args.run_name = run_name
+    start = time.time()
+    summary = run_training(train_args, _SETUP, _ORIGINAL_CYCLE_TIMES)
+    return {"trial": index, **overrides, **summary, "duration_sec": time.time() - start}
+
+
+def main():
+    args, train_argv = parse_args()
+    base_args = parse_train_args(train_argv)
+    if base_args.num_workers > 0:
+        raise ValueError("Trials run in worker processes; use --max_workers instead of --num_workers.")
+
+    sweep_name = args.sweep_name or f"sweep_{time.strftime('%Y%m%d_%H%M%S')}"
+    sweep_dir = os.path.join("data/training_runs", sweep_name)
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    trials = build_trials(args)
+    print(f"Sweep '{sweep_name}': {len(trials)} {args.search} trials")
+
+    # --- Fit once ---
+    t0 = time.time()
+    log = pd.read_csv(base_args.log_path)
+    cache_dir = None if base_args.no_setup_cache else base_args.setup_cache
+    setup = build_setup(log, LOG_NAMES, log_path=base_args.log_path, cache_dir=cache_dir, n_jobs=base_args.setup_jobs)
+    original_cycle_times = compute_original_cycle_times(log, LOG_NAMES)
+    print(f"Setup fitted in {time.time() - t0:.1f}s; shared with all trials\n")
+
+    max_workers = min(args.max_workers or os.cpu_count() or 1, len(trials))
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(setup, original_cycle_times),
+    ) as pool:
+        futures = {
+            pool.submit(_run_trial, i, trial, train_argv, f"{sweep_name}/trial_{i:03d}"): i
+            for i, trial in enumerate(trials)
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            params = ", ".join(f"{k}={result[k]:.4g}" for k in trials[result["trial"]])
+            print(
+                f"[Trial {result['trial']:>3d}] {params}  "
+                f"BestCR={result['best_cr']:.2%} (ep {result['best_episode']})  "
+                f"Episodes={result['episodes_run']}{' (early stop)' if result['stopped_early'] else ''}  "
+                f"Time={result['duration_sec']:.1f}s"
+            )
+
+    results.sort(key=lambda r: -r["best_cr"])
+    results_path = os.path.join(sweep_dir, "sweep_results.csv")
+    with open(results_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0].keys()))
+        writer.writeheader()
+        writer.writerows(results)
+
+    best = results[0]
+    print(f"\nBest trial: {best['trial']} with CR {best['best_cr']:.2%} ({best['run_dir']})")
+    print(f"Results saved to: {results_path}")
+
+
+if __name__ == "__main__":
+    main()
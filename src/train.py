@@ -20,12 +20,15 @@ import torch
 from contextlib import nullcontext
 
 from initializer.implementations.DDPSInitializer import DDPSInitializer
+from initializer.cache import SetupCache, DEFAULT_CACHE_DIR
 from environment.simulator.core.setup import SimulationSetup
 from environment.core.env import BusinessProcessEnvironment
 from environment.core.mask import NucleusMaskFunction
 from environment.simulator.core.log_names import LogColumnNames
 from environment.simulator.core.engine import SimulatorEngine
 from agent.agent import PPOAgent
+from agent.rollout import RolloutWorkerPool, AsyncRolloutWorkerPool
+from agent.checkpoint import CheckpointManager
 
 from metrics.training.functions import (
     compute_episode_metrics,
@@ -37,30 +40,89 @@ from metrics.training.training_metrics_tracker import (
 )
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="OPRA RL Training")
     parser.add_argument("--log_path", type=str, default="data/logs/LoanApp/LoanApp.csv")
+    parser.add_argument("--setup_cache", type=str, default=DEFAULT_CACHE_DIR,
+                        help="Directory of the fitted-setup cache")
+    parser.add_argument("--no_setup_cache", action="store_true", help="Always refit the setup")
+    parser.add_argument("--setup_jobs", type=int, default=1,
+                        help="Processes fitting the setup policies concurrently (-1 = one per CPU)")
     parser.add_argument("--episodes", type=int, default=100, help="Number of training episodes")
     parser.add_argument("--max_cases", type=int, default=20, help="Cases per episode")
     parser.add_argument("--percentile", type=int, default=95, help="SLA percentile threshold")
     parser.add_argument("--lr", type=float, default=3e-4, help="Learning rate")
     parser.add_argument("--gamma", type=float, default=0.99, help="Discount factor")
+    parser.add_argument("--gae_lambda", type=float, default=0.95, help="GAE lambda (1.0 = Monte Carlo advantages)")
+    parser.add_argument("--k_epochs", type=int, default=4, help="PPO epochs per update")
+    parser.add_argument("--minibatch_size", type=int, default=None, help="PPO minibatch size (default: full rollout)")
     parser.add_argument("--seed", type=int, default=42)
     parser.add_argument("--save_every", type=int, default=10, help="Save checkpoint every N episodes")
+    parser.add_argument("--keep_last", type=int, default=3, help="Periodic checkpoints to keep")
+    parser.add_argument("--keep_best", type=int, default=1, help="Best checkpoints (by SLA compliance) to keep")
+    parser.add_argument("--patience", type=int, default=None,
+                        help="Stop early after N episodes without a new best SLA compliance (default: off)")
     parser.add_argument("--update_every", type=int, default=1, help="PPO update every N episodes")
     parser.add_argument("--run_name", type=str, default=None, help="Name for this run")
     parser.add_argument("--resume", type=str, default=None, help="Path to checkpoint to resume from")
     parser.add_argument("--top_p", type=float, default=0.9, help="Nucleus filtering for activity mask")
     parser.add_argument("--top_k", type=int, default=3, help="Top-k filtering for activity mask")
     parser.add_argument("--p_min_end", type=float, default=0.1, help="Minimum end probability for activity mask")
-    return parser.parse_args()
+    parser.add_argument("--num_workers", type=int, default=0,
+                        help="Rollout worker processes (0 = collect episodes in the main process). "
+                             "Without --async_mode, update_every must be a multiple of num_workers so every "
+                             "update sees on-policy data.")
+    parser.add_argument("--async_mode", action="store_true",
+                        help="Workers keep simulating with slightly stale weights while the learner updates; "
+                             "staleness is corrected with V-trace (requires --num_workers > 0)")
+    parser.add_argument("--queue_size", type=int, default=None,
+                        help="Max trajectories waiting for the learner in async mode (default: 2 * num_workers)")
+    return parser.parse_args(argv)
+
+
+LOG_NAMES = LogColumnNames(
+    case_id="case_id",
+    activity="activity",
+    resource="resource",
+    start_timestamp="start_time",
+    end_timestamp="end_time",
+)
+
+
+def build_setup(log: pd.DataFrame, log_names: LogColumnNames = LOG_NAMES, log_path: str = None,
+                cache_dir: str = None, n_jobs: int = 1) -> SimulationSetup:
+    """
+    Fits the simulation setup on the event log (DDPS, seconds). With both
+    `log_path` and `cache_dir`, the setup is read from / stored in a SetupCache.
+    """
+    initializer = DDPSInitializer(n_jobs=n_jobs)
+    start_timestamp = log[log_names.start_timestamp].min()
+    time_unit = "seconds"
+    if log_path is not None and cache_dir is not None:
+        return SetupCache(cache_dir).get_or_build(log_path, log_names, time_unit, initializer, log=log)
+    return initializer.build(log, log_names, start_timestamp, time_unit)
+
+
+def compute_original_cycle_times(log: pd.DataFrame, log_names: LogColumnNames = LOG_NAMES) -> np.ndarray:
+    """Cycle time (seconds) of every case in the original log, in case-id order."""
+    start = pd.to_datetime(log[log_names.start_timestamp], format="mixed")
+    end = pd.to_datetime(log[log_names.end_timestamp], format="mixed")
+    cases = log[log_names.case_id]
+    cycle = end.groupby(cases).max() - start.groupby(cases).min()
+    return (cycle / pd.Timedelta(seconds=1)).to_numpy(dtype=float)
 
 
-def compute_cycle_times_from_log(event_log: list, time_unit: str = "seconds") -> list:
+def compute_cycle_times_from_log(event_log, time_unit: str = "seconds") -> list:
     """
-    Compute cycle times from the simulator's event_log (list of dicts).
-    Each dict has keys: case_id, activity, resource, start_time, end_time (numeric SimPy times).
+    Compute cycle times from the simulator's event_log.
+    Accepts the engine's columnar view (fast path) or a list of dicts with keys:
+    case_id, activity, resource, start_time, end_time (numeric SimPy times).
     """
+    store = getattr(event_log, "store", None)
+    if store is not None:
+        first_start, last_end = store.case_spans()
+        return (last_end - first_start).tolist()
+
     cases = {}
     for event in event_log:
         cid = event["case_id"]
@@ -79,19 +141,6 @@ def compute_cycle_times_from_log(event_log: list, time_unit: str = "seconds") ->
     return cycle_times
 
 
-def save_checkpoint(agent: PPOAgent, path: str, episode: int, metrics_summary: dict):
-    """Save model weights + training metadata."""
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    checkpoint = {
-        "episode": episode,
-        "policy_state_dict": agent.policy.state_dict(),
-        "optimizer_state_dict": agent.optimizer.state_dict(),
-        "metrics_summary": metrics_summary,
-    }
-    torch.save(checkpoint, path)
-    print(f"  Checkpoint saved: {path}")
-
-
 def load_checkpoint(agent: PPOAgent, path: str) -> int:
     """Load model weights. Returns the episode number."""
     checkpoint = torch.load(path, map_location=agent.device, weights_only=False)
@@ -131,7 +180,9 @@ def run_single_episode(
                 act_name = simulator.all_activities[act_idx]
                 return env.get_resource_mask(act_name, case)
 
-            act_idx, res_idx = agent.select_action(
+            # Evaluation uses the inference-only path so the buffer never grows
+            choose = agent.act if eval_mode else agent.select_action
+            act_idx, res_idx = choose(
                 state=obs,
                 activity_mask=activity_mask,
                 resource_mask_callback=res_mask_cb,
@@ -146,8 +197,7 @@ def run_single_episode(
 
             # Store transition in agent buffer (only during training)
             if not eval_mode:
-                agent.buffer.rewards.append(reward)
-                agent.buffer.is_terminals.append(terminated or truncated)
+                agent.buffer.add_reward(reward, terminated or truncated)
 
             obs = next_obs
             total_reward += reward
@@ -157,9 +207,75 @@ def run_single_episode(
     return total_reward, num_steps, cycle_times
 
 
+def iterate_episodes(env, simulator, agent, start_episode, end_episode, pool=None):
+    """
+    Yields (episode, total_reward, num_steps, cycle_times, duration_sec).
+
+    Serial mode runs each episode here with `select_action`. With a
+    RolloutWorkerPool, episodes are collected in rounds of `pool.num_workers`
+    that end on multiples of `pool.num_workers` (a resumed run first
+    collects a shorter round), and each trajectory is appended to the agent
+    buffer before it is yielded; the next round starts only when the caller
+    asks for the next episode, so weights broadcast after an update are used
+    from that round on. With an
+    AsyncRolloutWorkerPool, trajectories are taken from its queue as they
+    arrive while the workers keep simulating.
+    """
+    ep = start_episode
+    while ep <= end_episode:
+        if isinstance(pool, AsyncRolloutWorkerPool):
+            trajectory = pool.get()
+            agent.add_trajectory(trajectory)
+            yield ep, trajectory.total_reward, trajectory.num_steps, trajectory.cycle_times, trajectory.duration_sec
+            ep += 1
+            continue
+
+        if pool is None:
+            ep_start = time.time()
+            total_reward, num_steps, cycle_times = run_single_episode(
+                env=env,
+                simulator=simulator,
+                agent=agent,
+                deterministic=False,
+            )
+            yield ep, total_reward, num_steps, cycle_times, time.time() - ep_start
+            ep += 1
+            continue
+
+        round_size = pool.num_workers - (ep - 1) % pool.num_workers
+        for trajectory in pool.collect(min(round_size, end_episode - ep + 1)):
+            agent.add_trajectory(trajectory)
+            yield ep, trajectory.total_reward, trajectory.num_steps, trajectory.cycle_times, trajectory.duration_sec
+            ep += 1
+
+
 def main():
     args = parse_args()
 
+    # --- Load data ---
+    log = pd.read_csv(args.log_path)
+
+    # --- Build simulation setup ---
+    cache_dir = None if args.no_setup_cache else args.setup_cache
+    setup: SimulationSetup = build_setup(
+        log, LOG_NAMES, log_path=args.log_path, cache_dir=cache_dir, n_jobs=args.setup_jobs
+    )
+
+    # --- SLA threshold reference ---
+    original_cycle_times = compute_original_cycle_times(log, LOG_NAMES)
+
+    run_training(args, setup, original_cycle_times)
+
+
+def run_training(args, setup: SimulationSetup, original_cycle_times) -> dict:
+    """
+    Trains one agent on an already fitted setup.
+
+    Everything that depends only on the event log (the setup and the original
+    cycle times) comes in from the caller, so repeated runs (see sweep.py) fit
+    it once. Stops early when `args.patience` episodes pass without a new best
+    SLA compliance. Returns a summary of the run.
+    """
     # --- Reproducibility ---
     random.seed(args.seed)
     np.random.seed(args.seed)
@@ -170,29 +286,9 @@ def main():
         args.run_name = f"run_{time.strftime('%Y%m%d_%H%M%S')}"
     run_dir = os.path.join("data/training_runs", args.run_name)
 
-    # --- Load data ---
-    log = pd.read_csv(args.log_path)
-    log_names = LogColumnNames(
-        case_id="case_id",
-        activity="activity",
-        resource="resource",
-        start_timestamp="start_time",
-        end_timestamp="end_time",
-    )
-
-    # --- Build simulation setup ---
-    initializer = DDPSInitializer()
-    start_timestamp = log[log_names.start_timestamp].min()
-    time_unit = "seconds"
-    setup: SimulationSetup = initializer.build(log, log_names, start_timestamp, time_unit)
     simulator = SimulatorEngine(setup)
 
     # --- SLA threshold ---
-    original_cycle_times = []
-    for case_id, group in log.groupby(log_names.case_id):
-        st = pd.to_datetime(group[log_names.start_timestamp], format="mixed").min()
-        et = pd.to_datetime(group[log_names.end_timestamp], format="mixed").max()
-        original_cycle_times.append((et - st).total_seconds())
     sla_threshold = np.percentile(original_cycle_times, args.percentile)
     baseline_cr = np.mean(np.array(original_cycle_times) < sla_threshold)
     print(f"SLA Threshold (p{args.percentile}): {sla_threshold:.2f}s")
@@ -212,14 +308,12 @@ def main():
         num_activities=simulator.num_activities,
         num_resources=simulator.num_resources,
         lr=args.lr,
+        gamma=args.gamma,
+        K_epochs=args.k_epochs,
+        gae_lambda=args.gae_lambda,
+        minibatch_size=args.minibatch_size,
     )
 
-    # --- Resume from checkpoint ---
-    start_episode = 1
-    if args.resume is not None:
-        start_episode = load_checkpoint(agent, args.resume) + 1
-        print(f"  Resuming training from episode {start_episode}")
-
     # --- Metrics tracker ---
     hyperparams = {
         "log_path": args.log_path,
@@ -234,8 +328,27 @@ def main():
         "top_p": args.top_p,
         "top_k": args.top_k,
         "p_min_end": args.p_min_end,
+        "num_workers": args.num_workers,
+        "async_mode": args.async_mode,
     }
     tracker = TrainingMetricsTracker(log_dir=run_dir, hyperparams=hyperparams)
+    checkpoints = CheckpointManager(
+        os.path.join(run_dir, "checkpoints"), keep_last=args.keep_last, keep_best=args.keep_best
+    )
+
+    best_cr = -1.0
+    update_count = 0
+
+    # --- Resume from checkpoint ---
+    # Restores weights, optimizer, rollout buffer, tracker history, update
+    # counter and RNG states (those of the main process; worker streams restart)
+    start_episode = 1
+    if args.resume is not None:
+        checkpoint = CheckpointManager.load(args.resume, agent, tracker)
+        start_episode = checkpoint["episode"] + 1
+        update_count = checkpoint.get("update_count", 0)
+        best_cr = checkpoint.get("extra", {}).get("best_cr", best_cr)
+        print(f"  Resuming training from episode {start_episode}")
 
     # ================================================================ #
     #  Training Loop
@@ -243,22 +356,47 @@ def main():
     print(f"\nStarting training: {args.episodes} episodes, {args.max_cases} cases each")
     print(f"Run directory: {run_dir}\n")
 
-    best_cr = -1.0
-    update_count = 0
-
-    for ep in range(start_episode, args.episodes + 1):
-        ep_start = time.time()
-
-        # --- Run episode ---
-        total_reward, num_steps, cycle_times = run_single_episode(
-            env=env,
-            simulator=simulator,
-            agent=agent,
-            deterministic=False,
+    pool = None
+    if args.async_mode and args.num_workers <= 0:
+        raise ValueError("--async_mode requires --num_workers > 0")
+    if args.num_workers > 0 and not args.async_mode and args.update_every % args.num_workers != 0:
+        # An update in the middle of a round would leave the rest of the round,
+        # collected with the old weights, for the next on-policy update
+        raise ValueError(
+            f"--update_every ({args.update_every}) must be a multiple of --num_workers ({args.num_workers}) "
+            f"in synchronous mode"
         )
-
-        ep_duration = time.time() - ep_start
-
+    if args.num_workers > 0:
+        pool_kwargs = dict(
+            num_workers=args.num_workers,
+            sla_threshold=sla_threshold,
+            max_cases=args.max_cases,
+            policy_kwargs={
+                "state_dim": env.observation_space.shape[0],
+                "num_activities": simulator.num_activities,
+                "num_resources": simulator.num_resources,
+            },
+            env_kwargs={"activity_mask_function": env.activity_mask_function},
+            base_seed=args.seed,
+        )
+        if args.async_mode:
+            pool = AsyncRolloutWorkerPool(
+                setup,
+                initial_state_dict=agent.policy_old.state_dict(),
+                queue_size=args.queue_size,
+                **pool_kwargs,
+            )
+        else:
+            pool = RolloutWorkerPool(setup, **pool_kwargs)
+            pool.broadcast(agent.policy_old.state_dict())
+        mode = "asynchronous" if args.async_mode else "synchronous"
+        print(f"Collecting episodes with {args.num_workers} {mode} rollout workers\n")
+
+    last_episode = start_episode - 1
+    stopped_early = False
+    episodes = iterate_episodes(env, simulator, agent, start_episode, args.episodes, pool)
+    for ep, total_reward, num_steps, cycle_times, ep_duration in episodes:
+        last_episode = ep
         # --- Compute and log episode metrics ---
         ep_metrics = compute_episode_metrics(
             episode=ep,
@@ -277,7 +415,7 @@ def main():
             # NOTE: agent.update() should return loss info.
             # If your current PPOAgent.update() doesn't return losses,
             # you'll need to modify it (see the adapter below).
-            loss_info = agent.update()
+            loss_info = agent.update(off_policy=args.async_mode)
 
             if loss_info is not None:
                 upd_metrics = UpdateMetrics(
@@ -289,46 +427,76 @@ def main():
                     total_loss=loss_info.get("total_loss", 0.0),
                     approx_kl=loss_info.get("approx_kl"),
                     clip_fraction=loss_info.get("clip_fraction"),
+                    policy_lag=pool.consume_policy_lag() if args.async_mode else None,
+                    queue_depth=pool.queue_depth() if args.async_mode else None,
                 )
                 tracker.log_update(upd_metrics)
                 tracker.print_update_summary(upd_metrics)
 
+            if pool is not None:
+                pool.broadcast(agent.policy_old.state_dict())
+
         # --- Save checkpoint ---
         is_best = ep_metrics.sla_compliance_rate > best_cr
         if is_best:
             best_cr = ep_metrics.sla_compliance_rate
 
-        if ep % args.save_every == 0 or is_best:
-            ckpt_path = os.path.join(run_dir, "checkpoints", f"checkpoint_ep{ep:04d}.pt")
-            save_checkpoint(agent, ckpt_path, ep, {
-                "sla_compliance_rate": ep_metrics.sla_compliance_rate,
-                "avg_cycle_time": ep_metrics.avg_cycle_time,
-                "total_reward": ep_metrics.total_reward,
-            })
-
-            if is_best:
-                best_path = os.path.join(run_dir, "checkpoints", "best_model.pt")
-                save_checkpoint(agent, best_path, ep, {
+        periodic = ep % args.save_every == 0
+        if periodic or is_best:
+            # Snapshot now, write in the background
+            checkpoints.save(
+                agent, ep, {
                     "sla_compliance_rate": ep_metrics.sla_compliance_rate,
                     "avg_cycle_time": ep_metrics.avg_cycle_time,
                     "total_reward": ep_metrics.total_reward,
-                })
+                },
+                tracker=tracker,
+                update_count=update_count,
+                periodic=periodic,
+                extra={"best_cr": best_cr},
+            )
 
         # --- Periodic save of metrics ---
         if ep % args.save_every == 0:
             tracker.save()
 
+        # --- Early stopping ---
+        if args.patience is not None and ep - tracker._best_episode >= args.patience:
+            print(f"\nNo new best CR for {args.patience} episodes; stopping early at episode {ep}.")
+            stopped_early = True
+            break
+
+    if pool is not None:
+        pool.close()
+
     # --- Final save ---
     tracker.save()
-    final_path = os.path.join(run_dir, "checkpoints", "final_model.pt")
-    save_checkpoint(agent, final_path, args.episodes, {
-        "sla_compliance_rate": tracker.episode_history[-1].sla_compliance_rate,
-    })
+    checkpoints.save_as(
+        agent, "final_model.pt", last_episode, {
+            "sla_compliance_rate": tracker.episode_history[-1].sla_compliance_rate,
+        },
+        tracker=tracker,
+        update_count=update_count,
+        extra={"best_cr": best_cr},
+    )
+    checkpoints.close()
 
     print(f"\nTraining complete.")
     print(f"Best CR: {best_cr:.2%} at episode {tracker._best_episode}")
     print(f"Metrics saved to: {run_dir}")
 
+    return {
+        "run_dir": run_dir,
+        "sla_threshold": float(sla_threshold),
+        "baseline_cr": float(baseline_cr),
+        "best_cr": float(best_cr),
+        "best_episode": tracker._best_episode,
+        "final_cr": tracker.episode_history[-1].sla_compliance_rate,
+        "recent_avg_cr": tracker.recent_avg(),
+        "episodes_run": last_episode,
+        "stopped_early": stopped_early,
+    }
+
 
 if __name__ == "__main__":
     main()